@@ -1,14 +1,33 @@
 import os
+import sqlite3
+import tempfile
+import threading
+import time
+from contextlib import suppress
+from functools import partial
 from pathlib import Path
 
-import pandas as pd
 import streamlit as st
+from sqlglot import exp
 
+from nl2sql_assistant.app_state import get_query_executor, get_schema_selector, get_sql_cache
 from nl2sql_assistant.chains.risk_classifier import classify_risk
-from nl2sql_assistant.chains.sql_generator import generate_sql
+from nl2sql_assistant.chains.sql_cache import schema_fingerprint
+from nl2sql_assistant.chains.sql_generator import stream_sql
 from nl2sql_assistant.db.bootstrap import ensure_sample_db
-from nl2sql_assistant.db.runner import run_query, validate_sql
-from nl2sql_assistant.db.schema import schema_as_text
+from nl2sql_assistant.db.export import EXPORT_FORMATS, EXPORT_MIME_TYPES, export_query
+from nl2sql_assistant.db.runner import (
+    DEFAULT_MAX_COST,
+    DEFAULT_PAGE_SIZE,
+    PageToken,
+    estimate_query_cost,
+    fetch_page,
+    validate_sql,
+)
+from nl2sql_assistant.db.schema import load_schema
+from nl2sql_assistant.db.statement import parse_statement
+from nl2sql_assistant.db.value_index import format_value_hints, get_value_index
+from nl2sql_assistant.rag.schema_selector import select_schema
 from nl2sql_assistant.ui.layout import inject_base_css, page_header, set_app_config
 
 set_app_config()
@@ -57,6 +76,14 @@ with st.sidebar:
         "✓ Automatic schema validation"
     )
 
+    st.divider()
+
+    st.markdown("### ⚡ SQL Cache")
+    cache_stats = get_sql_cache().stats()
+    st.caption(
+        f"Hits: {cache_stats.hits} · Misses: {cache_stats.misses} · Entries: {cache_stats.entries}"
+    )
+
 # --- Session state defaults ---
 st.session_state.setdefault("question", "Show completed orders with customer name, newest first.")
 st.session_state.setdefault("generated_sql", "")
@@ -65,7 +92,14 @@ st.session_state.setdefault("risk_result", None)
 st.session_state.setdefault("validated", False)
 st.session_state.setdefault("executable", False)
 st.session_state.setdefault("validation_msg", "")
-st.session_state.setdefault("result_df", None)
+st.session_state.setdefault("result_page", None)
+st.session_state.setdefault("page_history", [])
+st.session_state.setdefault("page_request", None)
+st.session_state.setdefault("exec_error", "")
+st.session_state.setdefault("query_cost", None)
+st.session_state.setdefault("allow_expensive", False)
+st.session_state.setdefault("query_cancelled", False)
+st.session_state.setdefault("schema_selection", None)
 
 # --- Info banner ---
 st.info(
@@ -78,7 +112,19 @@ st.markdown("<br>", unsafe_allow_html=True)
 DB_PATH = Path("data/sample.db")
 ensure_sample_db(DB_PATH)
 
-schema_text = schema_as_text(DB_PATH)
+schema = load_schema(DB_PATH)
+schema_text = schema.text
+schema_selector = get_schema_selector(DB_PATH, schema.schema_version)
+
+
+def _sql_tables(sql: str) -> list[str]:
+    """Tables a generated query reads, so the risk reviewer always sees them."""
+    try:
+        tree = parse_statement(sql).tree
+    except ValueError:
+        return []
+    return sorted({t.name for t in tree.find_all(exp.Table)})
+
 
 # --- Main layout ---
 left, right = st.columns([1, 1], gap="large")
@@ -96,6 +142,12 @@ with left:
     # Schema expander
     with st.expander("📋 View Database Schema", expanded=False):
         st.code(schema_text, language="sql")
+        selection = st.session_state["schema_selection"]
+        if selection is not None and selection.pruned:
+            st.caption(
+                f"Prompt schema: {len(selection.tables)} of {len(schema_selector.tables)} "
+                f"tables (~{selection.token_count} tokens): {', '.join(selection.tables)}"
+            )
 
     # Actions
     col_gen, col_clear = st.columns([2, 1])
@@ -110,28 +162,82 @@ with left:
         st.session_state["validated"] = False
         st.session_state["executable"] = False
         st.session_state["validation_msg"] = ""
-        st.session_state["result_df"] = None
+        st.session_state["result_page"] = None
+        st.session_state["page_history"] = []
+        st.session_state["exec_error"] = ""
+        st.session_state["query_cost"] = None
+        st.session_state["schema_selection"] = None
         st.rerun()
 
     if gen:
-        with st.spinner("🔮 Generating SQL..."):
-            res = generate_sql(schema_text=schema_text, question=st.session_state["question"])
-            st.session_state["generated_sql"] = res.sql
-            st.session_state["notes"] = res.notes
+        # Only the tables relevant to the question go into the prompt; the
+        # cache stays keyed on the full schema.
+        selection = select_schema(schema_selector, st.session_state["question"])
+        st.session_state["schema_selection"] = selection
+        # Real values for literals the question mentions ('completed', 'USA', ...).
+        value_hits = get_value_index(DB_PATH).lookup(st.session_state["question"])
+
+        # Stream tokens live; guardrails run on every partial and cancel early.
+        st.caption("🔮 Generating SQL...")
+        live_sql = st.empty()
+        streamed = ""
+        aborted_msg = ""
+        try:
+            for token in stream_sql(
+                schema_text=selection.schema_text,
+                question=st.session_state["question"],
+                cache=get_sql_cache(),
+                schema_fp=schema_fingerprint(schema_text),
+                value_hints=format_value_hints(value_hits),
+            ):
+                streamed += token
+                live_sql.code(streamed, language="sql")
+        except ValueError as e:
+            aborted_msg = f"Generation stopped early: {e}"
+        st.session_state["generated_sql"] = streamed.strip()
 
         # Automatic validation
         with st.spinner("🔍 Validating SQL..."):
-            ok, msg = validate_sql(sql=st.session_state["generated_sql"], mode="read")
+            if aborted_msg:
+                ok, msg = False, aborted_msg
+            else:
+                ok, msg = validate_sql(
+                    sql=st.session_state["generated_sql"], mode="read", schema=schema
+                )
             st.session_state["validated"] = ok
             st.session_state["executable"] = ok
             st.session_state["validation_msg"] = msg
 
+        # Cost gate: estimate from the query plan before anything runs
+        st.session_state["query_cost"] = None
+        st.session_state["allow_expensive"] = False
+        if ok:
+            try:
+                st.session_state["query_cost"] = estimate_query_cost(
+                    DB_PATH, st.session_state["generated_sql"], limit=200
+                )
+            except Exception as e:
+                st.session_state["validated"] = False
+                st.session_state["executable"] = False
+                st.session_state["validation_msg"] = f"Query plan check failed: {e}"
+
+        if aborted_msg:
+            st.session_state["risk"] = "unknown"
+            st.session_state["risk_result"] = None
+            st.rerun()
+
         # Automatic risk check
         with st.spinner("🛡️ Running risk assessment..."):
+            risk_schema = select_schema(
+                schema_selector,
+                st.session_state["question"],
+                include=_sql_tables(st.session_state["generated_sql"]),
+            )
             risk_result = classify_risk(
-                schema_text=schema_text,
+                schema_text=schema,
                 question=st.session_state["question"],
                 sql=st.session_state["generated_sql"],
+                prompt_schema_text=risk_schema.schema_text,
             )
 
             # Extract risk level string from RiskResult object
@@ -248,34 +354,150 @@ with right:
 
     # Execute button
     st.markdown("#### 3️⃣ Execute Query")
+
+    query_cost = st.session_state["query_cost"]
+    over_budget = query_cost is not None and query_cost.exceeds(DEFAULT_MAX_COST)
+    if query_cost is not None:
+        st.caption(
+            f"💰 Estimated cost: {query_cost.estimated_cost:,.0f} (budget {DEFAULT_MAX_COST:,.0f})"
+        )
+        for warning in query_cost.warnings:
+            st.caption(f"⚠️ {warning}")
+        with st.expander("🗺️ Query plan", expanded=False):
+            st.code("\n".join(query_cost.plan) or "(empty)", language="text")
+    if over_budget:
+        st.warning("This query is estimated to exceed the cost budget and is blocked by default.")
+        st.checkbox("Run it anyway", key="allow_expensive")
+
     execute_btn = st.button(
         "▶️ Execute (SELECT only)",
         width="stretch",
         type="primary",
-        disabled=not st.session_state["validated"],
+        disabled=not st.session_state["validated"]
+        or (over_budget and not st.session_state["allow_expensive"]),
     )
 
+    if st.session_state["query_cancelled"]:
+        st.session_state["query_cancelled"] = False
+        st.session_state["exec_error"] = "Query cancelled."
+
     if execute_btn:
-        with st.spinner("⚙️ Executing query..."):
-            cols, rows = run_query(DB_PATH, st.session_state["generated_sql"], limit=200)
-            df = pd.DataFrame(rows, columns=cols)
-            st.session_state["result_df"] = df
+        st.session_state["page_history"] = []
+        st.session_state["page_request"] = PageToken()
+
+    page_request = st.session_state["page_request"]
+    if page_request is not None:
+        st.session_state["page_request"] = None
+        # Run on a worker thread so this script stays responsive: clicking
+        # Cancel reruns the page, which interrupts the wait loop below and sets
+        # the event that the query's progress handler checks.
+        cancel_event = threading.Event()
+        future = get_query_executor().submit(
+            fetch_page,
+            DB_PATH,
+            st.session_state["generated_sql"],
+            DEFAULT_PAGE_SIZE,
+            page_request,
+            cancel_event=cancel_event,
+            columnar=True,
+        )
+        st.button(
+            "⏹️ Cancel query",
+            width="stretch",
+            on_click=lambda: st.session_state.update(query_cancelled=True),
+        )
+        status = st.empty()
+        started = time.monotonic()
+        try:
+            while not future.done():
+                status.caption(f"⚙️ Executing query... {time.monotonic() - started:.1f}s")
+                time.sleep(0.1)
+        finally:
+            if not future.done():
+                cancel_event.set()
+
+        try:
+            st.session_state["result_page"] = future.result()
+            st.session_state["exec_error"] = ""
+        except (ValueError, sqlite3.Error) as e:
+            st.session_state["result_page"] = None
+            st.session_state["exec_error"] = str(e)
         st.rerun()
 
+    if st.session_state["exec_error"]:
+        st.error(f"❌ {st.session_state['exec_error']}")
+
 st.markdown("---")
 
 # --- Results area ---
 st.markdown("#### 📊 Query Results")
-if st.session_state["result_df"] is None:
+page = st.session_state["result_page"]
+
+
+def _next_page() -> None:
+    st.session_state["page_history"].append(page.token)
+    st.session_state["page_request"] = page.next_token
+
+
+def _prev_page() -> None:
+    st.session_state["page_request"] = st.session_state["page_history"].pop()
+
+
+def _export_full_result(sql: str, fmt: str) -> bytes:
+    # The query streams to disk in constant memory; Streamlit then serves the
+    # finished file from memory, so read it once and remove the temp file.
+    fd, name = tempfile.mkstemp(prefix="nl2sql_export_", suffix=f".{fmt}")
+    os.close(fd)
+    path = Path(name)
+    try:
+        export_query(DB_PATH, sql, path, fmt)
+        return path.read_bytes()
+    finally:
+        with suppress(OSError):
+            path.unlink()
+
+
+if page is None:
     st.caption("Execute a validated query to see results here.")
 else:
-    st.dataframe(st.session_state["result_df"], width="stretch")
-
-    # Download option
-    csv = st.session_state["result_df"].to_csv(index=False).encode("utf-8")
-    st.download_button(
-        label="📥 Download as CSV",
-        data=csv,
-        file_name="query_results.csv",
-        mime="text/csv",
-    )
+    # Only the current page is held in memory; Prev/Next re-query on demand.
+    page_no = len(st.session_state["page_history"]) + 1
+    # Arrow buffers go straight to the grid, no DataFrame copy.
+    st.dataframe(page.table, width="stretch")
+
+    col_prev, col_info, col_next = st.columns([1, 2, 1])
+    with col_prev:
+        st.button(
+            "◀ Prev",
+            width="stretch",
+            disabled=page_no == 1,
+            on_click=_prev_page,
+        )
+    with col_info:
+        st.caption(
+            f"Page {page_no} · {page.num_rows} rows"
+            + (" · keyset pagination" if page.keyset else "")
+        )
+    with col_next:
+        st.button(
+            "Next ▶",
+            width="stretch",
+            disabled=page.next_token is None,
+            on_click=_next_page,
+        )
+
+    # Export the full result (no display limit): re-run the query and stream
+    # it to a temp file only when the download button is clicked.
+    col_fmt, col_dl = st.columns([1, 2])
+    with col_fmt:
+        export_fmt = st.selectbox(
+            "Export format", EXPORT_FORMATS, key="export_fmt", label_visibility="collapsed"
+        )
+    with col_dl:
+        st.download_button(
+            label=f"📥 Export full result as {export_fmt.upper()}",
+            data=partial(_export_full_result, st.session_state["generated_sql"], export_fmt),
+            file_name=f"query_results.{export_fmt}",
+            mime=EXPORT_MIME_TYPES[export_fmt],
+            width="stretch",
+        )
@@ -1,12 +1,17 @@
 import json
 import os
+import time
+from concurrent.futures import Future
+from typing import TypeVar
 
 import streamlit as st
 
 from nl2sql_assistant.app_state import get_db_path, get_rag_index
 from nl2sql_assistant.chains.write_sql_generator import generate_write_sql
-from nl2sql_assistant.db.write_runner import backup_db, execute_write
-from nl2sql_assistant.rag.retriever_bm25 import retrieve
+from nl2sql_assistant.db.undo_journal import list_journal
+from nl2sql_assistant.db.write_queue import WriteQueue, get_write_queue
+from nl2sql_assistant.db.write_runner import PartialWriteError, WritePreview
+from nl2sql_assistant.rag.retriever_bm25 import cached_retrieve, retrieval_key
 from nl2sql_assistant.ui.layout import inject_base_css, page_header, set_app_config
 
 set_app_config()
@@ -58,13 +63,76 @@ with st.sidebar:
 # Session state defaults
 st.session_state.setdefault("write_prompt", "")
 st.session_state.setdefault("retrieved_context", "")
+st.session_state.setdefault("retrieval_key", None)
 st.session_state.setdefault("write_sql_res", None)
 st.session_state.setdefault("confirm_execute", False)
-st.session_state.setdefault("backup_first", True)
+st.session_state.setdefault("journal_write", True)
+st.session_state.setdefault("last_receipt", None)
+st.session_state.setdefault("write_preview", None)
+st.session_state.setdefault("preview_error", "")
+
+
+def _refresh_context(prompt: str) -> None:
+    """
+    Update the retrieved context for `prompt`. The text area only reruns the
+    page when an edit is committed; edits that do not change the retrieval key
+    (case, punctuation, words outside the index) reuse the current context,
+    and repeated keys are served from cached_retrieve.
+    """
+    key = (rag_index.version, retrieval_key(rag_index, prompt)) if prompt.strip() else None
+    if key == st.session_state["retrieval_key"]:
+        return
+    st.session_state["retrieved_context"] = cached_retrieve(rag_index, prompt, k=3) if key else ""
+    st.session_state["retrieval_key"] = key
+
+
+def _render_preview(preview: WritePreview | None) -> None:
+    if preview is None:
+        return
+    more = f" (showing {len(preview.changes)})" if preview.truncated else ""
+    st.markdown(
+        f"**👁️ Preview**: {preview.op.upper()} on `{preview.table}` "
+        f"changes **{preview.rowcount}** rows{more}"
+    )
+    if preview.op == "update":
+        diff = [
+            {"rowid": c.row_id, "column": col, "before": old, "after": new}
+            for c in preview.changes
+            for col, (old, new) in c.changed.items()
+        ]
+    else:
+        diff = [
+            {"rowid": c.row_id, **((c.after if preview.op == "insert" else c.before) or {})}
+            for c in preview.changes
+        ]
+    if diff:
+        st.dataframe(diff, use_container_width=True, hide_index=True)
+
+
+T = TypeVar("T")
+
+
+def _await_write(write_queue: WriteQueue, future: Future[T], action: str) -> T:
+    # All sessions share one writer thread; show how many writes are ahead of us.
+    status = st.empty()
+    while not future.done():
+        status.caption(f"⏳ {action}... {write_queue.depth} write(s) in queue")
+        time.sleep(0.1)
+    status.empty()
+    return future.result()
+
 
 # Data / index
 db_path = get_db_path()
 rag_index, schema_text = get_rag_index()
+write_queue = get_write_queue(db_path)
+
+with st.sidebar:
+    st.divider()
+    st.markdown("### ✍️ Write Queue")
+    st.caption(
+        f"Pending: {write_queue.depth} · Done: {write_queue.processed} · Failed: {write_queue.failed}"
+    )
 
 # --- Info banner ---
 st.info(
@@ -86,13 +154,9 @@ with left:
         placeholder="Example: Set order status to 'completed' for order_id 3",
     )
 
-    # Retrieve context as user types (lightweight)
-    if st.session_state["write_prompt"].strip():
-        context = retrieve(rag_index, st.session_state["write_prompt"], k=3)
-    else:
-        context = ""
-
-    st.session_state["retrieved_context"] = context
+    # Retrieve context as the prompt changes (memoized)
+    _refresh_context(st.session_state["write_prompt"])
+    context = st.session_state["retrieved_context"]
 
     with st.expander("🔍 Retrieved Context (RAG)", expanded=False):
         st.code(context or "No context yet. Enter a write request above.", language="text")
@@ -106,9 +170,12 @@ with left:
     if clear:
         st.session_state["write_prompt"] = ""
         st.session_state["retrieved_context"] = ""
+        st.session_state["retrieval_key"] = None
         st.session_state["write_sql_res"] = None
         st.session_state["confirm_execute"] = False
-        st.session_state["backup_first"] = True
+        st.session_state["journal_write"] = True
+        st.session_state["write_preview"] = None
+        st.session_state["preview_error"] = ""
         st.rerun()
 
     if generate:
@@ -122,6 +189,8 @@ with left:
                 )
                 st.session_state["write_sql_res"] = res
                 st.session_state["confirm_execute"] = False
+                st.session_state["write_preview"] = None
+                st.session_state["preview_error"] = ""
             st.toast("✅ Write SQL generated. Review carefully before executing.")
             st.rerun()
 
@@ -136,7 +205,10 @@ with right:
         st.markdown("**📝 Generated SQL**")
         st.code(res.sql or "(empty)", language="sql")
 
-        st.markdown("**🔧 Parameters (Named)**")
+        if res.is_batch:
+            st.markdown(f"**🔧 Parameters (Named) · batch of {len(res.params)} rows**")
+        else:
+            st.markdown("**🔧 Parameters (Named)**")
         st.code(json.dumps(res.params, indent=2), language="json")
 
         if res.safety_notes:
@@ -147,6 +219,23 @@ with right:
         with st.expander("🐛 Raw Model Output (Debug)", expanded=False):
             st.code(res.raw, language="json")
 
+        # Dry run: execute inside a SAVEPOINT, diff the touched rows, roll back.
+        if st.button("👁️ Preview Changes", use_container_width=True, disabled=not res.sql):
+            try:
+                st.session_state["write_preview"] = _await_write(
+                    write_queue,
+                    write_queue.submit_preview(res.sql, res.params),
+                    "🔎 Previewing write (rolled back)",
+                )
+                st.session_state["preview_error"] = ""
+            except Exception as e:
+                st.session_state["write_preview"] = None
+                st.session_state["preview_error"] = str(e)
+
+        if st.session_state["preview_error"]:
+            st.error(f"❌ Preview failed: {st.session_state['preview_error']}")
+        _render_preview(st.session_state["write_preview"])
+
         st.markdown("---")
 
         st.markdown("#### 3️⃣ Execute (Confirmation Required)")
@@ -157,16 +246,21 @@ with right:
             key="confirm_execute",
         )
 
-        # Gate 2: optional backup (recommended on by default)
+        # Gate 2: row-level undo journal (recommended on by default)
         st.checkbox(
-            "✓ Create database backup before executing (recommended)",
-            key="backup_first",
+            "✓ Record affected rows so this write can be undone (recommended)",
+            key="journal_write",
         )
 
-        # Execute button
-        can_execute = bool(st.session_state["confirm_execute"]) and bool(
-            res.sql and res.sql.strip()
+        # Execute button (only after a successful preview of this SQL)
+        preview = st.session_state["write_preview"]
+        can_execute = (
+            bool(st.session_state["confirm_execute"])
+            and bool(res.sql and res.sql.strip())
+            and preview is not None
         )
+        if preview is None:
+            st.caption("Preview the changes to enable execution.")
         execute = st.button(
             "▶️ Execute Write Operation",
             use_container_width=True,
@@ -181,18 +275,52 @@ with right:
                 st.error("❌ No executable SQL was generated.")
             else:
                 try:
-                    if st.session_state["backup_first"]:
-                        with st.spinner("💾 Creating backup..."):
-                            bkp = backup_db(db_path)
-                        st.success(f"✅ Backup created: {bkp.name}")
-
-                    with st.spinner("⚙️ Executing write operation..."):
-                        affected = execute_write(db_path, res.sql, res.params)
-
-                    st.success(f"✅ Write executed successfully! Rows affected: {affected}")
+                    # Replay exactly the statement that was previewed.
+                    receipt = _await_write(
+                        write_queue,
+                        write_queue.submit(
+                            preview.sql, res.params, journal=st.session_state["journal_write"]
+                        ),
+                        "⚙️ Executing write operation",
+                    )
+
+                    st.session_state["last_receipt"] = receipt
+                    st.success(f"✅ Write executed successfully! Rows affected: {receipt.rowcount}")
+                    if len(receipt.batch_rowcounts) > 1:
+                        st.caption(f"Per-batch rows: {list(receipt.batch_rowcounts)}")
 
                     # Reset confirmation after successful execution
                     st.session_state["confirm_execute"] = False
 
+                except PartialWriteError as e:
+                    # Keep the committed chunks undoable.
+                    st.session_state["last_receipt"] = e.receipt
+                    st.error(f"❌ Execution partly failed: {e}")
                 except Exception as e:
                     st.error(f"❌ Execution failed: {e}")
+
+        receipt = st.session_state["last_receipt"]
+        if receipt is not None and receipt.journal_ids:
+            ids = ", ".join(f"#{j}" for j in receipt.journal_ids)
+            if st.button(f"↩️ Undo last write (journal {ids})", use_container_width=True):
+                try:
+                    # Newest first, so chunks of a batch unwind in reverse order.
+                    restored = sum(
+                        _await_write(write_queue, write_queue.submit_restore(j), "↩️ Undoing write")
+                        for j in reversed(receipt.journal_ids)
+                    )
+                    st.session_state["last_receipt"] = None
+                    st.success(f"✅ Write undone. Rows restored: {restored}")
+                except Exception as e:
+                    st.error(f"❌ Undo failed: {e}")
+
+        with st.expander("🕘 Undo journal", expanded=False):
+            entries = list_journal(db_path, limit=10)
+            if not entries:
+                st.caption("No journaled writes yet.")
+            for entry in entries:
+                status = f"restored {entry.restored_at}" if entry.restored_at else "active"
+                st.caption(
+                    f"#{entry.journal_id} · {entry.created_at} · {entry.op.upper()} "
+                    f"{entry.table_name} · {entry.row_count} rows · {status}"
+                )
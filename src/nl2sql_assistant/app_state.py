@@ -1,13 +1,19 @@
 from __future__ import annotations
 
+from concurrent.futures import ThreadPoolExecutor
 from pathlib import Path
 
 import streamlit as st
 
+from nl2sql_assistant.chains.sql_cache import SQLCache
 from nl2sql_assistant.db.bootstrap import ensure_sample_db
-from nl2sql_assistant.db.schema import schema_as_text
-from nl2sql_assistant.rag.corpus import build_corpus
-from nl2sql_assistant.rag.retriever_bm25 import RagIndex, build_index
+from nl2sql_assistant.db.schema import load_schema, schema_as_text
+from nl2sql_assistant.rag.corpus import load_sources
+from nl2sql_assistant.rag.index_store import load_or_build_index
+from nl2sql_assistant.rag.retriever_bm25 import RagIndex
+from nl2sql_assistant.rag.schema_selector import SchemaSelector, build_schema_selector
+
+DICTIONARY_PATH = Path("data/dictionary.md")
 
 
 @st.cache_resource
@@ -23,7 +29,12 @@ def get_db_path() -> Path:
 @st.cache_resource
 def get_rag_index() -> tuple[RagIndex, str]:
     """
-    Build RAG index once at app start (cached).
+    Load the RAG index once at app start (cached).
+
+    The index is persisted under data/rag_index and keyed by content hashes
+    of its sources, so a new replica maps it from disk and only a changed
+    schema or dictionary triggers a (partial) rebuild.
+
     Returns:
       - RagIndex
       - schema_text (often useful to show or inject into prompts)
@@ -31,8 +42,34 @@ def get_rag_index() -> tuple[RagIndex, str]:
     db_path = get_db_path()
     schema_text = schema_as_text(db_path)
 
-    dictionary_path = Path("data/dictionary.md")
-    corpus = build_corpus(schema_text=schema_text, dictionary_path=dictionary_path)
-    index = build_index(corpus)
+    sources = load_sources(schema_text, DICTIONARY_PATH)
+    index = load_or_build_index(Path("data/rag_index"), sources)
 
     return index, schema_text
+
+
+@st.cache_resource
+def get_schema_selector(db_path: Path, schema_version: int) -> SchemaSelector:
+    """
+    Per-table schema index used to prune the prompt schema for each question.
+    Keyed on PRAGMA schema_version, so a schema change builds a new one.
+    """
+    dictionary = DICTIONARY_PATH.read_text(encoding="utf-8") if DICTIONARY_PATH.exists() else ""
+    return build_schema_selector(load_schema(db_path), dictionary)
+
+
+@st.cache_resource
+def get_sql_cache() -> SQLCache:
+    """
+    One persistent question -> SQL cache shared by every session.
+    """
+    return SQLCache(Path("data/sql_cache.db"))
+
+
+@st.cache_resource
+def get_query_executor() -> ThreadPoolExecutor:
+    """
+    Worker threads for read queries, so a page can wait on (and cancel) a
+    running query without blocking its own script thread inside SQLite.
+    """
+    return ThreadPoolExecutor(max_workers=4, thread_name_prefix="nl2sql-query")
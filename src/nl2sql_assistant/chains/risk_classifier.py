@@ -1,12 +1,16 @@
 from __future__ import annotations
 
 import json
+import re
 from dataclasses import dataclass
 from typing import Any
 
 from langchain_core.output_parsers import StrOutputParser
 from langchain_core.runnables import Runnable
+from sqlglot import exp
 
+from nl2sql_assistant.db.schema_model import SchemaModel
+from nl2sql_assistant.db.statement import parse_statement
 from nl2sql_assistant.llm.huggingface_client import get_hf_model
 from nl2sql_assistant.prompts.risk_prompt import RISK_PROMPT
 
@@ -82,7 +86,273 @@ def parse_risk_json(raw: str) -> RiskResult:
         )
 
 
-def classify_risk(schema_text: str, question: str, sql: str) -> RiskResult:
+# ------------------------------------------------------------
+# Deterministic rule engine
+# ------------------------------------------------------------
+# Most generated queries are clear-cut, so we score them directly on the
+# sqlglot AST and only ask the LLM when the rules cannot decide.
+
+WIDE_TABLE_COLUMNS = 12
+MAX_SUBQUERY_DEPTH = 2
+
+_SEVERITY = {"low": 0, "medium": 1, "high": 2}
+_SENSITIVE_RE = re.compile(
+    r"(email|phone|ssn|social_security|password|passwd|secret|token|api_key|"
+    r"credit_card|card_number|iban|salary|birth|dob|address)",
+    re.IGNORECASE,
+)
+_FILTER_HINT_RE = re.compile(
+    r"\b(where|only|last|since|before|after|between|during|in \d{4}|greater than|"
+    r"less than|more than|fewer than|at least|at most|older than|newer than|equal to)\b",
+    re.IGNORECASE,
+)
+
+
+def _schema_columns(schema: str | SchemaModel) -> dict[str, list[str]]:
+    """
+    {table: [columns]}, lower-cased, from a SchemaModel or recovered from
+    the schema_as_text format.
+    """
+    if isinstance(schema, SchemaModel):
+        return {t.name.lower(): [c.name.lower() for c in t.columns] for t in schema.tables.values()}
+    schema_text = schema
+    tables: dict[str, list[str]] = {}
+    current: list[str] | None = None
+    for line in schema_text.splitlines():
+        stripped = line.strip()
+        if stripped.startswith("TABLE ") and stripped.endswith(":"):
+            current = tables.setdefault(stripped[len("TABLE ") : -1].strip().lower(), [])
+        elif current is not None and stripped.startswith("- "):
+            current.append(stripped[2:].split(":", 1)[0].strip().lower())
+    return tables
+
+
+def _subquery_depth(node: exp.Expression) -> int:
+    depth = 0
+    for select in node.find_all(exp.Select):
+        d, parent = 0, select.parent
+        while parent is not None:
+            if isinstance(parent, exp.Select):
+                d += 1
+            parent = parent.parent
+        depth = max(depth, d)
+    return depth
+
+
+def _where_join(join: exp.Join) -> str:
+    """
+    How the WHERE clause of a comma/implicit join's SELECT relates its table:
+    "joined" (an equality between its columns and another table's), "none"
+    (the table is not mentioned) or "unclear".
+    """
+    select = join.parent
+    where = select.args.get("where") if isinstance(select, exp.Select) else None
+    if where is None:
+        return "none"
+    alias = join.this.alias_or_name.lower()
+    for eq in where.find_all(exp.EQ):
+        left, right = eq.this, eq.expression
+        if isinstance(left, exp.Column) and isinstance(right, exp.Column):
+            qualifiers = {left.table.lower(), right.table.lower()}
+            if alias in qualifiers and "" not in qualifiers and len(qualifiers) == 2:
+                return "joined"
+    mentioned = any(c.table.lower() in (alias, "") for c in where.find_all(exp.Column))
+    return "unclear" if mentioned else "none"
+
+
+def _rule_flags(
+    tree: exp.Expression, columns: dict[str, list[str]], question: str
+) -> list[tuple[str, RiskFlag]] | None:
+    """
+    Return (severity, flag) pairs, or None when the rules are inconclusive.
+    """
+    if not isinstance(tree, exp.Query):
+        return [("high", RiskFlag(type="non_select", message="Statement is not a SELECT query."))]
+
+    if _subquery_depth(tree) > MAX_SUBQUERY_DEPTH:
+        return None
+
+    found: list[tuple[str, RiskFlag]] = []
+    cte_names = {cte.alias_or_name.lower() for cte in tree.find_all(exp.CTE)}
+    tables = {t.name.lower() for t in tree.find_all(exp.Table)} - cte_names
+
+    unknown = sorted(t for t in tables if columns and t not in columns)
+    if unknown:
+        found.append(
+            (
+                "high",
+                RiskFlag(type="unknown_table", message=f"Unknown table(s): {', '.join(unknown)}."),
+            )
+        )
+
+    for join in tree.find_all(exp.Join):
+        if not join.args.get("on") and not join.args.get("using") and join.method != "NATURAL":
+            where_join = _where_join(join)
+            if where_join == "joined":
+                continue
+            if where_join == "unclear":
+                return None
+            found.append(
+                (
+                    "high",
+                    RiskFlag(
+                        type="cartesian_join",
+                        message=f"Join with {join.this.sql(dialect='sqlite')} has no join condition.",
+                    ),
+                )
+            )
+
+    for select in tree.find_all(exp.Select):
+        star_tables: set[str] = set()
+        for projection in select.expressions:
+            if not projection.is_star:
+                continue
+            qualifier = projection.table.lower() if isinstance(projection, exp.Column) else ""
+            for t in select.find_all(exp.Table):
+                if t.parent_select is select and qualifier in ("", t.alias_or_name.lower()):
+                    star_tables.add(t.name.lower())
+        for t in sorted(star_tables):
+            cols = columns.get(t, [])
+            if len(cols) >= WIDE_TABLE_COLUMNS:
+                found.append(
+                    (
+                        "medium",
+                        RiskFlag(
+                            type="select_star",
+                            message=f"SELECT * over wide table {t} ({len(cols)} columns).",
+                        ),
+                    )
+                )
+            sensitive = [c for c in cols if _SENSITIVE_RE.search(c)]
+            if sensitive:
+                found.append(
+                    (
+                        "medium",
+                        RiskFlag(
+                            type="sensitive_column",
+                            message=f"SELECT * on {t} exposes {', '.join(sensitive)}.",
+                        ),
+                    )
+                )
+
+    for col in tree.find_all(exp.Column):
+        if _SENSITIVE_RE.search(col.name) and col.find_ancestor(exp.Select) is not None:
+            found.append(
+                (
+                    "medium",
+                    RiskFlag(type="sensitive_column", message=f"Query reads {col.name}."),
+                )
+            )
+            break
+
+    top = tree if isinstance(tree, exp.Select) else None
+    if top is not None:
+        has_where = top.args.get("where") is not None or top.args.get("having") is not None
+        aggregated = top.find(exp.AggFunc) is not None or top.args.get("group") is not None
+        if not has_where and _FILTER_HINT_RE.search(question):
+            found.append(
+                (
+                    "medium",
+                    RiskFlag(
+                        type="missing_where",
+                        message="The question implies a filter but the SQL has no WHERE clause.",
+                    ),
+                )
+            )
+        if not has_where and not aggregated and top.args.get("limit") is None:
+            # A full scan of one table is routine; fanned out across joins it is not.
+            found.append(
+                (
+                    "medium" if top.args.get("joins") else "low",
+                    RiskFlag(
+                        type="unbounded_scan",
+                        message="No WHERE, LIMIT or aggregation: reads every row.",
+                    ),
+                )
+            )
+
+    return found
+
+
+def assess_risk_rules(
+    sql: str, schema_text: str | SchemaModel, question: str = ""
+) -> RiskResult | None:
+    """
+    Score risk deterministically from the SQL AST.
+
+    Returns a RiskResult when the rules are conclusive and None when the query
+    should be escalated to the LLM reviewer (unparseable SQL or deeply nested
+    subqueries). `schema_text` may also be the SchemaModel it was rendered from.
+    """
+    try:
+        tree = parse_statement(sql.strip()).tree
+    except ValueError:
+        return None
+
+    found = _rule_flags(tree, _schema_columns(schema_text), question)
+    if found is None:
+        return None
+
+    risk_level = "low"
+    for severity, _flag in found:
+        if _SEVERITY[severity] > _SEVERITY[risk_level]:
+            risk_level = severity
+    flags = [flag for _severity, flag in found]
+    suggestions = (
+        ["Review the SQL carefully before running."] if flags else ["Query looks safe to run."]
+    )
+    raw = json.dumps(
+        {
+            "risk_level": risk_level,
+            "flags": [{"type": f.type, "message": f.message} for f in flags],
+            "suggestions": suggestions,
+            "source": "rules",
+        }
+    )
+    return RiskResult(risk_level=risk_level, flags=flags, suggestions=suggestions, raw=raw)
+
+
+def _prompt_schema(schema_text: str | SchemaModel, prompt_schema_text: str | None) -> str:
+    if prompt_schema_text is not None:
+        return prompt_schema_text
+    return schema_text.text if isinstance(schema_text, SchemaModel) else schema_text
+
+
+def classify_risk(
+    schema_text: str | SchemaModel,
+    question: str,
+    sql: str,
+    *,
+    prompt_schema_text: str | None = None,
+) -> RiskResult:
+    """
+    Rules first (against the full schema: `schema_text` or its SchemaModel),
+    then the LLM reviewer.
+    `prompt_schema_text` is what the reviewer sees; pass a selection of the
+    schema (see rag.schema_selector) to keep the prompt small.
+    """
+    ruled = assess_risk_rules(sql, schema_text, question)
+    if ruled is not None:
+        return ruled
+
+    chain = build_risk_chain()
+    prompt_schema = _prompt_schema(schema_text, prompt_schema_text)
+    raw = chain.invoke({"schema_text": prompt_schema, "question": question, "sql": sql})
+    return parse_risk_json(raw)
+
+
+async def aclassify_risk(
+    schema_text: str | SchemaModel,
+    question: str,
+    sql: str,
+    *,
+    prompt_schema_text: str | None = None,
+) -> RiskResult:
+    ruled = assess_risk_rules(sql, schema_text, question)
+    if ruled is not None:
+        return ruled
+
     chain = build_risk_chain()
-    raw = chain.invoke({"schema_text": schema_text, "question": question, "sql": sql})
+    prompt_schema = _prompt_schema(schema_text, prompt_schema_text)
+    raw = await chain.ainvoke({"schema_text": prompt_schema, "question": question, "sql": sql})
     return parse_risk_json(raw)
@@ -0,0 +1,178 @@
+"""
+sql_cache.py
+------------
+Purpose:
+- Persist question -> SQL results so repeated questions skip the model.
+
+Entries are keyed by (normalized question, schema fingerprint, model_id,
+prompt version). When the schema fingerprint changes, every entry generated
+against the old schema is dropped, so stale SQL is never served.
+"""
+
+from __future__ import annotations
+
+import hashlib
+import re
+import sqlite3
+import threading
+import time
+from collections.abc import Iterator
+from contextlib import contextmanager
+from dataclasses import dataclass
+from pathlib import Path
+
+_WS_RE = re.compile(r"\s+")
+
+
+@dataclass(frozen=True)
+class CacheStats:
+    hits: int
+    misses: int
+    entries: int
+
+
+def normalize_question(question: str) -> str:
+    """
+    Case-fold, collapse whitespace and drop trailing punctuation, so trivially
+    different phrasings of the same question share one cache entry.
+    """
+    return _WS_RE.sub(" ", question.strip().lower()).rstrip(" ?.!;")
+
+
+def schema_fingerprint(schema_text: str) -> str:
+    return hashlib.sha256(schema_text.encode("utf-8")).hexdigest()
+
+
+class SQLCache:
+    """
+    SQLite-backed question -> SQL cache with LRU + TTL eviction.
+
+    - max_entries: least recently used entries are evicted past this size
+    - ttl_seconds: entries older than this are treated as misses and removed
+    - hit/miss counters are persisted alongside the entries
+    """
+
+    def __init__(
+        self, path: Path, *, max_entries: int = 1000, ttl_seconds: float = 7 * 24 * 3600
+    ) -> None:
+        path.parent.mkdir(parents=True, exist_ok=True)
+        self.path = path
+        self.max_entries = max_entries
+        self.ttl_seconds = ttl_seconds
+        self._lock = threading.Lock()
+        self._current_fp: str | None = None
+        self._conn = sqlite3.connect(path, check_same_thread=False, isolation_level=None)
+        self._conn.execute("PRAGMA journal_mode = WAL;")
+        self._conn.executescript(
+            """
+            CREATE TABLE IF NOT EXISTS sql_cache (
+              key TEXT PRIMARY KEY,
+              schema_fp TEXT NOT NULL,
+              sql TEXT NOT NULL,
+              created_at REAL NOT NULL,
+              last_used REAL NOT NULL
+            );
+            CREATE INDEX IF NOT EXISTS sql_cache_last_used ON sql_cache(last_used);
+            CREATE TABLE IF NOT EXISTS sql_cache_meta (
+              name TEXT PRIMARY KEY,
+              value TEXT NOT NULL
+            );
+            INSERT OR IGNORE INTO sql_cache_meta(name, value)
+              VALUES ('hits', '0'), ('misses', '0'), ('schema_fp', '');
+            """
+        )
+
+    @contextmanager
+    def _transaction(self) -> Iterator[None]:
+        self._conn.execute("BEGIN IMMEDIATE;")
+        try:
+            yield
+        except BaseException:
+            # SQLite may already have rolled back (e.g. SQLITE_FULL); keep the original error.
+            if self._conn.in_transaction:
+                self._conn.execute("ROLLBACK;")
+            raise
+        self._conn.execute("COMMIT;")
+
+    @staticmethod
+    def make_key(question: str, schema_fp: str, model_id: str, prompt_version: str) -> str:
+        parts = (normalize_question(question), schema_fp, model_id, prompt_version)
+        return hashlib.sha256("\x1f".join(parts).encode("utf-8")).hexdigest()
+
+    def _sync_schema(self, schema_fp: str) -> None:
+        """
+        Drop entries from older schemas the first time a new fingerprint is seen.
+        """
+        if schema_fp == self._current_fp:
+            return
+        (stored,) = self._conn.execute(
+            "SELECT value FROM sql_cache_meta WHERE name = 'schema_fp';"
+        ).fetchone()
+        if stored != schema_fp:
+            with self._transaction():
+                self._conn.execute("DELETE FROM sql_cache WHERE schema_fp != ?;", (schema_fp,))
+                self._conn.execute(
+                    "UPDATE sql_cache_meta SET value = ? WHERE name = 'schema_fp';", (schema_fp,)
+                )
+        self._current_fp = schema_fp
+
+    def _bump(self, counter: str) -> None:
+        self._conn.execute(
+            "UPDATE sql_cache_meta SET value = CAST(value AS INTEGER) + 1 WHERE name = ?;",
+            (counter,),
+        )
+
+    def get(self, question: str, schema_fp: str, model_id: str, prompt_version: str) -> str | None:
+        key = self.make_key(question, schema_fp, model_id, prompt_version)
+        now = time.time()
+        with self._lock:
+            self._sync_schema(schema_fp)
+            row = self._conn.execute(
+                "SELECT sql, created_at FROM sql_cache WHERE key = ?;", (key,)
+            ).fetchone()
+            if row is not None and now - row[1] > self.ttl_seconds:
+                self._conn.execute("DELETE FROM sql_cache WHERE key = ?;", (key,))
+                row = None
+            if row is None:
+                self._bump("misses")
+                return None
+            self._conn.execute("UPDATE sql_cache SET last_used = ? WHERE key = ?;", (now, key))
+            self._bump("hits")
+            return row[0]
+
+    def put(
+        self, question: str, schema_fp: str, model_id: str, prompt_version: str, sql: str
+    ) -> None:
+        key = self.make_key(question, schema_fp, model_id, prompt_version)
+        now = time.time()
+        with self._lock:
+            self._sync_schema(schema_fp)
+            with self._transaction():
+                self._conn.execute(
+                    "INSERT OR REPLACE INTO sql_cache(key, schema_fp, sql, created_at, last_used) "
+                    "VALUES (?, ?, ?, ?, ?);",
+                    (key, schema_fp, sql, now, now),
+                )
+                self._conn.execute(
+                    "DELETE FROM sql_cache WHERE created_at < ?;", (now - self.ttl_seconds,)
+                )
+                self._conn.execute(
+                    "DELETE FROM sql_cache WHERE key IN ("
+                    "  SELECT key FROM sql_cache ORDER BY last_used DESC LIMIT -1 OFFSET ?"
+                    ");",
+                    (self.max_entries,),
+                )
+
+    def stats(self) -> CacheStats:
+        with self._lock:
+            meta = dict(self._conn.execute("SELECT name, value FROM sql_cache_meta;").fetchall())
+            (entries,) = self._conn.execute("SELECT COUNT(*) FROM sql_cache;").fetchone()
+        return CacheStats(hits=int(meta["hits"]), misses=int(meta["misses"]), entries=entries)
+
+    def clear(self) -> None:
+        with self._lock:
+            self._conn.execute("DELETE FROM sql_cache;")
+
+    def close(self) -> None:
+        with self._lock:
+            self._conn.close()
@@ -11,3 +11,11 @@ def explain_sql(schema_text: str, sql: str) -> str:
     """
     chain = EXPLAIN_PROMPT | get_hf_model() | StrOutputParser()
     return chain.invoke({"schema_text": schema_text, "sql": sql})
+
+
+async def aexplain_sql(schema_text: str, sql: str) -> str:
+    """
+    Async variant of explain_sql.
+    """
+    chain = EXPLAIN_PROMPT | get_hf_model() | StrOutputParser()
+    return await chain.ainvoke({"schema_text": schema_text, "sql": sql})
@@ -1,18 +1,22 @@
 from __future__ import annotations
 
+from collections.abc import Iterator
 from dataclasses import dataclass
 
 from langchain_core.output_parsers import StrOutputParser
 from langchain_core.runnables import Runnable
 
-from nl2sql_assistant.llm.huggingface_client import get_hf_model
-from nl2sql_assistant.prompts.sql_prompt import SQL_PROMPT
+from nl2sql_assistant.chains.sql_cache import SQLCache, schema_fingerprint
+from nl2sql_assistant.db.runner import validate_select_only, validate_select_prefix
+from nl2sql_assistant.llm.huggingface_client import DEFAULT_MODEL_ID, get_hf_model
+from nl2sql_assistant.prompts.sql_prompt import PROMPT_VERSION, SQL_PROMPT
 
 
 @dataclass(frozen=True)
 class SQLGenResult:
     sql: str
     notes: str
+    cached: bool = False
 
 
 def _build_sql_chain() -> Runnable:
@@ -38,11 +42,134 @@ def _postprocess_sql(raw: str) -> str:
     return sql
 
 
-def generate_sql(schema_text: str, question: str) -> SQLGenResult:
+# Notes are intentionally simple in Stage 2.
+_NOTES = "Generated by HuggingFace Inference API (defog/sqlcoder-7b-2). Review before running."
+_CACHED_NOTES = "Served from the SQL cache (previously generated for this question and schema)."
+
+
+def _cache_lookup(cache: SQLCache | None, schema_fp: str, question: str) -> str | None:
+    if cache is None:
+        return None
+    return cache.get(question, schema_fp, DEFAULT_MODEL_ID, PROMPT_VERSION)
+
+
+def _cache_store(cache: SQLCache | None, schema_fp: str, question: str, sql: str) -> None:
+    """
+    Only SQL that passes the read guardrails is cached; rejected output is
+    never replayed from the cache.
+    """
+    if cache is None:
+        return
+    try:
+        validate_select_only(sql)
+    except ValueError:
+        return
+    cache.put(question, schema_fp, DEFAULT_MODEL_ID, PROMPT_VERSION, sql)
+
+
+def generate_sql(
+    schema_text: str,
+    question: str,
+    *,
+    cache: SQLCache | None = None,
+    schema_fp: str | None = None,
+    value_hints: str = "",
+) -> SQLGenResult:
+    """
+    `schema_fp` keys the cache; pass the fingerprint of the full schema when
+    `schema_text` is a per-question selection of it (see rag.schema_selector),
+    otherwise every differently pruned prompt would look like a schema change.
+    `value_hints` is an optional block of known column values
+    (db.value_index.format_value_hints).
+    """
+    schema_fp = schema_fp or schema_fingerprint(schema_text)
+    cached = _cache_lookup(cache, schema_fp, question)
+    if cached is not None:
+        return SQLGenResult(sql=cached, notes=_CACHED_NOTES, cached=True)
+
     chain = _build_sql_chain()
-    raw = chain.invoke({"schema_text": schema_text, "question": question})
+    raw = chain.invoke(
+        {"schema_text": schema_text, "question": question, "value_hints": value_hints}
+    )
     sql = _postprocess_sql(raw)
+    _cache_store(cache, schema_fp, question, sql)
+    return SQLGenResult(sql=sql, notes=_NOTES)
+
 
-    # Notes are intentionally simple in Stage 2.
-    notes = "Generated by HuggingFace Inference API (defog/sqlcoder-7b-2). Review before running."
-    return SQLGenResult(sql=sql, notes=notes)
+def stream_sql(
+    schema_text: str,
+    question: str,
+    *,
+    cache: SQLCache | None = None,
+    schema_fp: str | None = None,
+    value_hints: str = "",
+) -> Iterator[str]:
+    """
+    Yield SQL tokens as they are generated.
+
+    Every token is checked with validate_select_prefix before it is yielded.
+    On a violation the model stream is closed (cancelling the remaining
+    tokens) and the ValueError propagates to the caller.
+    A cache hit is yielded as a single token without calling the model.
+    `schema_fp` and `value_hints` are as in generate_sql.
+    """
+    schema_fp = schema_fp or schema_fingerprint(schema_text)
+    cached = _cache_lookup(cache, schema_fp, question)
+    if cached is not None:
+        yield cached
+        return
+
+    chain = _build_sql_chain()
+    tokens = chain.stream(
+        {"schema_text": schema_text, "question": question, "value_hints": value_hints}
+    )
+    partial = ""
+    try:
+        for token in tokens:
+            partial += token
+            validate_select_prefix(partial)
+            yield token
+    finally:
+        tokens.close()
+    _cache_store(cache, schema_fp, question, _postprocess_sql(partial))
+
+
+async def agenerate_sql(
+    schema_text: str,
+    question: str,
+    *,
+    cache: SQLCache | None = None,
+    schema_fp: str | None = None,
+    value_hints: str = "",
+) -> SQLGenResult:
+    """
+    Async variant of generate_sql. Awaits the model without holding a thread,
+    so many requests can be in flight on one event loop.
+    """
+    schema_fp = schema_fp or schema_fingerprint(schema_text)
+    cached = _cache_lookup(cache, schema_fp, question)
+    if cached is not None:
+        return SQLGenResult(sql=cached, notes=_CACHED_NOTES, cached=True)
+
+    chain = _build_sql_chain()
+    raw = await chain.ainvoke(
+        {"schema_text": schema_text, "question": question, "value_hints": value_hints}
+    )
+    sql = _postprocess_sql(raw)
+    _cache_store(cache, schema_fp, question, sql)
+    return SQLGenResult(sql=sql, notes=_NOTES)
+
+
+async def agenerate_sql_many(
+    schema_text: str, questions: list[str], *, max_concurrency: int = 16
+) -> list[SQLGenResult]:
+    """
+    Fan out independent questions over one chain, at most max_concurrency at a time.
+    Results are returned in the same order as questions.
+    """
+    chain = _build_sql_chain()
+    raws = await chain.abatch(
+        [{"schema_text": schema_text, "question": q} for q in questions],
+        config={"max_concurrency": max_concurrency},
+    )
+    return [SQLGenResult(sql=_postprocess_sql(raw), notes=_NOTES) for raw in raws]
@@ -12,11 +12,20 @@ from nl2sql_assistant.prompts.write_sql_prompt import WRITE_SQL_PROMPT
 
 @dataclass(frozen=True)
 class WriteSQLResult:
+    """
+    params is one dict of named parameters, or a list of dicts when the same
+    statement should be applied to many rows (executed as one batch).
+    """
+
     sql: str
-    params: dict[str, Any]
+    params: dict[str, Any] | list[dict[str, Any]]
     safety_notes: list[str]
     raw: str
 
+    @property
+    def is_batch(self) -> bool:
+        return isinstance(self.params, list)
+
 
 def generate_write_sql(context: str, user_prompt: str) -> WriteSQLResult:
     """
@@ -25,12 +34,29 @@ def generate_write_sql(context: str, user_prompt: str) -> WriteSQLResult:
     """
     chain = WRITE_SQL_PROMPT | get_hf_model() | StrOutputParser()
     raw = chain.invoke({"context": context, "user_prompt": user_prompt})
+    return _parse_write_json(raw)
+
+
+async def agenerate_write_sql(context: str, user_prompt: str) -> WriteSQLResult:
+    """
+    Async variant of generate_write_sql. Same parsing and fail-safe behavior.
+    """
+    chain = WRITE_SQL_PROMPT | get_hf_model() | StrOutputParser()
+    raw = await chain.ainvoke({"context": context, "user_prompt": user_prompt})
+    return _parse_write_json(raw)
+
 
+def _parse_write_json(raw: str) -> WriteSQLResult:
     try:
         data = json.loads(raw)
+        params = data.get("params", {}) or {}
+        if isinstance(params, list) and not all(isinstance(p, dict) for p in params):
+            raise ValueError("params list must contain objects")
+        if not isinstance(params, dict | list):
+            raise ValueError("params must be an object or a list of objects")
         return WriteSQLResult(
             sql=str(data.get("sql", "")).strip(),
-            params=data.get("params", {}) or {},
+            params=params,
             safety_notes=[str(s) for s in (data.get("safety_notes", []) or [])],
             raw=raw,
         )
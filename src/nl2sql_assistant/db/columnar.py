@@ -0,0 +1,95 @@
+"""
+columnar.py
+-----------
+Purpose:
+- Build typed Arrow columns straight from a SQLite cursor.
+
+Rows are pulled with fetchmany and each batch is transposed into Arrow
+arrays right away, so a result is held once, as column buffers, instead of
+as tuples plus a DataFrame plus CSV bytes. Streamlit renders a pa.Table
+directly and exports write the same buffers out.
+
+SQLite columns are dynamically typed. Within a column, ints and floats
+become float64 and NULLs stay nulls; values that do not share any Arrow
+type (e.g. numbers mixed with text) are stored as strings.
+"""
+
+from __future__ import annotations
+
+import sqlite3
+from collections.abc import Iterable, Sequence
+from typing import Any
+
+import pyarrow as pa
+
+DEFAULT_ARROW_BATCH_SIZE = 4096
+
+
+def _to_array(values: Sequence[Any]) -> pa.Array:
+    try:
+        return pa.array(values)
+    except (pa.ArrowInvalid, pa.ArrowTypeError):
+        return pa.array([None if v is None else str(v) for v in values], type=pa.string())
+
+
+def rows_to_record_batch(n_columns: int, rows: Sequence[tuple[Any, ...]]) -> pa.RecordBatch:
+    """
+    Transpose one fetchmany batch into a RecordBatch.
+
+    Columns are named by position ("0", "1", ...) so duplicate result names
+    (SELECT a.id, b.id ...) survive until the final rename.
+    """
+    names = [str(i) for i in range(n_columns)]
+    if not rows:
+        return pa.RecordBatch.from_arrays([pa.array([], pa.null())] * n_columns, names=names)
+    return pa.RecordBatch.from_arrays([_to_array(col) for col in zip(*rows, strict=True)], names)
+
+
+def _string_if_mixed(tables: list[pa.Table]) -> list[pa.Table]:
+    """Cast columns whose type differs between batches to string."""
+    n_columns = tables[0].num_columns
+    for i in range(n_columns):
+        types = {t.schema.field(i).type for t in tables} - {pa.null()}
+        if len(types) <= 1:
+            continue
+        tables = [t.set_column(i, t.field(i).name, t.column(i).cast(pa.string())) for t in tables]
+    return tables
+
+
+def batches_to_table(columns: Sequence[str], batches: Iterable[pa.RecordBatch]) -> pa.Table:
+    """
+    Concatenate RecordBatches from rows_to_record_batch into one table,
+    promoting types across batches (null -> T, int64 -> float64, else string).
+    """
+    tables = [pa.Table.from_batches([b]) for b in batches]
+    if not tables:
+        tables = [pa.Table.from_batches([rows_to_record_batch(len(columns), [])])]
+    try:
+        table = pa.concat_tables(tables, promote_options="permissive")
+    except (pa.ArrowInvalid, pa.ArrowTypeError):
+        table = pa.concat_tables(_string_if_mixed(tables), promote_options="permissive")
+    return table.rename_columns(list(columns))
+
+
+def cursor_to_arrow(
+    cur: sqlite3.Cursor,
+    *,
+    batch_size: int = DEFAULT_ARROW_BATCH_SIZE,
+    max_rows: int | None = None,
+) -> pa.Table:
+    """
+    Drain a cursor (or its first `max_rows` rows) into an Arrow table,
+    holding at most one batch of Python tuples at a time.
+    """
+    columns = [d[0] for d in cur.description] if cur.description else []
+    batches: list[pa.RecordBatch] = []
+    remaining = max_rows
+    while remaining is None or remaining > 0:
+        n = batch_size if remaining is None else min(batch_size, remaining)
+        rows = cur.fetchmany(n)
+        if not rows:
+            break
+        batches.append(rows_to_record_batch(len(columns), rows))
+        if remaining is not None:
+            remaining -= len(rows)
+    return batches_to_table(columns, batches)
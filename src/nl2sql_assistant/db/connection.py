@@ -0,0 +1,174 @@
+"""
+connection.py
+-------------
+Purpose:
+- Reuse SQLite connections instead of connecting on every request.
+
+Each database file gets one ConnectionManager holding:
+- a small pool of read-only connections (opened with a `mode=ro` URI)
+- one dedicated writer connection, used by one thread at a time
+
+PRAGMAs (WAL, busy timeout, mmap, page cache) are applied once when a
+connection is opened, not on every query.
+"""
+
+from __future__ import annotations
+
+import queue
+import sqlite3
+import threading
+from collections.abc import Iterator
+from contextlib import contextmanager
+from dataclasses import dataclass
+from pathlib import Path
+
+
+@dataclass(frozen=True)
+class ConnectionSettings:
+    """
+    - pool_size: maximum number of read-only connections
+    - busy_timeout_ms: how long a connection waits on a lock before failing
+    - mmap_size: bytes of the file mapped into memory for reads
+    - cache_size_kib: page cache per connection, in KiB
+    - acquire_timeout: seconds to wait for a free reader before giving up
+    """
+
+    pool_size: int = 4
+    busy_timeout_ms: int = 5000
+    mmap_size: int = 256 * 1024 * 1024
+    cache_size_kib: int = 16 * 1024
+    acquire_timeout: float = 30.0
+
+
+class ConnectionManager:
+    def __init__(self, db_path: Path, settings: ConnectionSettings | None = None) -> None:
+        self.db_path = Path(db_path).resolve()
+        self.settings = settings or ConnectionSettings()
+        self._readers: queue.LifoQueue[sqlite3.Connection] = queue.LifoQueue()
+        self._opened = 0
+        self._pool_lock = threading.Lock()
+        self._writer_lock = threading.RLock()
+        # The writer is opened first: it switches the file to WAL and keeps the
+        # -wal/-shm files around, which read-only connections rely on.
+        self._writer = self._open_writer()
+
+    def _apply_common_pragmas(self, conn: sqlite3.Connection) -> None:
+        s = self.settings
+        conn.execute(f"PRAGMA busy_timeout = {int(s.busy_timeout_ms)};")
+        conn.execute(f"PRAGMA mmap_size = {int(s.mmap_size)};")
+        conn.execute(f"PRAGMA cache_size = {-int(s.cache_size_kib)};")
+
+    def _open_writer(self) -> sqlite3.Connection:
+        # isolation_level=None: transactions are explicit (see `transaction`).
+        conn = sqlite3.connect(
+            self.db_path,
+            check_same_thread=False,
+            isolation_level=None,
+            timeout=self.settings.busy_timeout_ms / 1000,
+        )
+        conn.execute("PRAGMA journal_mode = WAL;")
+        conn.execute("PRAGMA synchronous = NORMAL;")
+        conn.execute("PRAGMA foreign_keys = ON;")
+        self._apply_common_pragmas(conn)
+        return conn
+
+    def _open_reader(self) -> sqlite3.Connection:
+        conn = sqlite3.connect(
+            f"{self.db_path.as_uri()}?mode=ro",
+            uri=True,
+            check_same_thread=False,
+            timeout=self.settings.busy_timeout_ms / 1000,
+        )
+        conn.execute("PRAGMA query_only = ON;")
+        self._apply_common_pragmas(conn)
+        return conn
+
+    def _acquire_reader(self) -> sqlite3.Connection:
+        try:
+            return self._readers.get_nowait()
+        except queue.Empty:
+            pass
+        with self._pool_lock:
+            if self._opened < self.settings.pool_size:
+                self._opened += 1
+                try:
+                    return self._open_reader()
+                except Exception:
+                    self._opened -= 1
+                    raise
+        try:
+            return self._readers.get(timeout=self.settings.acquire_timeout)
+        except queue.Empty as e:
+            raise TimeoutError("No read connection available (pool exhausted).") from e
+
+    @contextmanager
+    def reader(self) -> Iterator[sqlite3.Connection]:
+        """
+        Borrow a read-only connection from the pool.
+        """
+        conn = self._acquire_reader()
+        try:
+            yield conn
+        finally:
+            if conn.in_transaction:
+                conn.rollback()
+            self._readers.put(conn)
+
+    @contextmanager
+    def writer(self) -> Iterator[sqlite3.Connection]:
+        """
+        Borrow the single writer connection. Other threads wait until it is returned.
+        """
+        with self._writer_lock:
+            yield self._writer
+
+    def close(self) -> None:
+        with self._writer_lock:
+            self._writer.close()
+        while True:
+            try:
+                self._readers.get_nowait().close()
+            except queue.Empty:
+                break
+
+
+@contextmanager
+def transaction(conn: sqlite3.Connection) -> Iterator[sqlite3.Connection]:
+    """
+    BEGIN IMMEDIATE ... COMMIT on a writer connection; ROLLBACK on any error.
+    IMMEDIATE takes the write lock up front so conflicts surface before any work.
+    """
+    conn.execute("BEGIN IMMEDIATE;")
+    try:
+        yield conn
+    except BaseException:
+        if conn.in_transaction:
+            conn.execute("ROLLBACK;")
+        raise
+    conn.execute("COMMIT;")
+
+
+_MANAGERS: dict[Path, ConnectionManager] = {}
+_MANAGERS_LOCK = threading.Lock()
+
+
+def get_connection_manager(
+    db_path: Path, settings: ConnectionSettings | None = None
+) -> ConnectionManager:
+    """
+    Return the process-wide ConnectionManager for db_path (created on first use).
+    `settings` only applies when the manager is first created.
+    """
+    key = Path(db_path).resolve()
+    with _MANAGERS_LOCK:
+        manager = _MANAGERS.get(key)
+        if manager is None:
+            manager = _MANAGERS[key] = ConnectionManager(key, settings)
+        return manager
+
+
+def close_connection_managers() -> None:
+    with _MANAGERS_LOCK:
+        for manager in _MANAGERS.values():
+            manager.close()
+        _MANAGERS.clear()
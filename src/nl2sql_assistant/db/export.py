@@ -0,0 +1,141 @@
+"""
+export.py
+---------
+Purpose:
+- Export the full result of a validated SELECT to CSV, JSONL or Parquet.
+
+The query is re-executed without the interactive display limit and rows are
+streamed from the cursor in fixed-size batches straight into the output
+file, so memory stays flat no matter how many rows the result has.
+"""
+
+from __future__ import annotations
+
+import base64
+import csv
+import json
+import threading
+from dataclasses import dataclass
+from pathlib import Path
+from typing import Any
+
+import pyarrow as pa
+import pyarrow.parquet as pq
+
+from nl2sql_assistant.db.columnar import rows_to_record_batch
+from nl2sql_assistant.db.runner import QueryBudget, iter_query_batches
+
+EXPORT_FORMATS = ("csv", "jsonl", "parquet")
+EXPORT_MIME_TYPES = {
+    "csv": "text/csv",
+    "jsonl": "application/x-ndjson",
+    "parquet": "application/vnd.apache.parquet",
+}
+DEFAULT_EXPORT_BATCH_SIZE = 5000
+
+# Exports read the whole result, so they get far more room than interactive queries.
+EXPORT_BUDGET = QueryBudget(max_seconds=600.0, max_instructions=20_000_000_000)
+
+
+@dataclass(frozen=True)
+class ExportResult:
+    path: Path
+    fmt: str
+    rows: int
+
+
+def _json_default(value: Any) -> Any:
+    if isinstance(value, bytes):
+        return base64.b64encode(value).decode("ascii")
+    raise TypeError(f"Cannot serialise {type(value).__name__} to JSON")
+
+
+def _parquet_batch(columns: list[str], rows: list[tuple[Any, ...]], schema: pa.Schema | None):
+    """
+    Convert one batch for the Parquet writer. The file schema is fixed by the
+    first batch (all-NULL columns become string); later batches are cast to it.
+    """
+    batch = rows_to_record_batch(len(columns), rows)
+    if schema is None:
+        fields = [
+            pa.field(name, pa.string() if f.type == pa.null() else f.type)
+            for name, f in zip(columns, batch.schema, strict=True)
+        ]
+        schema = pa.schema(fields)
+    arrays = []
+    for i, field in enumerate(schema):
+        try:
+            arrays.append(batch.column(i).cast(field.type))
+        except (pa.ArrowInvalid, pa.ArrowNotImplementedError) as e:
+            raise ValueError(
+                f"Column '{field.name}' changes type partway through the result "
+                f"({field.type} -> {batch.column(i).type}). CAST it in the SQL or export as CSV/JSONL."
+            ) from e
+    return pa.RecordBatch.from_arrays(arrays, schema=schema), schema
+
+
+def export_query(
+    db_path: Path,
+    sql: str,
+    dest: Path,
+    fmt: str = "csv",
+    *,
+    batch_size: int = DEFAULT_EXPORT_BATCH_SIZE,
+    budget: QueryBudget = EXPORT_BUDGET,
+    cancel_event: threading.Event | None = None,
+) -> ExportResult:
+    """
+    Run `sql` (SELECT only) and stream every row of the result into `dest`.
+
+    Parameters
+    ----------
+    fmt : str
+        "csv" (header row), "jsonl" (one object per row, BLOBs base64) or "parquet".
+    batch_size : int
+        Rows fetched and written per step; bounds peak memory.
+
+    Raises ValueError for an unknown format or an invalid query.
+    """
+    if fmt not in EXPORT_FORMATS:
+        raise ValueError(f"Unsupported export format: {fmt!r} (expected one of {EXPORT_FORMATS}).")
+
+    dest = Path(dest)
+    batches = iter_query_batches(
+        db_path, sql, batch_size=batch_size, budget=budget, cancel_event=cancel_event
+    )
+    total = 0
+    try:
+        if fmt == "parquet":
+            writer: pq.ParquetWriter | None = None
+            schema: pa.Schema | None = None
+            try:
+                for columns, rows in batches:
+                    batch, schema = _parquet_batch(columns, rows, schema)
+                    if writer is None:
+                        writer = pq.ParquetWriter(dest, schema)
+                    writer.write_batch(batch)
+                    total += len(rows)
+            finally:
+                if writer is not None:
+                    writer.close()
+        else:
+            with dest.open("w", encoding="utf-8", newline="") as f:
+                csv_writer = csv.writer(f) if fmt == "csv" else None
+                for i, (columns, rows) in enumerate(batches):
+                    if csv_writer is not None:
+                        if i == 0:
+                            csv_writer.writerow(columns)
+                        csv_writer.writerows(rows)
+                    else:
+                        for row in rows:
+                            f.write(
+                                json.dumps(
+                                    dict(zip(columns, row, strict=True)), default=_json_default
+                                )
+                            )
+                            f.write("\n")
+                    total += len(rows)
+    finally:
+        batches.close()
+
+    return ExportResult(path=dest, fmt=fmt, rows=total)
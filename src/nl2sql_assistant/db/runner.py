@@ -11,19 +11,57 @@ Design goals:
 
 from __future__ import annotations
 
+import math
 import re
 import sqlite3
+import threading
+import time
+from collections.abc import Iterator
+from contextlib import contextmanager
+from dataclasses import dataclass, field
 from pathlib import Path
 from typing import Any
 
-# Use a proper SQL parser to determine statement type reliably.
-import sqlglot
+import pyarrow as pa
+from sqlglot import exp
 
-SELECT_ONLY_RE = re.compile(r"^\s*select\b", re.IGNORECASE)
+from nl2sql_assistant.db.columnar import cursor_to_arrow
+from nl2sql_assistant.db.connection import get_connection_manager, transaction
+from nl2sql_assistant.db.schema_model import SchemaModel
+from nl2sql_assistant.db.schema_validation import validate_against_schema
+
+# Every stage shares one parsed (and cached) statement instead of re-parsing.
+from nl2sql_assistant.db.statement import ParsedStatement, apply_limit, parse_statement
+
+SELECT_ONLY_RE = re.compile(r"^\s*(select|with)\b", re.IGNORECASE)
 ALLOWED_WRITE = {"insert", "update", "delete"}
 
 
-def validate_sql(sql: str, *, mode: str = "read") -> tuple[bool, str]:
+@dataclass(frozen=True)
+class QueryBudget:
+    """
+    Work allowed for one read query.
+
+    - max_seconds: wall-clock time, including fetching rows
+    - max_instructions: SQLite VM instructions (a proxy for rows touched)
+    - check_every: VM instructions between budget checks
+    """
+
+    max_seconds: float = 10.0
+    max_instructions: int = 200_000_000
+    check_every: int = 10_000
+
+
+DEFAULT_BUDGET = QueryBudget()
+
+
+class QueryInterrupted(ValueError):
+    """A query was stopped because it ran over budget or was cancelled."""
+
+
+def validate_sql(
+    sql: str, *, mode: str = "read", schema: SchemaModel | None = None
+) -> tuple[bool, str]:
     """
     Validate SQL according to the execution mode.
 
@@ -38,6 +76,9 @@ def validate_sql(sql: str, *, mode: str = "read") -> tuple[bool, str]:
         SQL query to validate.
     mode : str
         Execution mode: "read" or "write".
+    schema : SchemaModel | None
+        If given, every table and column must exist in it (see
+        validate_against_schema); misses come back with suggestions.
 
     Returns
     -------
@@ -53,13 +94,17 @@ def validate_sql(sql: str, *, mode: str = "read") -> tuple[bool, str]:
             # Core guardrail: SELECT-only, single statement
             validate_select_only(sql)
 
+            if schema is not None:
+                validate_against_schema(sql, schema)
+
             # Future extension points (intentionally explicit)
             # -----------------------------------------------
-            # - validate_against_schema(sql, schema)
             # - block_select_star(sql)
             # - enforce_limit(sql)
             # -----------------------------------------------
 
+            if schema is not None:
+                return True, "Validation passed (SELECT-only, schema-grounded)."
             return True, "Validation passed (SELECT-only)."
 
         elif mode == "write":
@@ -80,9 +125,7 @@ def validate_sql(sql: str, *, mode: str = "read") -> tuple[bool, str]:
 
 
 def validate_single_statement(sql: str) -> str:
-    parsed = sqlglot.parse_one(sql)
-    stmt = parsed.key.lower()  # e.g. select/update/insert/delete
-    return stmt
+    return parse_statement(sql.strip()).kind  # e.g. select/update/insert/delete
 
 
 def validate_write(sql: str) -> None:
@@ -93,36 +136,321 @@ def validate_write(sql: str) -> None:
 
 def validate_select_only(sql: str) -> None:
     """
-    Minimal SQL safety guardrail for early stages.
-    - Only allow SELECT queries.
-    - Block obvious multi-statement attempts using ';'
+    SELECT-only guardrail, checked on the parsed statement.
+    - Only allow queries (SELECT, UNION, WITH ... SELECT).
+    - Block multi-statement attempts. One trailing semicolon is okay;
+      semicolons inside string literals don't count.
     """
-    cleaned = sql.strip()
-    if not SELECT_ONLY_RE.match(cleaned):
+    stmt = parse_statement(sql.strip())
+    if stmt.kind != "select":
         raise ValueError("Only SELECT queries are allowed.")
 
-    # Block multi-statement patterns. One trailing semicolon is okay.
-    semicolons = cleaned.count(";")
-    if semicolons > 1:
+    if stmt.semicolons > 1:
         raise ValueError("Multiple SQL statements are not allowed.")
 
-    if semicolons == 1 and not cleaned.rstrip().endswith(";"):
+    if stmt.semicolons == 1 and not stmt.trailing_semicolon:
         raise ValueError("Invalid semicolon usage detected.")
 
 
+def _split_statements(partial_sql: str) -> list[str]:
+    """
+    Split on semicolons that are outside quotes. Tolerates unterminated
+    literals, which are normal while SQL is still being generated.
+    """
+    parts: list[str] = []
+    buf: list[str] = []
+    quote = ""
+    for ch in partial_sql:
+        if quote:
+            if ch == quote:
+                quote = ""
+        elif ch in ("'", '"', "`"):
+            quote = ch
+        elif ch == ";":
+            parts.append("".join(buf))
+            buf = []
+            continue
+        buf.append(ch)
+    parts.append("".join(buf))
+    return parts
+
+
+def _skip_leading_noise(text: str) -> str | None:
+    """
+    `text` without leading whitespace, SQL comments and markdown code fences
+    (```sql lines). None while the text ends inside one of those, or in
+    something that may still become one ("-", "/", "``").
+    """
+    while True:
+        text = text.lstrip()
+        if text.startswith(("```", "--")):
+            end = text.find("\n")
+            if end < 0:
+                return None
+            text = text[end + 1 :]
+        elif text.startswith("/*"):
+            end = text.find("*/", 2)
+            if end < 0:
+                return None
+            text = text[end + 2 :]
+        elif text in ("-", "/") or (text and "```".startswith(text)):
+            return None
+        else:
+            return text
+
+
+def validate_select_prefix(partial_sql: str) -> None:
+    """
+    Streaming counterpart of validate_select_only.
+
+    Checks SQL that is still being generated and raises ValueError as soon as
+    the text can no longer become a valid single query:
+    - the first keyword (after comments and code fences) is, or is turning
+      into, something other than SELECT/WITH; so is anything not starting
+      with a letter
+    - a second statement starts after a semicolon
+    """
+    cleaned = _skip_leading_noise(partial_sql)
+    if cleaned is None:
+        return
+    word = re.match(r"[A-Za-z]*", cleaned).group(0).lower()
+    complete = len(word) < len(cleaned)
+    if complete and word:
+        ok = bool(SELECT_ONLY_RE.match(cleaned))
+    else:
+        ok = not complete and ("select".startswith(word) or "with".startswith(word))
+    if not ok:
+        raise ValueError("Only SELECT queries are allowed.")
+
+    if any(_skip_leading_noise(rest) for rest in _split_statements(cleaned)[1:]):
+        raise ValueError("Multiple SQL statements are not allowed.")
+
+
+# ------------------------------------------------------------
+# Cost gate: EXPLAIN QUERY PLAN -> estimated work, before execution
+# ------------------------------------------------------------
+
+DEFAULT_MAX_COST = 5_000_000.0
+LARGE_TABLE_ROWS = 10_000
+UNKNOWN_TABLE_ROWS = 1_000  # CTEs, views, subquery results
+ROW_COUNT_TTL_SECONDS = 60.0
+
+# Fraction of a table an index SEARCH is assumed to return (no stats available).
+_EQ_SELECTIVITY = 0.1
+_RANGE_SELECTIVITY = 0.25
+
+_PLAN_TARGET_RE = re.compile(r"^(?:SCAN|SEARCH)\s+(?:TABLE\s+)?(\S+)")
+_row_counts: dict[tuple[Path, str], tuple[float, int]] = {}
+
+
+@dataclass(frozen=True)
+class QueryCost:
+    """
+    Rough cost estimate derived from EXPLAIN QUERY PLAN.
+
+    - estimated_cost: abstract units (~rows visited, plus sort/index build work)
+    - plan: plan lines, indented by nesting
+    - warnings: human-readable reasons the query may be expensive
+    """
+
+    estimated_cost: float
+    plan: list[str]
+    warnings: list[str] = field(default_factory=list)
+
+    def exceeds(self, max_cost: float = DEFAULT_MAX_COST) -> bool:
+        return self.estimated_cost > max_cost
+
+
+def _table_rows(conn: sqlite3.Connection, db_path: Path, table: str) -> int:
+    """
+    Cached row-count estimate. MAX(rowid) is an O(log n) lookup, unlike COUNT(*);
+    WITHOUT ROWID tables (and anything else that fails) fall back to COUNT(*)
+    or UNKNOWN_TABLE_ROWS.
+    """
+    key = (Path(db_path).resolve(), table)
+    cached = _row_counts.get(key)
+    now = time.monotonic()
+    if cached and now - cached[0] < ROW_COUNT_TTL_SECONDS:
+        return cached[1]
+
+    quoted = '"' + table.replace('"', '""') + '"'
+    try:
+        rows = conn.execute(f"SELECT MAX(rowid) FROM {quoted};").fetchone()[0] or 0
+    except sqlite3.OperationalError:
+        try:
+            rows = conn.execute(f"SELECT COUNT(*) FROM {quoted};").fetchone()[0]
+        except sqlite3.OperationalError:
+            rows = UNKNOWN_TABLE_ROWS
+    _row_counts[key] = (now, int(rows))
+    return int(rows)
+
+
+def _alias_map(stmt: ParsedStatement) -> dict[str, str]:
+    """
+    Plan lines name tables by alias; map alias -> real table. CTE names are
+    left out so they fall back to UNKNOWN_TABLE_ROWS.
+    """
+    ctes = {cte.alias_or_name.lower() for cte in stmt.tree.find_all(exp.CTE)}
+    aliases: dict[str, str] = {}
+    for t in stmt.tree.find_all(exp.Table):
+        if t.name.lower() in ctes:
+            continue
+        aliases[t.alias_or_name.lower()] = t.name
+        aliases.setdefault(t.name.lower(), t.name)
+    return aliases
+
+
+def _plan_cost(
+    children: dict[int, list[tuple[int, str]]],
+    parent: int,
+    rows_of,
+    warnings: list[str],
+    plan: list[str],
+    depth: int = 0,
+) -> tuple[float, float]:
+    """
+    Cost one level of the plan tree. Sibling SCAN/SEARCH steps are nested
+    loops, so each step runs once per row produced by the steps before it.
+    Returns (cost, rows produced).
+    """
+    cost = 0.0
+    loop_rows = 1.0
+    for node_id, detail in children.get(parent, []):
+        plan.append("  " * depth + detail)
+        upper = detail.upper()
+        target = _PLAN_TARGET_RE.match(detail)
+        if target:
+            name = target.group(1)
+            rows = float(rows_of(name))
+            if upper.startswith("SCAN"):
+                cost += loop_rows * rows
+                if rows >= LARGE_TABLE_ROWS:
+                    warnings.append(f"Full scan of {name} (~{int(rows):,} rows).")
+                if loop_rows > 1 and rows > 1:
+                    warnings.append(
+                        f"Nested-loop scan of {name} repeated ~{int(loop_rows):,} times."
+                    )
+                loop_rows *= max(rows, 1.0)
+            else:
+                if "AUTOMATIC" in upper:
+                    cost += rows * math.log2(rows + 2)
+                    warnings.append(f"SQLite builds a temporary index on {name} (no usable index).")
+                cost += loop_rows * math.log2(rows + 2)
+                if "ROWID=?" in upper or "PRIMARY KEY (" in upper and "=?" in upper:
+                    fanout = 1.0
+                elif ">" in upper or "<" in upper:
+                    fanout = rows * _RANGE_SELECTIVITY
+                else:
+                    fanout = rows * _EQ_SELECTIVITY
+                loop_rows *= max(fanout, 1.0)
+        elif upper.startswith("USE TEMP B-TREE"):
+            cost += loop_rows * math.log2(loop_rows + 2)
+            warnings.append(f"Temporary B-tree {detail[len('USE TEMP B-TREE ') :].lower()}.")
+        else:
+            # Subqueries, CTE materialization, compound SELECTs, co-routines.
+            sub_cost, _sub_rows = _plan_cost(children, node_id, rows_of, warnings, plan, depth + 1)
+            cost += sub_cost * (loop_rows if upper.startswith("CORRELATED") else 1.0)
+    return cost, loop_rows
+
+
+def estimate_query_cost(db_path: Path, sql: str, limit: int = 200) -> QueryCost:
+    """
+    Estimate the cost of running `sql` (with run_query's LIMIT applied)
+    from EXPLAIN QUERY PLAN, weighted by cached table row counts.
+
+    Full scans, temp B-trees, automatic indexes and nested-loop fan-out all
+    add to the estimate. Nothing is executed.
+    """
+    validate_select_only(sql)
+    stmt = parse_statement(sql.strip())
+    sql_limited = apply_limit(stmt, limit)
+    aliases = _alias_map(stmt)
+
+    with get_connection_manager(db_path).reader() as conn:
+        rows = conn.execute(f"EXPLAIN QUERY PLAN {sql_limited}").fetchall()
+
+        def rows_of(name: str) -> int:
+            table = aliases.get(name.lower())
+            return _table_rows(conn, db_path, table) if table else UNKNOWN_TABLE_ROWS
+
+        children: dict[int, list[tuple[int, str]]] = {}
+        for node_id, parent, _notused, detail in rows:
+            children.setdefault(parent, []).append((node_id, detail))
+
+        warnings: list[str] = []
+        plan: list[str] = []
+        cost, out_rows = _plan_cost(children, 0, rows_of, warnings, plan)
+
+    # A streaming plan (no sort/grouping at the top) stops after LIMIT rows.
+    top = [d.upper() for _id, d in children.get(0, [])]
+    streaming = not any(d.startswith("USE TEMP B-TREE") for d in top)
+    if streaming and stmt.tree.find(exp.AggFunc) is None and out_rows > limit:
+        cost *= limit / out_rows
+
+    return QueryCost(
+        estimated_cost=round(cost, 1), plan=plan, warnings=list(dict.fromkeys(warnings))
+    )
+
+
 def run_write(db_path: Path, sql: str) -> int:
     validate_write(sql)
     sql_clean = sql.strip().rstrip(";")
 
-    with sqlite3.connect(db_path) as conn:
-        conn.execute("PRAGMA foreign_keys = ON;")
+    with get_connection_manager(db_path).writer() as conn:
         # Transactional safety
-        with conn:
+        with transaction(conn):
             cur = conn.execute(sql_clean)
             return cur.rowcount
 
 
-def run_query(db_path: Path, sql: str, limit: int = 200) -> tuple[list[str], list[tuple[Any, ...]]]:
+@contextmanager
+def _enforce_budget(
+    conn: sqlite3.Connection, budget: QueryBudget, cancel_event: threading.Event | None
+) -> Iterator[None]:
+    """
+    Install a progress handler that aborts the running statement when the
+    budget is spent or cancel_event is set. SQLite then raises
+    OperationalError("interrupted"), which we turn into QueryInterrupted.
+    """
+    deadline = time.monotonic() + budget.max_seconds
+    state = {"steps": 0, "reason": ""}
+
+    def _check() -> int:
+        state["steps"] += budget.check_every
+        if cancel_event is not None and cancel_event.is_set():
+            state["reason"] = "Query cancelled."
+        elif state["steps"] > budget.max_instructions:
+            state["reason"] = (
+                f"Query exceeded its work budget ({budget.max_instructions:,} VM steps). "
+                "Add filters or a smaller LIMIT."
+            )
+        elif time.monotonic() > deadline:
+            state["reason"] = (
+                f"Query exceeded its time budget ({budget.max_seconds:g}s). "
+                "Add filters or a smaller LIMIT."
+            )
+        return 1 if state["reason"] else 0
+
+    conn.set_progress_handler(_check, budget.check_every)
+    try:
+        yield
+    except sqlite3.OperationalError as e:
+        if state["reason"]:
+            raise QueryInterrupted(state["reason"]) from e
+        raise
+    finally:
+        conn.set_progress_handler(None, 0)
+
+
+def run_query(
+    db_path: Path,
+    sql: str,
+    limit: int = 200,
+    *,
+    budget: QueryBudget = DEFAULT_BUDGET,
+    cancel_event: threading.Event | None = None,
+    columnar: bool = False,
+) -> tuple[list[str], list[tuple[Any, ...]]] | pa.Table:
     """
     Run a SQL query (SELECT only) and return results.
 
@@ -131,31 +459,260 @@ def run_query(db_path: Path, sql: str, limit: int = 200) -> tuple[list[str], lis
     db_path : Path
         Path to the SQLite database file.
     sql : str
-        SQL query string (must start with SELECT).
+        SQL query string (must be a single SELECT).
     limit : int
-        Defensive limit to avoid returning huge result sets.
+        Defensive limit to avoid returning huge result sets. An existing
+        LIMIT is kept if smaller, otherwise clamped to this value.
+    budget : QueryBudget
+        Wall-clock and VM-instruction budget; exceeding it raises QueryInterrupted.
+    cancel_event : threading.Event | None
+        Set it from another thread to stop the query (raises QueryInterrupted).
+    columnar : bool
+        Return a pyarrow Table built batch by batch from the cursor
+        instead of Python row tuples.
 
     Returns
     -------
     (colnames, rows)
         colnames: List[str]
         rows: List[Tuple[Any,...]]
+    or a pa.Table when columnar=True.
     """
-    # Normalize input: strip spaces, remove trailing semicolons
-    sql_clean = sql.strip().rstrip(";")
+    # Same guardrail as validation; the parse is cached so this is cheap.
+    validate_select_only(sql)
+    sql_limited = apply_limit(parse_statement(sql.strip()), limit)
+
+    with (
+        get_connection_manager(db_path).reader() as conn,
+        _enforce_budget(conn, budget, cancel_event),
+    ):
+        cur = conn.execute(sql_limited)
+        try:
+            if columnar:
+                return cursor_to_arrow(cur)
+
+            # Extract column names from cursor metadata
+            colnames = [d[0] for d in cur.description] if cur.description else []
+
+            # Fetch all rows (bounded by limit)
+            rows = cur.fetchall()
+        finally:
+            cur.close()
 
-    # Basic safety gate: block non-SELECT statements
-    if not sql_clean.lower().startswith("select"):
-        raise ValueError("Only SELECT queries are allowed in this stage.")
+        return colnames, rows
 
-    with sqlite3.connect(db_path) as conn:
-        # Add LIMIT defensively (even if user forgets)
-        cur = conn.execute(f"{sql_clean} LIMIT {int(limit)};")
 
-        # Extract column names from cursor metadata
-        colnames = [d[0] for d in cur.description] if cur.description else []
+# ---------------------------------------------------------------------------
+# Streaming / paginated fetch
+# ---------------------------------------------------------------------------
 
-        # Fetch all rows (bounded by limit)
-        rows = cur.fetchall()
+DEFAULT_PAGE_SIZE = 200
+DEFAULT_BATCH_SIZE = 1000
 
-        return colnames, rows
+# Hidden column appended to keyset queries; stripped before rows are returned.
+_KEYSET_COLUMN = "__nl2sql_rowid__"
+
+
+@dataclass(frozen=True)
+class PageToken:
+    """
+    Position of a page within a result.
+
+    - after_rowid: keyset position (rows with a larger rowid come next)
+    - offset: rows to skip, used when the query shape does not allow keyset
+    """
+
+    after_rowid: int | None = None
+    offset: int = 0
+
+
+@dataclass(frozen=True)
+class QueryPage:
+    """
+    One page of a query result.
+
+    - token: position this page was fetched from
+    - next_token: position of the following page, None on the last page
+    - keyset: True if pages are addressed by rowid instead of OFFSET
+    - table: the page as a pyarrow Table when fetched with columnar=True
+      (rows is empty in that case)
+    """
+
+    columns: list[str]
+    rows: list[tuple[Any, ...]]
+    token: PageToken
+    next_token: PageToken | None
+    keyset: bool
+    table: pa.Table | None = None
+
+    @property
+    def num_rows(self) -> int:
+        return self.table.num_rows if self.table is not None else len(self.rows)
+
+
+def iter_query_batches(
+    db_path: Path,
+    sql: str,
+    *,
+    batch_size: int = DEFAULT_BATCH_SIZE,
+    budget: QueryBudget = DEFAULT_BUDGET,
+    cancel_event: threading.Event | None = None,
+) -> Iterator[tuple[list[str], list[tuple[Any, ...]]]]:
+    """
+    Run a SELECT without a row limit and yield (colnames, rows) batches.
+
+    Rows are pulled with fetchmany, so at most `batch_size` rows are in
+    memory at once; an empty result yields a single batch with no rows. The
+    reader connection stays borrowed until the generator is exhausted or
+    closed; close it (or use it in a for loop) promptly.
+    """
+    validate_select_only(sql)
+    sql = sql.strip().rstrip(";").strip()
+
+    with (
+        get_connection_manager(db_path).reader() as conn,
+        _enforce_budget(conn, budget, cancel_event),
+    ):
+        cur = conn.execute(sql)
+        try:
+            colnames = [d[0] for d in cur.description] if cur.description else []
+            rows = cur.fetchmany(batch_size)
+            # An empty result still yields one (empty) batch so callers see the columns.
+            yield colnames, rows
+            while rows := cur.fetchmany(batch_size):
+                yield colnames, rows
+        finally:
+            cur.close()
+
+
+def _keyset_table(conn: sqlite3.Connection, stmt: ParsedStatement) -> exp.Table | None:
+    """
+    Return the single rowid table when paging by rowid gives the same rows
+    as the query itself, else None.
+
+    That holds for a plain filtered scan of one table: no joins, grouping,
+    DISTINCT, aggregates, window functions, ORDER BY, LIMIT or set operations.
+    """
+    tree = stmt.tree
+    if not isinstance(tree, exp.Select):
+        return None
+    if any(tree.args.get(k) for k in ("with", "joins", "group", "having", "distinct", "order")):
+        return None
+    if tree.args.get("limit") or tree.args.get("offset"):
+        return None
+    if any(tree.find_all(exp.AggFunc, exp.Window)):
+        return None
+
+    from_ = tree.args.get("from_")
+    table = from_.this if from_ is not None else None
+    if not isinstance(table, exp.Table) or table.db:
+        return None
+
+    row = conn.execute(
+        "SELECT sql FROM sqlite_master WHERE type = 'table' AND name = ? COLLATE NOCASE;",
+        (table.name,),
+    ).fetchone()
+    if row is None or "WITHOUT ROWID" in (row[0] or "").upper():
+        return None
+    return table
+
+
+def _keyset_sql(table: exp.Table, stmt: ParsedStatement, after_rowid: int | None, n: int) -> str:
+    rowid = exp.column("rowid", table=table.alias_or_name)
+    tree = stmt.tree.copy().select(rowid.as_(_KEYSET_COLUMN), copy=False)
+    if after_rowid is not None:
+        tree = tree.where(
+            exp.GT(this=rowid.copy(), expression=exp.Literal.number(after_rowid)), copy=False
+        )
+    return tree.order_by(rowid.copy(), copy=False).limit(n, copy=False).sql(dialect="sqlite")
+
+
+def _offset_sql(stmt: ParsedStatement, offset: int, n: int) -> str:
+    tree = stmt.tree
+    if tree.args.get("limit") or tree.args.get("offset"):
+        # Keep the query's own LIMIT/OFFSET: page over its result instead.
+        sub = exp.select("*").from_(tree.copy().subquery("page_src"))
+        return sub.limit(n).offset(offset).sql(dialect="sqlite")
+    return tree.copy().limit(n, copy=False).offset(offset, copy=False).sql(dialect="sqlite")
+
+
+def fetch_page(
+    db_path: Path,
+    sql: str,
+    page_size: int = DEFAULT_PAGE_SIZE,
+    token: PageToken | None = None,
+    *,
+    budget: QueryBudget = DEFAULT_BUDGET,
+    cancel_event: threading.Event | None = None,
+    columnar: bool = False,
+) -> QueryPage:
+    """
+    Fetch one page of a SELECT result.
+
+    Single-table scans are paged by rowid (WHERE rowid > ? ORDER BY rowid),
+    so later pages cost the same as the first. Any other query shape falls
+    back to LIMIT/OFFSET. One extra row is fetched to tell whether another
+    page exists; nothing beyond that is materialised.
+
+    With columnar=True the page is returned as QueryPage.table (pyarrow).
+    """
+    if page_size < 1:
+        raise ValueError("page_size must be at least 1.")
+    validate_select_only(sql)
+    stmt = parse_statement(sql.strip())
+    token = token or PageToken()
+
+    with (
+        get_connection_manager(db_path).reader() as conn,
+        _enforce_budget(conn, budget, cancel_event),
+    ):
+        table = _keyset_table(conn, stmt)
+        if table is not None:
+            page_sql = _keyset_sql(table, stmt, token.after_rowid, page_size + 1)
+        else:
+            page_sql = _offset_sql(stmt, token.offset, page_size + 1)
+
+        cur = conn.execute(page_sql)
+        try:
+            if columnar:
+                return _columnar_page(cursor_to_arrow(cur), page_size, token, table is not None)
+            colnames = [d[0] for d in cur.description] if cur.description else []
+            rows = cur.fetchmany(page_size + 1)
+        finally:
+            cur.close()
+
+    has_more = len(rows) > page_size
+    rows = rows[:page_size]
+    if table is not None:
+        next_token = PageToken(after_rowid=rows[-1][-1]) if has_more else None
+        colnames = colnames[:-1]
+        rows = [r[:-1] for r in rows]
+    else:
+        next_token = PageToken(offset=token.offset + page_size) if has_more else None
+
+    return QueryPage(
+        columns=colnames,
+        rows=rows,
+        token=token,
+        next_token=next_token,
+        keyset=table is not None,
+    )
+
+
+def _columnar_page(data: pa.Table, page_size: int, token: PageToken, keyset: bool) -> QueryPage:
+    has_more = data.num_rows > page_size
+    data = data.slice(0, page_size)
+    if keyset:
+        last_rowid = data.column(data.num_columns - 1)[-1].as_py() if has_more else None
+        data = data.remove_column(data.num_columns - 1)
+        next_token = PageToken(after_rowid=last_rowid) if has_more else None
+    else:
+        next_token = PageToken(offset=token.offset + page_size) if has_more else None
+    return QueryPage(
+        columns=data.column_names,
+        rows=[],
+        token=token,
+        next_token=next_token,
+        keyset=keyset,
+        table=data,
+    )
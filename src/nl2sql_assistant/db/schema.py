@@ -3,49 +3,145 @@ schema.py
 ---------
 Purpose:
 - Extract the SQLite schema in a "prompt-friendly" text format.
+- Introspect tables, columns, foreign keys and indexes in one query into a
+  SchemaModel (db/schema_model.py), cached until PRAGMA schema_version changes.
 
 """
 
 from __future__ import annotations
 
 import sqlite3
+import threading
 from pathlib import Path
 
+from nl2sql_assistant.db.connection import get_connection_manager
+from nl2sql_assistant.db.schema_model import Column, ForeignKey, Index, SchemaModel, Table
+
+# Tables the assistant keeps for itself (e.g. the undo journal); never shown to the model.
+INTERNAL_TABLE_PREFIX = "nl2sql_"
+
 
 def get_table_names(conn: sqlite3.Connection) -> list[str]:
     """
     Return non-system table names sorted alphabetically.
 
     SQLite stores metadata in sqlite_master.
-    We filter out internal sqlite_% tables.
+    We filter out internal sqlite_% tables and our own INTERNAL_TABLE_PREFIX tables.
     """
     rows = conn.execute(
         "SELECT name FROM sqlite_master WHERE type='table' AND name NOT LIKE 'sqlite_%' ORDER BY name;"
     ).fetchall()
-    return [r[0] for r in rows]
+    return [r[0] for r in rows if not r[0].startswith(INTERNAL_TABLE_PREFIX)]
+
+
+# One statement reads every table's columns, foreign keys and indexes through the
+# pragma table-valued functions, plus the schema_version it was read at. Being a
+# single statement, it sees one consistent snapshot of the schema.
+# Columns: table, kind, seq, name, detail, flag, extra, pk
+#   column: cid, name, type, notnull, dflt_value, pk
+#   fk:     id, from column, referenced table, seq, referenced column, NULL
+#   index:  seqno, index name, column (NULL for expressions), unique, origin, NULL
+_INTROSPECT_SQL = """
+WITH t AS (
+  SELECT name FROM sqlite_master
+  WHERE type = 'table' AND name NOT LIKE 'sqlite_%' AND substr(name, 1, ?) != ?
+)
+SELECT NULL, 'version', schema_version, NULL, NULL, NULL, NULL, NULL FROM pragma_schema_version
+UNION ALL
+SELECT t.name, 'column', c.cid, c.name, c.type, c."notnull", c.dflt_value, c.pk
+FROM t JOIN pragma_table_info(t.name) AS c
+UNION ALL
+SELECT t.name, 'fk', f.id, f."from", f."table", f.seq, f."to", NULL
+FROM t JOIN pragma_foreign_key_list(t.name) AS f
+UNION ALL
+SELECT t.name, 'index', i.seqno, l.name, i.name, l."unique", l.origin, NULL
+FROM t JOIN pragma_index_list(t.name) AS l JOIN pragma_index_info(l.name) AS i
+"""
+
+
+def _introspect(conn: sqlite3.Connection) -> SchemaModel:
+    rows = conn.execute(
+        _INTROSPECT_SQL, (len(INTERNAL_TABLE_PREFIX), INTERNAL_TABLE_PREFIX)
+    ).fetchall()
+    version = 0
+    columns: dict[str, list[tuple[int, Column]]] = {}
+    fk_parts: dict[str, dict[int, list[tuple[int, str, str, str | None]]]] = {}
+    index_parts: dict[str, dict[str, list[tuple[int, str]]]] = {}
+    index_meta: dict[tuple[str, str], tuple[bool, str]] = {}
+    for table, kind, seq, name, detail, flag, extra, pk in rows:
+        if kind == "version":
+            version = int(seq)
+        elif kind == "column":
+            column = Column(
+                name=name, type=detail or "", notnull=bool(flag), pk=int(pk), default=extra
+            )
+            columns.setdefault(table, []).append((seq, column))
+        elif kind == "fk":
+            fk_parts.setdefault(table, {}).setdefault(seq, []).append((flag, name, detail, extra))
+        else:
+            index_parts.setdefault(table, {}).setdefault(name, []).append((seq, detail or ""))
+            index_meta[(table, name)] = (bool(flag), extra)
+
+    def pk_of(table: str) -> tuple[str, ...]:
+        cols = [c for _cid, c in columns.get(table, []) if c.pk]
+        return tuple(c.name for c in sorted(cols, key=lambda c: c.pk))
 
+    tables = []
+    for name, cols in columns.items():
+        foreign_keys = []
+        for _id, parts in sorted(fk_parts.get(name, {}).items()):
+            parts.sort()
+            ref_table = parts[0][2]
+            ref_columns = tuple(p[3] for p in parts)
+            if any(c is None for c in ref_columns):
+                ref_columns = pk_of(ref_table)
+            foreign_keys.append(ForeignKey(tuple(p[1] for p in parts), ref_table, ref_columns))
+        indexes = [
+            Index(index, tuple(c for _s, c in sorted(parts)), *index_meta[(name, index)])
+            for index, parts in sorted(index_parts.get(name, {}).items())
+        ]
+        tables.append(
+            Table(
+                name=name,
+                columns=tuple(c for _cid, c in sorted(cols, key=lambda x: x[0])),
+                foreign_keys=tuple(foreign_keys),
+                indexes=tuple(indexes),
+            )
+        )
+    return SchemaModel.build(tables, schema_version=version)
+
+
+_MODELS: dict[Path, SchemaModel] = {}
+_MODELS_LOCK = threading.Lock()
 
-def get_table_columns(conn: sqlite3.Connection, table: str) -> list[dict[str, str]]:
+
+def load_schema(db_path: Path) -> SchemaModel:
     """
-    Return column metadata for a given table.
+    Return the schema model of db_path, introspecting only when it has changed.
 
-    PRAGMA table_info returns tuples:
-    (_cid, name, type, notnull, dflt_value, pk)
+    The model is cached per database and revalidated with a single
+    PRAGMA schema_version, which SQLite bumps on every schema change
+    (CREATE/DROP/ALTER), so an unchanged schema costs one tiny query.
     """
-    rows = conn.execute(f"PRAGMA table_info({table});").fetchall()
-    # PRAGMA table_info: cid, name, type, notnull, dflt_value, pk
-    cols = []
-    for _cid, name, col_type, notnull, dflt_value, pk in rows:
-        cols.append(
-            {
-                "name": str(name),
-                "type": str(col_type),
-                "notnull": str(bool(notnull)),
-                "pk": str(bool(pk)),
-                "default": "" if dflt_value is None else str(dflt_value),
-            }
-        )
-    return cols
+    key = Path(db_path).resolve()
+    with get_connection_manager(db_path).reader() as conn:
+        (version,) = conn.execute("PRAGMA schema_version;").fetchone()
+        with _MODELS_LOCK:
+            cached = _MODELS.get(key)
+        if cached is not None and cached.schema_version == version:
+            return cached
+        model = _introspect(conn)
+    with _MODELS_LOCK:
+        _MODELS[key] = model
+    return model
+
+
+def foreign_key_graph(db_path: Path) -> dict[str, frozenset[str]]:
+    """
+    Undirected table adjacency from declared foreign keys: graph[t] holds
+    every table that references t or that t references.
+    """
+    return load_schema(db_path).neighbours
 
 
 def schema_as_text(db_path: Path) -> str:
@@ -60,20 +156,7 @@ def schema_as_text(db_path: Path) -> str:
 
     Why this matters:
     - LLMs need the schema to produce correct joins, filters, and column references.
+
+    Served from the load_schema cache, so calling it on every rerun is cheap.
     """
-    with sqlite3.connect(db_path) as conn:
-        tables = get_table_names(conn)
-        lines: list[str] = []
-        for t in tables:
-            cols = get_table_columns(conn, t)
-            lines.append(f"TABLE {t}:")
-            for c in cols:
-                flags = []
-                if c["pk"] == "True":
-                    flags.append("PK")
-                if c["notnull"] == "True":
-                    flags.append("NOT NULL")
-                flag_str = f" ({', '.join(flags)})" if flags else ""
-                lines.append(f"  - {c['name']} : {c['type']}{flag_str}")
-            lines.append("")
-        return "\n".join(lines).strip()
+    return load_schema(db_path).text
@@ -0,0 +1,190 @@
+"""
+schema_model.py
+---------------
+Purpose:
+- One typed, in-memory description of the database schema that prompt
+  rendering, validation and risk checks all share.
+
+The model is built once per schema version (see db.schema.load_schema) and
+is read-only afterwards. It holds:
+- tables with typed columns, primary keys, foreign keys and indexes
+- a case-insensitive identifier index (table -> Table, table.column -> Column,
+  column -> tables that have it)
+- the foreign-key graph, with shortest join paths between tables
+"""
+
+from __future__ import annotations
+
+from collections import deque
+from collections.abc import Iterable
+from dataclasses import dataclass, field
+
+
+@dataclass(frozen=True, slots=True)
+class Column:
+    name: str
+    type: str
+    notnull: bool
+    pk: int  # position in the primary key (1-based), 0 if not part of it
+    default: str | None = None
+
+
+@dataclass(frozen=True, slots=True)
+class ForeignKey:
+    columns: tuple[str, ...]
+    ref_table: str
+    ref_columns: tuple[str, ...]  # resolved to the referenced primary key if omitted
+
+
+@dataclass(frozen=True, slots=True)
+class Index:
+    name: str
+    columns: tuple[str, ...]  # "" for expression parts
+    unique: bool
+    origin: str  # "c" (CREATE INDEX), "u" (UNIQUE constraint) or "pk"
+
+
+@dataclass(frozen=True, slots=True)
+class Table:
+    name: str
+    columns: tuple[Column, ...]
+    foreign_keys: tuple[ForeignKey, ...] = ()
+    indexes: tuple[Index, ...] = ()
+
+    @property
+    def primary_key(self) -> tuple[str, ...]:
+        return tuple(c.name for c in sorted(self.columns, key=lambda c: c.pk) if c.pk)
+
+    def render_text(self) -> str:
+        """This table in the schema_as_text prompt format."""
+        lines = [f"TABLE {self.name}:"]
+        for c in self.columns:
+            flags = []
+            if c.pk:
+                flags.append("PK")
+            if c.notnull:
+                flags.append("NOT NULL")
+            flag_str = f" ({', '.join(flags)})" if flags else ""
+            lines.append(f"  - {c.name} : {c.type}{flag_str}")
+        return "\n".join(lines)
+
+
+@dataclass(frozen=True, slots=True)
+class JoinStep:
+    """One hop of a join path: left_table.left_columns = right_table.right_columns."""
+
+    left_table: str
+    left_columns: tuple[str, ...]
+    right_table: str
+    right_columns: tuple[str, ...]
+
+    def condition(self) -> str:
+        return " AND ".join(
+            f"{self.left_table}.{lc} = {self.right_table}.{rc}"
+            for lc, rc in zip(self.left_columns, self.right_columns, strict=True)
+        )
+
+
+@dataclass(frozen=True, slots=True)
+class SchemaModel:
+    schema_version: int
+    tables: dict[str, Table]  # in name order
+    text: str = ""  # render_text() of the whole schema
+    # Identifier index, keyed by lower-cased names.
+    table_index: dict[str, Table] = field(default_factory=dict)
+    column_index: dict[tuple[str, str], Column] = field(default_factory=dict)
+    column_tables: dict[str, tuple[str, ...]] = field(default_factory=dict)
+    # Foreign-key graph: undirected adjacency and the join step for each directed edge.
+    neighbours: dict[str, frozenset[str]] = field(default_factory=dict)
+    edges: dict[tuple[str, str], JoinStep] = field(default_factory=dict)
+    # BFS parent maps, filled per source table the first time it is asked for.
+    _parents: dict[str, dict[str, str | None]] = field(default_factory=dict, repr=False)
+
+    @classmethod
+    def build(cls, tables: Iterable[Table], schema_version: int = 0) -> SchemaModel:
+        by_name = {t.name: t for t in sorted(tables, key=lambda t: t.name)}
+        table_index = {name.lower(): t for name, t in by_name.items()}
+        column_index: dict[tuple[str, str], Column] = {}
+        column_tables: dict[str, list[str]] = {}
+        for t in by_name.values():
+            for c in t.columns:
+                column_index[(t.name.lower(), c.name.lower())] = c
+                column_tables.setdefault(c.name.lower(), []).append(t.name)
+
+        adjacency: dict[str, set[str]] = {name: set() for name in by_name}
+        edges: dict[tuple[str, str], JoinStep] = {}
+        for t in by_name.values():
+            for fk in t.foreign_keys:
+                ref = table_index.get(fk.ref_table.lower())
+                if ref is None or ref.name == t.name:
+                    continue
+                adjacency[t.name].add(ref.name)
+                adjacency[ref.name].add(t.name)
+                edges.setdefault(
+                    (t.name, ref.name), JoinStep(t.name, fk.columns, ref.name, fk.ref_columns)
+                )
+                edges.setdefault(
+                    (ref.name, t.name), JoinStep(ref.name, fk.ref_columns, t.name, fk.columns)
+                )
+
+        return cls(
+            schema_version=schema_version,
+            tables=by_name,
+            text="\n\n".join(t.render_text() for t in by_name.values()),
+            table_index=table_index,
+            column_index=column_index,
+            column_tables={k: tuple(v) for k, v in column_tables.items()},
+            neighbours={name: frozenset(n) for name, n in adjacency.items()},
+            edges=edges,
+        )
+
+    def table(self, name: str) -> Table | None:
+        return self.table_index.get(name.lower())
+
+    def column(self, table: str, name: str) -> Column | None:
+        return self.column_index.get((table.lower(), name.lower()))
+
+    def tables_with_column(self, name: str) -> tuple[str, ...]:
+        return self.column_tables.get(name.lower(), ())
+
+    def render_text(self, tables: Iterable[str] | None = None) -> str:
+        """The schema_as_text block for `tables` (all tables if None), in name order."""
+        if tables is None:
+            return self.text
+        wanted = {t.lower() for t in tables}
+        return "\n\n".join(
+            t.render_text() for t in self.tables.values() if t.name.lower() in wanted
+        )
+
+    def _bfs(self, source: str) -> dict[str, str | None]:
+        parents = self._parents.get(source)
+        if parents is None:
+            parents = {source: None}
+            todo = deque([source])
+            while todo:
+                current = todo.popleft()
+                for nxt in sorted(self.neighbours[current]):
+                    if nxt not in parents:
+                        parents[nxt] = current
+                        todo.append(nxt)
+            self._parents[source] = parents
+        return parents
+
+    def join_path(self, start: str, end: str) -> list[JoinStep] | None:
+        """
+        Shortest chain of foreign-key joins from `start` to `end` ([] if they
+        are the same table, None if they are not connected). The BFS from each
+        start table runs once and is reused for every later lookup.
+        """
+        a, b = self.table(start), self.table(end)
+        if a is None or b is None:
+            return None
+        parents = self._bfs(a.name)
+        if b.name not in parents:
+            return None
+        steps: list[JoinStep] = []
+        node = b.name
+        while (prev := parents[node]) is not None:
+            steps.append(self.edges[(prev, node)])
+            node = prev
+        return steps[::-1]
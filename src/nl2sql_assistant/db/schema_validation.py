@@ -0,0 +1,160 @@
+"""
+schema_validation.py
+--------------------
+Purpose:
+- Reject SQL that references tables or columns the database does not have,
+  before it costs a round trip to SQLite or a risk-classification call.
+
+Every table, alias and column in the statement is resolved against the
+SchemaModel's identifier index (dict lookups), scope by scope, using
+sqlglot's scope analysis: aliases, CTEs, derived tables, correlated
+subqueries and references to SELECT aliases are all understood. Unknown
+names are reported together, each with its closest matches.
+"""
+
+from __future__ import annotations
+
+import difflib
+from collections.abc import Iterable
+
+from sqlglot import exp
+from sqlglot.errors import SqlglotError
+from sqlglot.optimizer.scope import Scope, traverse_scope
+
+from nl2sql_assistant.db.schema_model import SchemaModel
+from nl2sql_assistant.db.statement import parse_statement
+
+# Implicit columns every rowid table has.
+_ROWID_ALIASES = {"rowid", "oid", "_rowid_"}
+
+
+def _did_you_mean(name: str, candidates: Iterable[str]) -> str:
+    matches = difflib.get_close_matches(name.lower(), sorted(set(candidates)), n=3, cutoff=0.6)
+    return f" Did you mean: {', '.join(matches)}?" if matches else ""
+
+
+def _derived_columns(scope: Scope) -> set[str] | None:
+    """Output column names of a CTE or subquery scope; None if it selects *."""
+    select = scope.expression
+    if isinstance(select, exp.Query) and any(p.is_star for p in select.selects):
+        return None
+    return {name.lower() for name in select.named_selects}
+
+
+class _ScopeChain:
+    """The sources visible from a scope: its own first, then each enclosing scope's."""
+
+    def __init__(self, scope: Scope) -> None:
+        self.scopes: list[Scope] = []
+        current: Scope | None = scope
+        while current is not None:
+            self.scopes.append(current)
+            current = current.parent
+        # SQLite identifiers are case-insensitive: C.name resolves against alias c.
+        self.aliases = [{k.lower(): v for k, v in s.sources.items()} for s in self.scopes]
+
+    def source(self, alias: str) -> exp.Table | Scope | None:
+        for sources in self.aliases:
+            found = sources.get(alias.lower())
+            if found is not None:
+                return found
+        return None
+
+    def sources(self) -> Iterable[exp.Table | Scope]:
+        for scope in self.scopes:
+            yield from scope.sources.values()
+
+    def select_aliases(self) -> set[str]:
+        aliases: set[str] = set()
+        for scope in self.scopes:
+            if isinstance(scope.expression, exp.Select):
+                aliases.update(
+                    p.alias.lower() for p in scope.expression.selects if isinstance(p, exp.Alias)
+                )
+        return aliases
+
+
+def _check_table(table: exp.Table, schema: SchemaModel, problems: list[str]) -> None:
+    if not isinstance(table.this, exp.Identifier):
+        return  # table-valued function such as pragma_table_info(...)
+    if schema.table(table.name) is None:
+        problems.append(
+            f"Unknown table '{table.name}'." + _did_you_mean(table.name, schema.table_index)
+        )
+
+
+def _check_column(
+    column: exp.Column, chain: _ScopeChain, schema: SchemaModel, problems: list[str]
+) -> None:
+    name = column.name
+    if isinstance(column.this, exp.Star) or name.lower() in _ROWID_ALIASES:
+        return
+
+    if column.table:
+        source = chain.source(column.table)
+        if source is None:
+            aliases = [a for sources in chain.aliases for a in sources]
+            problems.append(
+                f"Unknown table or alias '{column.table}' in {column.sql(dialect='sqlite')}."
+                + _did_you_mean(column.table, aliases)
+            )
+        elif isinstance(source, exp.Table):
+            table = schema.table(source.name)
+            if table is not None and schema.column(table.name, name) is None:
+                problems.append(
+                    f"Unknown column '{name}' on table {table.name}."
+                    + _did_you_mean(name, (c.name.lower() for c in table.columns))
+                )
+        else:
+            derived = _derived_columns(source)
+            if derived is not None and name.lower() not in derived:
+                problems.append(
+                    f"Unknown column '{name}' on {column.table}." + _did_you_mean(name, derived)
+                )
+        return
+
+    candidates: set[str] = set()
+    for source in chain.sources():
+        if isinstance(source, exp.Table):
+            table = schema.table(source.name)
+            if table is None:
+                return  # already reported as an unknown table
+            if schema.column(table.name, name) is not None:
+                return
+            candidates.update(c.name.lower() for c in table.columns)
+        else:
+            derived = _derived_columns(source)
+            if derived is None or name.lower() in derived:
+                return
+            candidates.update(derived)
+    if name.lower() in chain.select_aliases():
+        return
+    problems.append(f"Unknown column '{name}'." + _did_you_mean(name, candidates))
+
+
+def validate_against_schema(sql: str, schema: SchemaModel) -> None:
+    """
+    Raise ValueError listing every table or column in `sql` that does not
+    exist in `schema` (with near-miss suggestions). Expects SQL that already
+    passed the statement guardrails.
+    """
+    tree = parse_statement(sql.strip()).tree
+    problems: list[str] = []
+    try:
+        scopes = traverse_scope(tree)
+    except SqlglotError as e:
+        raise ValueError(f"Could not resolve identifiers: {e}") from e
+
+    for scope in scopes:
+        chain = _ScopeChain(scope)
+        for source in scope.sources.values():
+            if isinstance(source, exp.Table):
+                _check_table(source, schema, problems)
+        for column in scope.columns:
+            # Scopes also list their subqueries' unresolved columns; each
+            # column is checked once, from the query it is written in.
+            if column.find_ancestor(exp.Query) is scope.expression:
+                _check_column(column, chain, schema, problems)
+
+    if problems:
+        raise ValueError(" ".join(dict.fromkeys(problems)))
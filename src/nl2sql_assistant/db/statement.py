@@ -0,0 +1,99 @@
+"""
+statement.py
+------------
+Purpose:
+- Parse a SQL string once and share the result across every guardrail.
+
+Validation, risk scoring, LIMIT injection and execution all consume the same
+ParsedStatement. Parsing is cached by SQL text, so re-validating the query on
+each Streamlit rerun (or again right before execution) costs a dict lookup.
+"""
+
+from __future__ import annotations
+
+from dataclasses import dataclass
+from functools import lru_cache
+
+from sqlglot import exp
+from sqlglot.dialects.dialect import Dialect
+from sqlglot.errors import SqlglotError
+from sqlglot.tokens import TokenType
+
+_DIALECT = Dialect.get_or_raise("sqlite")
+
+
+@dataclass(frozen=True)
+class ParsedStatement:
+    """
+    Result of parsing one SQL string.
+
+    - statements: every non-empty statement, in order
+    - semicolons: statement separators found by the tokenizer
+      (semicolons inside string literals are not counted)
+    - trailing_semicolon: the text ends with a semicolon
+
+    The expression trees are shared through the cache: treat them as
+    read-only and .copy() before transforming.
+    """
+
+    sql: str
+    statements: tuple[exp.Expression, ...]
+    semicolons: int
+    trailing_semicolon: bool
+
+    @property
+    def tree(self) -> exp.Expression:
+        if not self.statements:
+            raise ValueError("SQL is empty.")
+        return self.statements[0]
+
+    @property
+    def kind(self) -> str:
+        """
+        Statement type of the first statement: select/insert/update/delete/...
+        Any query expression (SELECT, UNION, WITH ... SELECT) reports "select".
+        """
+        if not self.statements:
+            return ""
+        tree = self.statements[0]
+        return "select" if isinstance(tree, exp.Query) else tree.key.lower()
+
+
+@lru_cache(maxsize=512)
+def parse_statement(sql: str) -> ParsedStatement:
+    """
+    Tokenize and parse SQL (SQLite dialect) exactly once per distinct text.
+
+    Raises ValueError if the SQL cannot be tokenized or parsed.
+    """
+    try:
+        tokens = _DIALECT.tokenize(sql)
+        parsed = _DIALECT.parser().parse(tokens, sql)
+    except SqlglotError as e:
+        raise ValueError(f"Could not parse SQL: {e}") from e
+
+    semicolons = sum(1 for t in tokens if t.token_type == TokenType.SEMICOLON)
+    return ParsedStatement(
+        sql=sql,
+        statements=tuple(s for s in parsed if s is not None),
+        semicolons=semicolons,
+        trailing_semicolon=bool(tokens) and tokens[-1].token_type == TokenType.SEMICOLON,
+    )
+
+
+def apply_limit(stmt: ParsedStatement, limit: int) -> str:
+    """
+    Return SQL for stmt with its row limit clamped to at most `limit`.
+
+    - no LIMIT: one is added
+    - LIMIT above `limit` (or not a literal): it is replaced, OFFSET is kept
+    - LIMIT already within bounds: the original SQL is used unchanged
+    """
+    tree = stmt.tree
+    existing = tree.args.get("limit")
+    if isinstance(existing, exp.Limit):
+        value = existing.expression
+        if isinstance(value, exp.Literal) and value.is_int and int(value.this) <= limit:
+            return stmt.sql.strip().rstrip(";").strip()
+
+    return tree.copy().limit(int(limit), copy=False).sql(dialect="sqlite")
@@ -0,0 +1,382 @@
+"""
+undo_journal.py
+---------------
+Purpose:
+- Make every write undoable by journaling only the rows it touches.
+
+Instead of copying the whole database file before a write, the writer
+records, inside the same transaction as the write itself:
+- UPDATE/DELETE: the full "before" image of each row its WHERE clause matches
+- INSERT: the rowids of the rows it created (via RETURNING rowid)
+
+The journal lives in two internal tables next to the user's data
+(INTERNAL_TABLE_PREFIX keeps them out of the prompt schema). Cost is
+proportional to the rows changed, and old entries are pruned so the journal
+stays bounded.
+
+Limitations (the write is refused rather than journaled incorrectly):
+- positional (?) parameters: the WHERE clause is re-run with named params
+- UPDATE ... FROM, INSERT OR REPLACE and upserts: the affected rows cannot
+  be known up front
+- UPDATEs that assign the rowid (or the INTEGER PRIMARY KEY aliasing it):
+  the before image is keyed by the old rowid, which no longer exists
+- DELETE/UPDATE on the parent of a cascading foreign key (ON DELETE/UPDATE
+  CASCADE, SET NULL, SET DEFAULT): the child rows SQLite changes are not
+  captured
+- WITHOUT ROWID tables
+"""
+
+from __future__ import annotations
+
+import base64
+import json
+import sqlite3
+from collections.abc import Mapping
+from dataclasses import dataclass
+from datetime import datetime
+from pathlib import Path
+from typing import Any
+
+from sqlglot import exp
+
+from nl2sql_assistant.db.connection import get_connection_manager, transaction
+from nl2sql_assistant.db.schema import INTERNAL_TABLE_PREFIX
+from nl2sql_assistant.db.statement import ParsedStatement
+from nl2sql_assistant.db.value_index import mark_values_stale
+
+JOURNAL_TABLE = f"{INTERNAL_TABLE_PREFIX}undo_journal"
+JOURNAL_ROWS_TABLE = f"{INTERNAL_TABLE_PREFIX}undo_rows"
+
+# Most recent journaled writes kept; older entries are pruned after each write.
+JOURNAL_KEEP = 200
+
+_CAPTURE_BATCH = 1000
+
+_SCHEMA = f"""
+CREATE TABLE IF NOT EXISTS {JOURNAL_TABLE} (
+    journal_id INTEGER PRIMARY KEY,
+    created_at TEXT NOT NULL,
+    table_name TEXT NOT NULL,
+    op TEXT NOT NULL,
+    sql TEXT NOT NULL,
+    columns TEXT NOT NULL,
+    max_rowid_before INTEGER,  -- unused, kept for journals created by older versions
+    row_count INTEGER NOT NULL DEFAULT 0,
+    restored_at TEXT
+);
+CREATE TABLE IF NOT EXISTS {JOURNAL_ROWS_TABLE} (
+    journal_id INTEGER NOT NULL,
+    row_id INTEGER NOT NULL,
+    row_data TEXT,
+    PRIMARY KEY (journal_id, row_id)
+) WITHOUT ROWID;
+"""
+
+
+@dataclass(frozen=True)
+class JournalEntry:
+    journal_id: int
+    created_at: str
+    table_name: str
+    op: str
+    sql: str
+    row_count: int
+    restored_at: str | None
+
+
+def _q(name: str) -> str:
+    return '"' + name.replace('"', '""') + '"'
+
+
+def _encode(values: tuple[Any, ...]) -> str:
+    # JSON cannot hold BLOBs; tag them so they round-trip as bytes.
+    return json.dumps(
+        [{"$b64": base64.b64encode(v).decode()} if isinstance(v, bytes) else v for v in values]
+    )
+
+
+def _decode(data: str) -> list[Any]:
+    return [
+        base64.b64decode(v["$b64"]) if isinstance(v, dict) and "$b64" in v else v
+        for v in json.loads(data)
+    ]
+
+
+def ensure_journal(conn: sqlite3.Connection) -> None:
+    # Not executescript: that would COMMIT a transaction the caller has open.
+    for ddl in _SCHEMA.split(";"):
+        if ddl.strip():
+            conn.execute(ddl)
+
+
+def write_target(stmt: ParsedStatement) -> exp.Table:
+    """The table node an INSERT/UPDATE/DELETE writes to (not checked against the DB)."""
+    tree = stmt.tree
+    table = tree.this.this if isinstance(tree.this, exp.Schema) else tree.this
+    if not isinstance(table, exp.Table):
+        raise ValueError("Write target table not recognised.")
+    return table
+
+
+def target_table(conn: sqlite3.Connection, stmt: ParsedStatement) -> exp.Table:
+    """The table a write modifies; ValueError if it is unknown or has no rowid."""
+    table = write_target(stmt)
+
+    row = conn.execute(
+        "SELECT sql FROM sqlite_master WHERE type = 'table' AND name = ? COLLATE NOCASE;",
+        (table.name,),
+    ).fetchone()
+    if row is None:
+        raise ValueError(f"Unknown table '{table.name}'.")
+    if "WITHOUT ROWID" in (row[0] or "").upper():
+        raise ValueError(f"Rows of WITHOUT ROWID table '{table.name}' cannot be tracked.")
+    return table
+
+
+def _rowid_names(conn: sqlite3.Connection, table: str) -> set[str]:
+    """Lower-cased names that address the rowid of `table`, including an INTEGER PRIMARY KEY."""
+    names = {"rowid", "oid", "_rowid_"}
+    pk = conn.execute(
+        "SELECT name, type FROM pragma_table_info(?) WHERE pk > 0;", (table,)
+    ).fetchall()
+    if len(pk) == 1 and pk[0][1].upper() == "INTEGER":
+        names.add(pk[0][0].lower())
+    return names
+
+
+def assigned_columns(stmt: ParsedStatement) -> set[str]:
+    """Lower-cased columns an UPDATE's SET clause assigns (empty for other writes)."""
+    if stmt.kind != "update":
+        return set()
+    return {e.this.name.lower() for e in stmt.tree.expressions if isinstance(e, exp.EQ)}
+
+
+def check_rowid_unchanged(conn: sqlite3.Connection, stmt: ParsedStatement, table: str) -> None:
+    """
+    ValueError if `stmt` is an UPDATE that assigns the rowid of `table` (or the
+    INTEGER PRIMARY KEY aliasing it): its rows cannot be followed by rowid.
+    """
+    if assigned_columns(stmt) & _rowid_names(conn, table):
+        raise ValueError(
+            f"UPDATE changes the rowid of '{table}' (its INTEGER PRIMARY KEY), so its rows "
+            "cannot be tracked; delete and re-insert the rows instead."
+        )
+
+
+def _check_cascades(conn: sqlite3.Connection, table: str, op: str, assigned: set[str]) -> None:
+    """ValueError if a foreign-key action would change rows of other tables."""
+    if op == "insert" or not conn.execute("PRAGMA foreign_keys;").fetchone()[0]:
+        return
+    pk = [
+        r[0].lower()
+        for r in conn.execute(
+            "SELECT name FROM pragma_table_info(?) WHERE pk > 0 ORDER BY pk;", (table,)
+        )
+    ]
+    refs = conn.execute(
+        'SELECT m.name, f."to", f.on_update, f.on_delete '
+        "FROM sqlite_master AS m, pragma_foreign_key_list(m.name) AS f "
+        "WHERE m.type = 'table' AND f.\"table\" = ? COLLATE NOCASE;",
+        (table,),
+    ).fetchall()
+    for child, ref_column, on_update, on_delete in refs:
+        action = on_delete if op == "delete" else on_update
+        if action.upper() in ("NO ACTION", "RESTRICT"):
+            continue
+        # An UPDATE only cascades when it assigns a referenced column.
+        referenced = {ref_column.lower()} if ref_column else set(pk)
+        if op == "delete" or assigned & referenced:
+            raise ValueError(
+                f"Cannot journal {op.upper()} on '{table}': foreign key "
+                f"ON {op.upper()} {action.upper()} from '{child}' would change rows "
+                "the journal does not capture."
+            )
+
+
+def target_rows_sql(stmt: ParsedStatement, table: exp.Table) -> str:
+    """
+    SELECT rowid, * over the rows an UPDATE/DELETE's WHERE clause matches.
+    Bind it with the write's own (named) parameters.
+    """
+    source = exp.Table(this=exp.to_identifier(table.name), alias=table.args.get("alias"))
+    return (
+        exp.select(exp.column("rowid", table=table.alias_or_name), exp.Star())
+        .from_(source)
+        .where(stmt.tree.args["where"].this.copy())
+        .sql(dialect="sqlite")
+    )
+
+
+def journal_before(conn: sqlite3.Connection, stmt: ParsedStatement) -> int:
+    """
+    Open a journal entry for `stmt` (ValueError if it cannot be journaled).
+    Must run on the writer inside the write's transaction; then run every
+    parameter set through journal_execute and finish with journal_after.
+
+    Returns the journal_id.
+    """
+    tree = stmt.tree
+    if tree.args.get("from_") is not None:
+        raise ValueError("Cannot journal UPDATE ... FROM; rewrite it with a subquery.")
+    if isinstance(tree, exp.Insert) and (tree.args.get("alternative") or tree.args.get("conflict")):
+        raise ValueError("Cannot journal INSERT OR REPLACE / ON CONFLICT writes.")
+    if tree.args.get("returning") is not None:
+        raise ValueError("Cannot journal a write with its own RETURNING clause.")
+
+    ensure_journal(conn)
+    table = target_table(conn, stmt)
+    op = stmt.kind
+    assigned = assigned_columns(stmt)
+    check_rowid_unchanged(conn, stmt, table.name)
+    _check_cascades(conn, table.name, op, assigned)
+    # The column order of the `SELECT rowid, *` before images.
+    columns = [r[0] for r in conn.execute("SELECT name FROM pragma_table_info(?);", (table.name,))]
+    cur = conn.execute(
+        f"INSERT INTO {JOURNAL_TABLE} (created_at, table_name, op, sql, columns) "
+        "VALUES (?, ?, ?, ?, ?);",
+        (
+            datetime.now().isoformat(timespec="seconds"),
+            table.name,
+            op,
+            stmt.sql,
+            json.dumps(columns if op != "insert" else []),
+        ),
+    )
+    return int(cur.lastrowid)
+
+
+def journal_execute(
+    conn: sqlite3.Connection,
+    journal_id: int,
+    stmt: ParsedStatement,
+    sql: str,
+    params: Mapping[str, Any] | None,
+) -> int:
+    """
+    Run `sql` (the statement journal_before opened `journal_id` for, without
+    its trailing ";") with one set of named parameters, journaling exactly the
+    rows it touches, and return its rowcount.
+
+    - UPDATE/DELETE: the rows this set matches are captured right before it
+      runs, so a batch sees the changes of its earlier sets; a row touched by
+      several sets keeps its first image
+    - INSERT: the statement runs with RETURNING rowid, so every created key is
+      recorded, wherever it lands (INSERT ... SELECT, explicit low keys)
+    """
+    if params is not None and not isinstance(params, Mapping):
+        raise ValueError("Undo journal requires named parameters (a dict), not positional ones.")
+    params = dict(params or {})
+    if stmt.kind == "insert":
+        rowids = [(journal_id, r[0]) for r in conn.execute(f"{sql} RETURNING rowid", params)]
+        conn.executemany(
+            f"INSERT OR IGNORE INTO {JOURNAL_ROWS_TABLE} (journal_id, row_id) VALUES (?, ?);",
+            rowids,
+        )
+        return len(rowids)
+
+    src = conn.execute(target_rows_sql(stmt, write_target(stmt)), params)
+    while rows := src.fetchmany(_CAPTURE_BATCH):
+        conn.executemany(
+            f"INSERT OR IGNORE INTO {JOURNAL_ROWS_TABLE} (journal_id, row_id, row_data) "
+            "VALUES (?, ?, ?);",
+            [(journal_id, r[0], _encode(r[1:])) for r in rows],
+        )
+    return conn.execute(sql, params).rowcount
+
+
+def journal_after(conn: sqlite3.Connection, journal_id: int) -> None:
+    """Finish a journal entry once the write has run (same transaction), then prune old entries."""
+    conn.execute(
+        f"UPDATE {JOURNAL_TABLE} SET row_count = "
+        f"(SELECT COUNT(*) FROM {JOURNAL_ROWS_TABLE} WHERE journal_id = ?) WHERE journal_id = ?;",
+        (journal_id, journal_id),
+    )
+    prune_journal(conn)
+
+
+def prune_journal(conn: sqlite3.Connection, keep: int = JOURNAL_KEEP) -> int:
+    """Delete all but the newest `keep` journal entries. Returns entries removed."""
+    cutoff = conn.execute(
+        f"SELECT journal_id FROM {JOURNAL_TABLE} ORDER BY journal_id DESC LIMIT 1 OFFSET ?;",
+        (keep,),
+    ).fetchone()
+    if cutoff is None:
+        return 0
+    conn.execute(f"DELETE FROM {JOURNAL_ROWS_TABLE} WHERE journal_id <= ?;", cutoff)
+    return conn.execute(f"DELETE FROM {JOURNAL_TABLE} WHERE journal_id <= ?;", cutoff).rowcount
+
+
+def list_journal(db_path: Path, limit: int = 20) -> list[JournalEntry]:
+    """Newest journal entries first."""
+    with get_connection_manager(db_path).writer() as conn:
+        ensure_journal(conn)
+        rows = conn.execute(
+            f"SELECT journal_id, created_at, table_name, op, sql, row_count, restored_at "
+            f"FROM {JOURNAL_TABLE} ORDER BY journal_id DESC LIMIT ?;",
+            (limit,),
+        ).fetchall()
+    return [JournalEntry(*r) for r in rows]
+
+
+def restore_write(db_path: Path, journal_id: int) -> int:
+    """
+    Undo a journaled write and return the number of rows actually put back.
+
+    - DELETE: the captured rows are re-inserted with their original rowids
+    - UPDATE: the captured rows are overwritten with their before image
+    - INSERT: the inserted rows are deleted
+
+    Restores should be applied newest first: undoing an older UPDATE also
+    discards any later change to the same rows. Raises ValueError if the entry
+    does not exist or was already restored.
+    """
+    with get_connection_manager(db_path).writer() as conn:
+        ensure_journal(conn)
+        with transaction(conn):
+            entry = conn.execute(
+                f"SELECT table_name, op, columns, restored_at FROM {JOURNAL_TABLE} "
+                "WHERE journal_id = ?;",
+                (journal_id,),
+            ).fetchone()
+            if entry is None:
+                raise ValueError(f"No undo journal entry {journal_id}.")
+            table_name, op, columns_json, restored_at = entry
+            if restored_at is not None:
+                raise ValueError(
+                    f"Journal entry {journal_id} was already restored ({restored_at})."
+                )
+
+            columns = json.loads(columns_json)
+            table = _q(table_name)
+            rows = conn.execute(
+                f"SELECT row_id, row_data FROM {JOURNAL_ROWS_TABLE} WHERE journal_id = ?;",
+                (journal_id,),
+            )
+            restored = 0
+            while batch := rows.fetchmany(_CAPTURE_BATCH):
+                if op == "insert":
+                    cur = conn.executemany(
+                        f"DELETE FROM {table} WHERE rowid = ?;", [(rid,) for rid, _ in batch]
+                    )
+                elif op == "delete":
+                    cols = ", ".join(["rowid", *map(_q, columns)])
+                    marks = ", ".join("?" * (len(columns) + 1))
+                    cur = conn.executemany(
+                        f"INSERT INTO {table} ({cols}) VALUES ({marks});",
+                        [(rid, *_decode(data)) for rid, data in batch],
+                    )
+                else:
+                    sets = ", ".join(f"{_q(c)} = ?" for c in columns)
+                    cur = conn.executemany(
+                        f"UPDATE {table} SET {sets} WHERE rowid = ?;",
+                        [(*_decode(data), rid) for rid, data in batch],
+                    )
+                # Rows that no longer exist (deleted or re-keyed since) are not counted.
+                restored += cur.rowcount
+
+            conn.execute(
+                f"UPDATE {JOURNAL_TABLE} SET restored_at = ? WHERE journal_id = ?;",
+                (datetime.now().isoformat(timespec="seconds"), journal_id),
+            )
+    mark_values_stale(db_path, table_name)
+    return restored
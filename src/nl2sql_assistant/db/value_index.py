@@ -0,0 +1,268 @@
+"""
+value_index.py
+--------------
+Purpose:
+- Ground the literals in generated SQL: tell the model which values a
+  low-cardinality TEXT column actually holds ('completed', not 'complete').
+
+For every TEXT column with few distinct values (orders.status,
+customers.country, products.category, ...) the index keeps those values
+plus a character-trigram index over them. Question terms are looked up
+fuzzily, and the matches are rendered as a short hint block for SQL_PROMPT.
+
+Refresh is incremental: each table carries a change token, its MAX(rowid)
+(one b-tree seek, unlike COUNT(*) which scans the table), and only tables
+whose token changed, or that a write marked stale (mark_values_stale), are
+scanned again. The token catches rows appended outside the app; every
+FULL_REFRESH_SECONDS all tables are rescanned, to pick up other outside
+updates and deletes.
+
+Columns that identify rows rather than categorise them are skipped:
+primary keys and single-column UNIQUE columns (e.g. customers.email).
+"""
+
+from __future__ import annotations
+
+import re
+import sqlite3
+import threading
+import time
+from collections import Counter
+from dataclasses import dataclass, field
+from pathlib import Path
+
+from nl2sql_assistant.db.connection import get_connection_manager
+from nl2sql_assistant.db.schema import load_schema
+from nl2sql_assistant.db.schema_model import Column, Table
+
+# A column is indexed if it has at most this many distinct values...
+MAX_DISTINCT_VALUES = 50
+# ...and, in tables larger than that, if distinct values are at most this share of rows.
+MAX_DISTINCT_RATIO = 0.2
+# Values longer than this are free text, not categories.
+MAX_VALUE_LENGTH = 64
+
+# Minimum trigram similarity (Dice coefficient) for a fuzzy match.
+MIN_SIMILARITY = 0.5
+# Most hints handed to the prompt.
+MAX_HINTS = 8
+
+# Token checks run at most this often; a stale mark triggers one immediately.
+REFRESH_INTERVAL_SECONDS = 5.0
+FULL_REFRESH_SECONDS = 600.0
+
+_WORD_RE = re.compile(r"[^\W_]+(?:['-][^\W_]+)*")
+
+
+@dataclass(frozen=True)
+class ValueHit:
+    table: str
+    column: str
+    value: str
+    term: str  # the question text it matched
+    score: float  # 1.0 for an exact (case-insensitive) match
+
+
+@dataclass
+class _TableValues:
+    token: int | None
+    columns: dict[str, tuple[str, ...]] = field(default_factory=dict)
+
+
+def _trigrams(text: str) -> set[str]:
+    padded = f"  {text.lower()} "
+    return {padded[i : i + 3] for i in range(len(padded) - 2)}
+
+
+def _is_text(column: Column) -> bool:
+    # SQLite type affinity: a declared type containing CHAR, CLOB or TEXT is TEXT.
+    decl = column.type.upper()
+    return any(k in decl for k in ("CHAR", "CLOB", "TEXT"))
+
+
+def _candidate_columns(table: Table) -> list[Column]:
+    unique = {ix.columns[0].lower() for ix in table.indexes if ix.unique and len(ix.columns) == 1}
+    return [c for c in table.columns if _is_text(c) and not c.pk and c.name.lower() not in unique]
+
+
+def _q(name: str) -> str:
+    return '"' + name.replace('"', '""') + '"'
+
+
+def _table_token(conn: sqlite3.Connection, table: str) -> int | None:
+    try:
+        return conn.execute(f"SELECT MAX(rowid) FROM {_q(table)};").fetchone()[0]
+    except sqlite3.OperationalError:  # WITHOUT ROWID: stale marks and full refreshes only
+        return None
+
+
+def _scan_table(conn: sqlite3.Connection, table: Table, token: int | None) -> _TableValues:
+    rows = conn.execute(f"SELECT COUNT(*) FROM {_q(table.name)};").fetchone()[0]
+    values = _TableValues(token=token)
+    for column in _candidate_columns(table):
+        distinct = conn.execute(
+            f"SELECT {_q(column.name)} FROM {_q(table.name)} "
+            f"WHERE {_q(column.name)} IS NOT NULL GROUP BY 1 LIMIT ?;",
+            (MAX_DISTINCT_VALUES + 1,),
+        ).fetchall()
+        n = len(distinct)
+        if n == 0 or n > MAX_DISTINCT_VALUES:
+            continue
+        if rows > MAX_DISTINCT_VALUES and n > MAX_DISTINCT_RATIO * rows:
+            continue
+        texts = [v for (v,) in distinct if isinstance(v, str) and len(v) <= MAX_VALUE_LENGTH]
+        if texts:
+            values.columns[column.name] = tuple(texts)
+    return values
+
+
+class ValueIndex:
+    """Distinct values of low-cardinality TEXT columns with trigram lookup."""
+
+    def __init__(self, db_path: Path) -> None:
+        self.db_path = Path(db_path).resolve()
+        self._lock = threading.Lock()
+        self._tables: dict[str, _TableValues] = {}
+        self._stale: set[str] = set()
+        self._checked_at = 0.0
+        self._full_at = 0.0
+        # Flattened view, swapped in whole after a refresh: entries[value id] is
+        # (table, column, value), postings map trigram -> value ids, sizes[value id]
+        # is the value's trigram count.
+        self._view: tuple[list[tuple[str, str, str]], dict[str, list[int]], list[int]] = (
+            [],
+            {},
+            [],
+        )
+        self.scans = 0  # tables scanned so far (for tests and diagnostics)
+
+    def mark_stale(self, table: str) -> None:
+        with self._lock:
+            self._stale.add(table.lower())
+
+    def refresh(self, *, force: bool = False) -> bool:
+        """
+        Bring the index up to date; returns True if any table was rescanned.
+        Without `force`, token checks are throttled to REFRESH_INTERVAL_SECONDS
+        unless a table was marked stale.
+        """
+        with self._lock:
+            now = time.monotonic()
+            full = force or now - self._full_at >= FULL_REFRESH_SECONDS
+            if not full and not self._stale and now - self._checked_at < REFRESH_INTERVAL_SECONDS:
+                return False
+
+            schema = load_schema(self.db_path)
+            tables: dict[str, _TableValues] = {}
+            scanned = False
+            with get_connection_manager(self.db_path).reader() as conn:
+                for table in schema.tables.values():
+                    if not _candidate_columns(table):
+                        continue
+                    token = _table_token(conn, table.name)
+                    known = self._tables.get(table.name)
+                    if (
+                        not full
+                        and known is not None
+                        and known.token == token
+                        and table.name.lower() not in self._stale
+                    ):
+                        tables[table.name] = known
+                        continue
+                    tables[table.name] = _scan_table(conn, table, token)
+                    self.scans += 1
+                    scanned = True
+
+            dropped = set(self._tables) - set(tables)
+            self._tables = tables
+            self._stale.clear()
+            self._checked_at = now
+            if full:
+                self._full_at = now
+            if scanned or dropped:
+                self._rebuild_view()
+            return scanned
+
+    def _rebuild_view(self) -> None:
+        entries: list[tuple[str, str, str]] = []
+        postings: dict[str, list[int]] = {}
+        sizes: list[int] = []
+        for table, values in self._tables.items():
+            for column, texts in values.columns.items():
+                for text in texts:
+                    grams = _trigrams(text)
+                    for g in grams:
+                        postings.setdefault(g, []).append(len(entries))
+                    entries.append((table, column, text))
+                    sizes.append(len(grams))
+        self._view = (entries, postings, sizes)
+
+    def values(self, table: str, column: str) -> tuple[str, ...]:
+        """Indexed values of table.column (empty if the column is not indexed)."""
+        for name, values in self._tables.items():
+            if name.lower() == table.lower():
+                for col, texts in values.columns.items():
+                    if col.lower() == column.lower():
+                        return texts
+        return ()
+
+    def lookup(self, question: str, limit: int = MAX_HINTS) -> list[ValueHit]:
+        """
+        Values that fuzzily match a word or two-word phrase of `question`,
+        best first, one hit per value.
+        """
+        self.refresh()
+        entries, postings, sizes = self._view
+        words = _WORD_RE.findall(question)
+        terms = [w for w in words if len(w) >= 3]
+        terms += [f"{a} {b}" for a, b in zip(words, words[1:], strict=False)]
+
+        best: dict[int, tuple[float, str]] = {}
+        for term in terms:
+            grams = _trigrams(term)
+            shared = Counter(v for g in grams for v in postings.get(g, ()))
+            for v, n in shared.items():
+                text = entries[v][2]
+                score = 1.0 if text.lower() == term.lower() else 2 * n / (len(grams) + sizes[v])
+                if score >= MIN_SIMILARITY and score > best.get(v, (0.0, ""))[0]:
+                    best[v] = (score, term)
+
+        ranked = sorted(best.items(), key=lambda item: (-item[1][0], item[0]))[:limit]
+        return [
+            ValueHit(*entries[v], term=term, score=round(score, 3)) for v, (score, term) in ranked
+        ]
+
+
+def format_value_hints(hits: list[ValueHit]) -> str:
+    """
+    Prompt block for SQL_PROMPT's value_hints ("" when there is nothing to add).
+    """
+    if not hits:
+        return ""
+    lines = ["Known values (use these exact literals):"]
+    for hit in hits:
+        value = hit.value.replace("'", "''")
+        lines.append(f"- {hit.table}.{hit.column} = '{value}'")
+    return "\n".join(lines) + "\n\n"
+
+
+_INDEXES: dict[Path, ValueIndex] = {}
+_INDEXES_LOCK = threading.Lock()
+
+
+def get_value_index(db_path: Path) -> ValueIndex:
+    """Return the process-wide ValueIndex for db_path (built on first lookup)."""
+    key = Path(db_path).resolve()
+    with _INDEXES_LOCK:
+        index = _INDEXES.get(key)
+        if index is None:
+            index = _INDEXES[key] = ValueIndex(key)
+        return index
+
+
+def mark_values_stale(db_path: Path, table: str) -> None:
+    """Tell the value index (if one exists) that a write changed `table`."""
+    with _INDEXES_LOCK:
+        index = _INDEXES.get(Path(db_path).resolve())
+    if index is not None:
+        index.mark_stale(table)
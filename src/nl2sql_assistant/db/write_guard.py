@@ -1,13 +1,13 @@
 from __future__ import annotations
 
-import re
+from nl2sql_assistant.db.statement import parse_statement
 
-WRITE_RE = re.compile(r"^\s*(insert|update|delete)\b", re.IGNORECASE)
+WRITE_KINDS = {"insert", "update", "delete"}
 
 
 def validate_write_sql(sql: str) -> None:
     """
-    Hard guardrails for writes.
+    Hard guardrails for writes, checked on the parsed statement.
 
     Stage 5 policy:
     - Only allow INSERT/UPDATE/DELETE
@@ -18,14 +18,13 @@ def validate_write_sql(sql: str) -> None:
     if not cleaned:
         raise ValueError("Empty SQL. Nothing to execute.")
 
-    if not WRITE_RE.match(cleaned):
+    stmt = parse_statement(cleaned)
+    if stmt.kind not in WRITE_KINDS:
         raise ValueError("Write SQL must start with INSERT/UPDATE/DELETE.")
 
     # Block multi-statement attempts.
-    if cleaned.count(";") > 1:
+    if len(stmt.statements) > 1 or stmt.semicolons > 1:
         raise ValueError("Multiple SQL statements are not allowed.")
 
-    lower = cleaned.lower()
-    if lower.startswith("update") or lower.startswith("delete"):
-        if " where " not in lower:
-            raise ValueError("UPDATE/DELETE requires a WHERE clause.")
+    if stmt.kind in ("update", "delete") and stmt.tree.args.get("where") is None:
+        raise ValueError("UPDATE/DELETE requires a WHERE clause.")
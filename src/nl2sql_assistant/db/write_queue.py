@@ -0,0 +1,134 @@
+"""
+write_queue.py
+--------------
+Purpose:
+- Serialize writes from every Write Mode session through one writer thread.
+
+SQLite allows a single writer at a time. Instead of each session racing for
+the write lock, sessions submit validated jobs to a process-wide queue per
+database; one daemon thread drains it in order on the manager's writer
+connection and resolves a Future with the result. Callers can show the
+queue depth while they wait.
+"""
+
+from __future__ import annotations
+
+import queue
+import threading
+from collections.abc import Callable
+from concurrent.futures import Future
+from pathlib import Path
+from typing import Any
+
+from nl2sql_assistant.db.undo_journal import restore_write
+from nl2sql_assistant.db.write_guard import validate_write_sql
+from nl2sql_assistant.db.write_runner import (
+    WriteParams,
+    WritePreview,
+    WriteReceipt,
+    execute_write,
+    preview_write,
+)
+
+
+class WriteQueue:
+    def __init__(self, db_path: Path) -> None:
+        self.db_path = Path(db_path).resolve()
+        self._jobs: queue.Queue[tuple[Future[Any], Callable[[], Any]] | None] = queue.Queue()
+        self._lock = threading.Lock()
+        self._pending = 0
+        self.processed = 0
+        self.failed = 0
+        self._closed = False
+        self._thread = threading.Thread(
+            target=self._run, name=f"nl2sql-writer-{self.db_path.name}", daemon=True
+        )
+        self._thread.start()
+
+    @property
+    def depth(self) -> int:
+        """Jobs waiting plus the one being executed."""
+        with self._lock:
+            return self._pending
+
+    def _submit(self, fn: Callable[[], Any]) -> Future[Any]:
+        if self._closed:
+            raise RuntimeError("Write queue is closed.")
+        future: Future[Any] = Future()
+        with self._lock:
+            self._pending += 1
+        self._jobs.put((future, fn))
+        return future
+
+    def submit(self, sql: str, params: WriteParams | None, **options: Any) -> Future[WriteReceipt]:
+        """
+        Queue a write; `options` are passed to execute_write (journal, chunk_size, atomic).
+        The SQL is validated here so bad statements fail before they wait in line.
+        """
+        validate_write_sql(sql)
+        return self._submit(lambda: execute_write(self.db_path, sql, params, **options))
+
+    def submit_preview(
+        self, sql: str, params: WriteParams | None, max_rows: int = 20
+    ) -> Future[WritePreview]:
+        validate_write_sql(sql)
+        return self._submit(lambda: preview_write(self.db_path, sql, params, max_rows))
+
+    def submit_restore(self, journal_id: int) -> Future[int]:
+        return self._submit(lambda: restore_write(self.db_path, journal_id))
+
+    def _run(self) -> None:
+        while True:
+            job = self._jobs.get()
+            if job is None:
+                break
+            future, fn = job
+            # Skip jobs whose caller cancelled them while they were queued.
+            if not future.set_running_or_notify_cancel():
+                self._finish(None)
+                continue
+            # Counters are updated before the future resolves, so a caller that
+            # wakes up on the result already sees them.
+            try:
+                result = fn()
+            except BaseException as e:
+                self._finish(ok=False)
+                future.set_exception(e)
+            else:
+                self._finish(ok=True)
+                future.set_result(result)
+
+    def _finish(self, ok: bool | None) -> None:
+        with self._lock:
+            self._pending -= 1
+            if ok is True:
+                self.processed += 1
+            elif ok is False:
+                self.failed += 1
+
+    def close(self, timeout: float | None = None) -> None:
+        """Finish queued jobs, then stop the writer thread."""
+        self._closed = True
+        self._jobs.put(None)
+        self._thread.join(timeout)
+
+
+_QUEUES: dict[Path, WriteQueue] = {}
+_QUEUES_LOCK = threading.Lock()
+
+
+def get_write_queue(db_path: Path) -> WriteQueue:
+    """Return the process-wide WriteQueue for db_path (started on first use)."""
+    key = Path(db_path).resolve()
+    with _QUEUES_LOCK:
+        write_queue = _QUEUES.get(key)
+        if write_queue is None:
+            write_queue = _QUEUES[key] = WriteQueue(key)
+        return write_queue
+
+
+def close_write_queues() -> None:
+    with _QUEUES_LOCK:
+        for write_queue in _QUEUES.values():
+            write_queue.close()
+        _QUEUES.clear()
@@ -1,40 +1,295 @@
 from __future__ import annotations
 
-import shutil
 import sqlite3
+from collections.abc import Mapping, Sequence
+from dataclasses import dataclass, field
 from datetime import datetime
 from pathlib import Path
 from typing import Any
 
+from nl2sql_assistant.db.connection import get_connection_manager, transaction
+from nl2sql_assistant.db.statement import parse_statement
+from nl2sql_assistant.db.undo_journal import (
+    check_rowid_unchanged,
+    journal_after,
+    journal_before,
+    journal_execute,
+    target_rows_sql,
+    target_table,
+    write_target,
+)
+from nl2sql_assistant.db.value_index import mark_values_stale
 from nl2sql_assistant.db.write_guard import validate_write_sql
 
+# Parameter sets per executemany call in a batched write.
+WRITE_CHUNK_SIZE = 500
+
+WriteParams = Mapping[str, Any] | Sequence[Mapping[str, Any]]
+
+
+@dataclass(frozen=True)
+class WriteReceipt:
+    """
+    - rowcount: rows changed by the write
+    - journal_ids: undo journal entries (restore newest first), empty if not journaled
+    - batch_rowcounts: rows changed per executemany chunk (batched writes only)
+    """
+
+    rowcount: int
+    journal_ids: tuple[int, ...] = ()
+    batch_rowcounts: tuple[int, ...] = ()
+
+    @property
+    def journal_id(self) -> int | None:
+        """The journal entry when the write was journaled as one entry, else None."""
+        return self.journal_ids[0] if len(self.journal_ids) == 1 else None
+
+
+class PartialWriteError(Exception):
+    """
+    A non-atomic batched write failed after some of its chunks committed.
+    `receipt` describes the committed chunks (their journal_ids can be
+    restored); the original error is the exception's __cause__.
+    """
+
+    def __init__(self, message: str, receipt: WriteReceipt) -> None:
+        super().__init__(message)
+        self.receipt = receipt
+
+
+@dataclass(frozen=True)
+class RowChange:
+    """
+    Before/after image of one row. `before` is None for an inserted row,
+    `after` is None for a deleted one.
+    """
+
+    row_id: int
+    before: dict[str, Any] | None
+    after: dict[str, Any] | None
+
+    @property
+    def changed(self) -> dict[str, tuple[Any, Any]]:
+        """Columns whose value differs: name -> (before, after)."""
+        before, after = self.before or {}, self.after or {}
+        return {
+            k: (before.get(k), after.get(k))
+            for k in dict.fromkeys([*before, *after])
+            if before.get(k) != after.get(k)
+        }
+
+
+@dataclass(frozen=True)
+class WritePreview:
+    """
+    Effect of a write that was run and rolled back.
+
+    - rowcount: exact number of rows the write changes
+    - changes: at most `max_rows` row diffs (truncated=True if there are more)
+    """
+
+    sql: str
+    op: str
+    table: str
+    rowcount: int
+    changes: list[RowChange] = field(default_factory=list)
+    truncated: bool = False
+
 
 def backup_db(db_path: Path) -> Path:
     """
-    Creates a timestamped backup before executing writes.
-    This is a simple and powerful safety feature for demos and real usage.
+    Creates a timestamped full copy of the database.
+
+    Writes are made undoable by the row-level journal (see undo_journal.py);
+    use this only for an explicit snapshot, since it copies the whole file.
     """
     ts = datetime.now().strftime("%Y%m%d_%H%M%S")
     backup_path = db_path.with_name(f"{db_path.stem}_backup_{ts}{db_path.suffix}")
-    shutil.copy2(db_path, backup_path)
+    # SQLite's online backup includes changes still in the WAL, unlike a file copy.
+    with get_connection_manager(db_path).writer() as conn, sqlite3.connect(backup_path) as dest:
+        conn.backup(dest)
+    dest.close()
     return backup_path
 
 
-def execute_write(db_path: Path, sql: str, params: dict[str, Any]) -> int:
+def _param_sets(params: WriteParams | None) -> list[dict[str, Any]]:
+    if params is None or isinstance(params, Mapping):
+        return [dict(params or {})]
+    sets = list(params)
+    if not sets:
+        raise ValueError("No parameter sets to execute.")
+    if not all(isinstance(p, Mapping) for p in sets):
+        raise ValueError("Each parameter set must be a dict of named parameters.")
+    return [dict(p) for p in sets]
+
+
+def execute_write(
+    db_path: Path,
+    sql: str,
+    params: WriteParams | None,
+    *,
+    journal: bool = True,
+    chunk_size: int = WRITE_CHUNK_SIZE,
+    atomic: bool = True,
+) -> WriteReceipt:
     """
     Executes a single write statement inside a transaction.
     Rolls back automatically on errors.
+
+    `params` is one dict of named parameters, or a list of them for a batched
+    write: the statement is then applied in chunks of `chunk_size` sets (with
+    executemany when not journaled). With atomic=True (default) all chunks share one
+    transaction; with atomic=False each chunk commits on its own, keeping
+    transactions short for very large batches. If a later chunk then fails,
+    PartialWriteError carries the receipt of the chunks already committed.
+
+    With journal=True the rows the statement touches are recorded in the undo
+    journal within the same transaction (ValueError if the statement cannot be
+    journaled; pass journal=False to run it anyway).
+    """
+    validate_write_sql(sql)
+    stmt = parse_statement(sql.strip())
+    sql_clean = sql.strip().rstrip(";")
+
+    if params is None or isinstance(params, Mapping):
+        with get_connection_manager(db_path).writer() as conn, transaction(conn):
+            if journal:
+                journal_id = journal_before(conn, stmt)
+                rowcount = journal_execute(conn, journal_id, stmt, sql_clean, params)
+                journal_after(conn, journal_id)
+                receipt = WriteReceipt(rowcount=rowcount, journal_ids=(journal_id,))
+            else:
+                receipt = WriteReceipt(rowcount=conn.execute(sql_clean, params or {}).rowcount)
+        mark_values_stale(db_path, write_target(stmt).name)
+        return receipt
+
+    if chunk_size < 1:
+        raise ValueError("chunk_size must be at least 1.")
+    sets = _param_sets(params)
+    chunks = [sets[i : i + chunk_size] for i in range(0, len(sets), chunk_size)]
+    groups = [chunks] if atomic else [[chunk] for chunk in chunks]
+
+    counts: list[int] = []
+    journal_ids: list[int] = []
+    with get_connection_manager(db_path).writer() as conn:
+        for group in groups:
+            committed = len(counts)
+            try:
+                with transaction(conn):
+                    journal_id = journal_before(conn, stmt) if journal else None
+                    for chunk in group:
+                        if journal_id is None:
+                            counts.append(conn.executemany(sql_clean, chunk).rowcount)
+                        else:
+                            # Set by set, so each set's rows are journaled right before it runs.
+                            counts.append(
+                                sum(
+                                    journal_execute(conn, journal_id, stmt, sql_clean, p)
+                                    for p in chunk
+                                )
+                            )
+                    if journal_id is not None:
+                        journal_after(conn, journal_id)
+                        journal_ids.append(journal_id)
+            except Exception as e:
+                if atomic or not committed:
+                    raise
+                del counts[committed:]  # the failed chunk was rolled back
+                mark_values_stale(db_path, write_target(stmt).name)
+                receipt = WriteReceipt(
+                    rowcount=sum(counts),
+                    journal_ids=tuple(journal_ids),
+                    batch_rowcounts=tuple(counts),
+                )
+                raise PartialWriteError(
+                    f"Chunk {committed + 1} of {len(chunks)} failed after {committed} "
+                    f"committed ({receipt.rowcount} rows): {e}",
+                    receipt,
+                ) from e
+
+    mark_values_stale(db_path, write_target(stmt).name)
+    return WriteReceipt(
+        rowcount=sum(counts), journal_ids=tuple(journal_ids), batch_rowcounts=tuple(counts)
+    )
+
+
+_PREVIEW_SAVEPOINT = "nl2sql_preview"
+
+
+def preview_write(
+    db_path: Path, sql: str, params: WriteParams | None, max_rows: int = 20
+) -> WritePreview:
+    """
+    Run a write inside a SAVEPOINT, collect before/after images of (at most
+    `max_rows` of) the rows it touches plus the exact rowcount, then roll back.
+    A list of parameter sets is previewed as the whole batch.
+
+    Nothing is committed; the cost is the write itself plus a bounded read.
+    Confirming should replay the same validated sql/params with execute_write.
     """
     validate_write_sql(sql)
+    stmt = parse_statement(sql.strip())
     sql_clean = sql.strip().rstrip(";")
+    sets = _param_sets(params)
 
-    with sqlite3.connect(db_path) as conn:
-        conn.execute("PRAGMA foreign_keys = ON;")
+    with get_connection_manager(db_path).writer() as conn:
+        table = target_table(conn, stmt)
+        # After images are looked up by the before rowids, which must not change.
+        check_rowid_unchanged(conn, stmt, table.name)
+        quoted = '"' + table.name.replace('"', '""') + '"'
+        conn.execute(f"SAVEPOINT {_PREVIEW_SAVEPOINT};")
         try:
-            conn.execute("BEGIN;")
-            cur = conn.execute(sql_clean, params)
-            conn.commit()
-            return cur.rowcount
-        except Exception:
-            conn.rollback()
-            raise
+            before: dict[int, dict[str, Any]] = {}
+            if stmt.kind == "insert":
+                max_rowid = conn.execute(f"SELECT MAX(rowid) FROM {quoted};").fetchone()[0]
+            else:
+                capture = f"{target_rows_sql(stmt, table)} LIMIT {int(max_rows)}"
+                for param_set in sets:
+                    if len(before) >= max_rows:
+                        break
+                    images = _row_images(conn.execute(capture, param_set))
+                    before = {**images, **before}
+                before = dict(list(before.items())[:max_rows])
+
+            rowcount = conn.executemany(sql_clean, sets).rowcount
+
+            if stmt.kind == "insert":
+                cur = conn.execute(
+                    f"SELECT rowid, * FROM {quoted} WHERE ? IS NULL OR rowid > ? "
+                    f"ORDER BY rowid LIMIT {int(max_rows)};",
+                    (max_rowid, max_rowid),
+                )
+                after = _row_images(cur)
+            elif stmt.kind == "update" and before:
+                marks = ", ".join("?" * len(before))
+                cur = conn.execute(
+                    f"SELECT rowid, * FROM {quoted} WHERE rowid IN ({marks});", list(before)
+                )
+                after = _row_images(cur)
+            else:
+                after = {}
+        finally:
+            # SQLite may already have rolled back (OR ROLLBACK, SQLITE_FULL), taking
+            # the savepoint with it; keep the original error.
+            if conn.in_transaction:
+                conn.execute(f"ROLLBACK TO {_PREVIEW_SAVEPOINT};")
+                conn.execute(f"RELEASE {_PREVIEW_SAVEPOINT};")
+
+    changes = [
+        RowChange(row_id=rid, before=before.get(rid), after=after.get(rid))
+        for rid in dict.fromkeys([*before, *after])
+    ]
+    return WritePreview(
+        sql=sql_clean,
+        op=stmt.kind,
+        table=table.name,
+        rowcount=rowcount,
+        changes=changes,
+        truncated=rowcount > len(changes),
+    )
+
+
+def _row_images(cur: sqlite3.Cursor) -> dict[int, dict[str, Any]]:
+    """rowid -> {column: value} for a `SELECT rowid, * ...` cursor."""
+    names = [d[0] for d in cur.description][1:]
+    return {row[0]: dict(zip(names, row[1:], strict=True)) for row in cur.fetchall()}
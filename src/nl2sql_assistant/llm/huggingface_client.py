@@ -1,7 +1,138 @@
+import asyncio
 import os
+import threading
+import weakref
+from collections.abc import Iterator
+from dataclasses import dataclass
+from functools import lru_cache
 from typing import Any
 
+from langchain_core.callbacks import CallbackManagerForLLMRun
 from langchain_core.language_models.llms import LLM
+from langchain_core.outputs import GenerationChunk
+
+DEFAULT_MODEL_ID = "defog/sqlcoder-7b-2"
+
+
+@dataclass(frozen=True)
+class HFClientSettings:
+    """
+    HTTP settings shared by every HuggingFace inference call.
+
+    - timeout: seconds before a generation request is abandoned
+    - max_connections: upper bound on open connections in the pool
+    - max_keepalive_connections: idle connections kept warm for reuse
+    - keepalive_expiry: seconds an idle connection stays in the pool
+    """
+
+    timeout: float = 60.0
+    max_connections: int = 20
+    max_keepalive_connections: int = 10
+    keepalive_expiry: float = 30.0
+
+
+_HTTP_SETTINGS = HFClientSettings()
+_HTTP_LOCK = threading.Lock()
+_HTTP_CONFIGURED = False
+
+# AsyncInferenceClient holds an httpx.AsyncClient bound to the event loop that
+# first used it, so async clients are cached per loop as well as per model/token.
+_ASYNC_CLIENTS: weakref.WeakKeyDictionary[asyncio.AbstractEventLoop, dict[tuple[str, str], Any]] = (
+    weakref.WeakKeyDictionary()
+)
+
+
+def _install_http_pool(s: HFClientSettings) -> None:
+    global _HTTP_SETTINGS, _HTTP_CONFIGURED
+    import httpx
+    from huggingface_hub import set_async_client_factory, set_client_factory
+    from huggingface_hub.utils._http import (
+        async_hf_request_event_hook,
+        async_hf_response_event_hook,
+        hf_request_event_hook,
+    )
+
+    limits = httpx.Limits(
+        max_connections=s.max_connections,
+        max_keepalive_connections=s.max_keepalive_connections,
+        keepalive_expiry=s.keepalive_expiry,
+    )
+
+    def _factory() -> httpx.Client:
+        return httpx.Client(
+            event_hooks={"request": [hf_request_event_hook]},
+            follow_redirects=True,
+            timeout=s.timeout,
+            limits=limits,
+        )
+
+    def _async_factory() -> httpx.AsyncClient:
+        return httpx.AsyncClient(
+            event_hooks={
+                "request": [async_hf_request_event_hook],
+                "response": [async_hf_response_event_hook],
+            },
+            follow_redirects=True,
+            timeout=s.timeout,
+            limits=limits,
+        )
+
+    set_client_factory(_factory)
+    set_async_client_factory(_async_factory)
+    _HTTP_SETTINGS = s
+    _HTTP_CONFIGURED = True
+    get_inference_client.cache_clear()
+    _ASYNC_CLIENTS.clear()
+
+
+def configure_http_pool(settings: HFClientSettings | None = None) -> None:
+    """
+    Install a keep-alive connection pool for huggingface_hub.
+
+    huggingface_hub shares one httpx.Client between all InferenceClients, so
+    configuring its factory once gives every chain the same warm connections.
+    Calling this again replaces the pool (and drops cached clients).
+    """
+    with _HTTP_LOCK:
+        _install_http_pool(settings or HFClientSettings())
+
+
+def _ensure_http_pool() -> None:
+    with _HTTP_LOCK:
+        if not _HTTP_CONFIGURED:
+            _install_http_pool(_HTTP_SETTINGS)
+
+
+@lru_cache(maxsize=32)
+def get_inference_client(model_id: str, token: str) -> Any:
+    """
+    Return the long-lived InferenceClient for (model_id, token).
+
+    Clients are cheap wrappers around the shared connection pool, so caching
+    them means repeated generate/risk/explain calls skip client setup entirely.
+    """
+    from huggingface_hub import InferenceClient
+
+    return InferenceClient(model=model_id, token=token, timeout=_HTTP_SETTINGS.timeout)
+
+
+def get_async_inference_client(model_id: str, token: str) -> Any:
+    """
+    Return the AsyncInferenceClient for (model_id, token) on the running event loop.
+
+    Reusing one client per loop keeps its connection pool warm, so hundreds of
+    concurrent requests share a handful of sockets instead of one thread each.
+    """
+    from huggingface_hub import AsyncInferenceClient
+
+    loop = asyncio.get_running_loop()
+    clients = _ASYNC_CLIENTS.setdefault(loop, {})
+    key = (model_id, token)
+    if key not in clients:
+        clients[key] = AsyncInferenceClient(
+            model=model_id, token=token, timeout=_HTTP_SETTINGS.timeout
+        )
+    return clients[key]
 
 
 def _get_api_token() -> str:
@@ -29,7 +160,7 @@ class HuggingFaceInferenceLLM(LLM):
     langchain-huggingface wrappers, which break with huggingface_hub >= 0.24.
     """
 
-    model_id: str = "defog/sqlcoder-7b-2"
+    model_id: str = DEFAULT_MODEL_ID
     max_new_tokens: int = 500
     temperature: float = 0.01
     api_token: str = ""
@@ -39,10 +170,59 @@ class HuggingFaceInferenceLLM(LLM):
         return "huggingface_inference"
 
     def _call(self, prompt: str, stop: list[str] | None = None, **kwargs: Any) -> str:
+        _ensure_http_pool()
+        client = get_inference_client(self.model_id, self.api_token)
+        result = client.text_generation(
+            prompt,
+            max_new_tokens=self.max_new_tokens,
+            temperature=self.temperature,
+            do_sample=False,
+            stop_sequences=stop or [],
+        )
+        return result
+
+    def _stream(
+        self,
+        prompt: str,
+        stop: list[str] | None = None,
+        run_manager: CallbackManagerForLLMRun | None = None,
+        **kwargs: Any,
+    ) -> Iterator[GenerationChunk]:
+        """
+        Yield tokens as the backend produces them.
+
+        Closing this generator closes the underlying HTTP stream, which is how
+        callers cancel a generation they no longer want to pay for.
+        """
         from huggingface_hub import InferenceClient
 
-        client = InferenceClient(model=self.model_id, token=self.api_token)
-        result = client.text_generation(
+        _ensure_http_pool()
+        # A streamed response stays open until its client is closed, so streams
+        # get their own lightweight client (the connection pool is still shared).
+        client = InferenceClient(
+            model=self.model_id, token=self.api_token, timeout=_HTTP_SETTINGS.timeout
+        )
+        tokens = client.text_generation(
+            prompt,
+            max_new_tokens=self.max_new_tokens,
+            temperature=self.temperature,
+            do_sample=False,
+            stop_sequences=stop or [],
+            stream=True,
+        )
+        try:
+            for token in tokens:
+                chunk = GenerationChunk(text=token)
+                if run_manager:
+                    run_manager.on_llm_new_token(token, chunk=chunk)
+                yield chunk
+        finally:
+            client.close()
+
+    async def _acall(self, prompt: str, stop: list[str] | None = None, **kwargs: Any) -> str:
+        _ensure_http_pool()
+        client = get_async_inference_client(self.model_id, self.api_token)
+        result = await client.text_generation(
             prompt,
             max_new_tokens=self.max_new_tokens,
             temperature=self.temperature,
@@ -53,7 +233,7 @@ class HuggingFaceInferenceLLM(LLM):
 
 
 def get_hf_model(
-    model_id: str = "defog/sqlcoder-7b-2",
+    model_id: str = DEFAULT_MODEL_ID,
     temperature: float = 0.01,
     max_new_tokens: int = 500,
 ) -> HuggingFaceInferenceLLM:
@@ -41,6 +41,8 @@ WHERE category = 'Electronics'
 ORDER BY price DESC;
 """.strip()
 
+# Bump whenever SQL_PROMPT or FEW_SHOT_EXAMPLES change: cached SQL is keyed on it.
+PROMPT_VERSION = "2"
 
 SQL_PROMPT = PromptTemplate(
     input_variables=["schema_text", "question"],
@@ -56,8 +58,10 @@ SQL_PROMPT = PromptTemplate(
         "{few_shot}\n\n"
         "Schema:\n"
         "{schema_text}\n\n"
+        "{value_hints}"
         "Question: {question}\n"
         "SQL:"
     ),
-    partial_variables={"few_shot": FEW_SHOT_EXAMPLES},
+    # value_hints: optional block of real column values (db.value_index.format_value_hints).
+    partial_variables={"few_shot": FEW_SHOT_EXAMPLES, "value_hints": ""},
 )
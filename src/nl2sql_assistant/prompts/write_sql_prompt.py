@@ -17,12 +17,14 @@ WRITE_SQL_PROMPT = PromptTemplate(
         "Return JSON:\n"
         "{{\n"
         '  "sql": "single write statement (INSERT/UPDATE/DELETE)",\n'
-        '  "params": {{ "param_name": "value" }},\n'
+        '  "params": {{ "param_name": "value" }} or [{{ "param_name": "value" }}, ...],\n'
         '  "safety_notes": ["string"]\n'
         "}}\n\n"
         "Rules:\n"
         "- For UPDATE/DELETE: include a WHERE clause.\n"
         "- Prefer parameterized SQL using named parameters (:param).\n"
+        "- To write many rows (e.g. insert a list of items), return ONE statement and\n"
+        "  make params a list with one object per row; it runs as a single batch.\n"
         "- If request is ambiguous (missing identifiers), return sql as empty string\n"
         "  and explain what's missing in safety_notes.\n"
     ),
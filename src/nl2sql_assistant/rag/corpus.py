@@ -1,19 +1,55 @@
 from __future__ import annotations
 
-from dataclasses import dataclass
+import re
+from collections.abc import Mapping
+from dataclasses import dataclass, field
 from pathlib import Path
 
+SCHEMA_SOURCE = "schema"
+
+_TABLE_HEADER_RE = re.compile(r"^TABLE\s+([^\s:]+)\s*:", re.MULTILINE)
+_MD_HEADING_RE = re.compile(r"^#{1,6}\s+(.+?)\s*#*\s*$", re.MULTILINE)
+_IDENTIFIER_RE = re.compile(r"[A-Za-z_][A-Za-z0-9_]*")
+# Rough LLM token estimate: identifiers/words and single punctuation marks.
+_APPROX_TOKEN_RE = re.compile(r"\w+|[^\w\s]")
+
+
+@dataclass(frozen=True)
+class ChunkMeta:
+    """
+    Where a chunk came from.
+
+    - source: name of the document (SCHEMA_SOURCE, "dictionary.md", ...)
+    - table: the table the chunk describes ("" if it is not about one table)
+    - token_count: approximate prompt tokens (see estimate_tokens)
+    """
+
+    source: str
+    table: str = ""
+    token_count: int = 0
+
 
 @dataclass(frozen=True)
 class RagCorpus:
     """
     Stores text chunks used for retrieval.
 
-    - We keep chunks relatively small and readable.
-    - Later you can add chunking by headings or sentences if corpus grows.
+    - The schema is chunked per table and markdown per heading, so a chunk
+      never splits a table and rarely mixes unrelated ones. Dictionary
+      sections about a schema table are folded into that table's chunk.
+    - meta[i] describes chunk i (empty if unknown).
     """
 
     chunks: list[str]
+    meta: list[ChunkMeta] = field(default_factory=list)
+
+    @property
+    def sources(self) -> list[str]:
+        return [m.source for m in self.meta]
+
+
+def estimate_tokens(text: str) -> int:
+    return len(_APPROX_TOKEN_RE.findall(text))
 
 
 def _chunk_text(text: str, max_chars: int = 900) -> list[str]:
@@ -42,17 +78,105 @@ def _chunk_text(text: str, max_chars: int = 900) -> list[str]:
     return [c for c in chunks if c]
 
 
+def load_sources(schema_text: str, dictionary_path: Path | None = None) -> dict[str, str]:
+    """
+    Source documents for the corpus, by name: the schema plus the optional
+    data dictionary. Empty documents are skipped.
+    """
+    sources = {SCHEMA_SOURCE: schema_text.strip()}
+    if dictionary_path and dictionary_path.exists():
+        sources[dictionary_path.name] = dictionary_path.read_text(encoding="utf-8").strip()
+    return {name: text for name, text in sources.items() if text}
+
+
+def _split_at(text: str, pattern: re.Pattern[str]) -> list[tuple[str, str]]:
+    """
+    Split text before every match of `pattern`; returns (group 1, section)
+    pairs. Text before the first match becomes a section with an empty name.
+    """
+    matches = list(pattern.finditer(text))
+    sections = [("", text[: matches[0].start()] if matches else text)]
+    for i, m in enumerate(matches):
+        end = matches[i + 1].start() if i + 1 < len(matches) else len(text)
+        sections.append((m.group(1), text[m.start() : end]))
+    return [(name, body.strip()) for name, body in sections if body.strip()]
+
+
+def _heading_table(heading: str) -> str:
+    """
+    The table a dictionary heading is about: "orders", "`orders`" and
+    "Table: orders" all name the orders table. Free-text headings name none.
+    """
+    heading = heading.replace("`", "").strip()
+    heading = re.sub(r"^table\s*:?\s*", "", heading, flags=re.IGNORECASE)
+    return heading if _IDENTIFIER_RE.fullmatch(heading) else ""
+
+
+def chunk_schema(text: str) -> list[tuple[str, str]]:
+    """One (table, chunk) per "TABLE x:" block of schema_as_text output."""
+    return _split_at(text, _TABLE_HEADER_RE)
+
+
+def chunk_markdown(text: str, max_chars: int = 900) -> list[tuple[str, str]]:
+    """
+    One (table, chunk) per markdown heading section. Sections longer than
+    max_chars are split further by lines, keeping their table.
+    """
+    return [
+        (_heading_table(heading), chunk)
+        for heading, section in _split_at(text, _MD_HEADING_RE)
+        for chunk in _chunk_text(section, max_chars)
+    ]
+
+
+def chunk_source(name: str, text: str) -> list[tuple[str, ChunkMeta]]:
+    """
+    Split one source document into (chunk, meta) pairs: the schema by table,
+    markdown by heading, anything else by size.
+    """
+    if name == SCHEMA_SOURCE:
+        parts = chunk_schema(text)
+    elif name.endswith(".md"):
+        parts = chunk_markdown(text)
+    else:
+        parts = [("", chunk) for chunk in _chunk_text(text)]
+    return [(chunk, ChunkMeta(name, table, estimate_tokens(chunk))) for table, chunk in parts]
+
+
+def chunk_sources(sources: Mapping[str, str]) -> list[tuple[str, ChunkMeta]]:
+    """
+    Chunk every source, giving one document per table: each dictionary
+    section whose heading names a schema table is appended to that table's
+    chunk (which keeps SCHEMA_SOURCE as its source). Other chunks follow in
+    source order.
+    """
+    parts = [pair for name, text in sources.items() for pair in chunk_source(name, text)]
+    tables = {m.table.lower() for _, m in parts if m.source == SCHEMA_SOURCE and m.table}
+    sections: dict[str, list[str]] = {}
+    for chunk, meta in parts:
+        if meta.source != SCHEMA_SOURCE and meta.table.lower() in tables:
+            sections.setdefault(meta.table.lower(), []).append(chunk)
+
+    merged: list[tuple[str, ChunkMeta]] = []
+    for chunk, meta in parts:
+        key = meta.table.lower()
+        if meta.source != SCHEMA_SOURCE and key in tables:
+            continue
+        if meta.source == SCHEMA_SOURCE and key in sections:
+            chunk = "\n\n".join([chunk, *sections[key]])
+            meta = ChunkMeta(SCHEMA_SOURCE, meta.table, estimate_tokens(chunk))
+        merged.append((chunk, meta))
+    return merged
+
+
+def build_corpus_from_sources(sources: Mapping[str, str]) -> RagCorpus:
+    pairs = chunk_sources(sources)
+    return RagCorpus(chunks=[c for c, _ in pairs], meta=[m for _, m in pairs])
+
+
 def build_corpus(schema_text: str, dictionary_path: Path | None = None) -> RagCorpus:
     """
     Corpus = schema + optional data dictionary.
     You can add more docs later (policies, examples, business definitions).
     """
-    chunks: list[str] = []
-    chunks.extend(_chunk_text(schema_text))
-
-    if dictionary_path and dictionary_path.exists():
-        dictionary_text = dictionary_path.read_text(encoding="utf-8").strip()
-        if dictionary_text:
-            chunks.extend(_chunk_text(dictionary_text))
-
-    return RagCorpus(chunks=chunks)
+    return build_corpus_from_sources(load_sources(schema_text, dictionary_path))
@@ -0,0 +1,181 @@
+"""
+index_store.py
+--------------
+Purpose:
+- Persist the BM25 index on disk so app replicas load it instead of rebuilding.
+
+Layout of the store directory:
+- manifest.json: format version, content hash of every source document,
+  the id of the current build and the index version (RagIndex.version)
+- <build>/: one immutable build
+    - vocab.json, chunks.json (text, ChunkMeta fields and hash of every chunk)
+    - offsets/doc_ids/tfs/idf/doc_norms.npy: the inverted index (RagIndex)
+    - doc_offsets/doc_terms/doc_tfs.npy: the same counts, chunk by chunk
+
+Arrays are opened with mmap_mode="r", so a load only maps files and reads
+the JSON. If every source hash matches the manifest, nothing is tokenized.
+Otherwise the sources are re-chunked (cheap: a table's chunk also holds its
+dictionary sections, so it depends on more than one source) and any chunk
+whose text hash is known reuses its stored term counts, so only new or
+edited chunks are re-tokenized.
+
+A new build is written to its own directory and the manifest is swapped in
+last (os.replace), so readers never see a half-written index.
+"""
+
+from __future__ import annotations
+
+import hashlib
+import json
+import os
+import shutil
+import uuid
+from collections import Counter
+from collections.abc import Mapping
+from pathlib import Path
+from typing import Any
+
+import numpy as np
+
+from nl2sql_assistant.rag.corpus import ChunkMeta, RagCorpus, chunk_sources
+from nl2sql_assistant.rag.retriever_bm25 import RagIndex, _tokenize, index_from_term_counts
+
+STORE_FORMAT = 4
+MANIFEST = "manifest.json"
+_INDEX_ARRAYS = ("offsets", "doc_ids", "tfs", "idf", "doc_norms")
+_DOC_ARRAYS = ("doc_offsets", "doc_terms", "doc_tfs")
+
+
+def content_hash(text: str) -> str:
+    return hashlib.sha256(text.encode("utf-8")).hexdigest()
+
+
+class _StoredBuild:
+    """A previous build, opened lazily for reuse of chunks and term counts."""
+
+    def __init__(self, build_dir: Path) -> None:
+        self.dir = build_dir
+        self.chunks: list[dict[str, Any]] = json.loads((build_dir / "chunks.json").read_text())
+        self._vocab: list[str] | None = None
+        self._doc: dict[str, np.ndarray] = {}
+
+    def by_hash(self) -> dict[str, int]:
+        return {c["hash"]: i for i, c in enumerate(self.chunks)}
+
+    def term_counts(self, i: int) -> Counter[str]:
+        if self._vocab is None:
+            self._vocab = json.loads((self.dir / "vocab.json").read_text())
+            self._doc = {n: np.load(self.dir / f"{n}.npy", mmap_mode="r") for n in _DOC_ARRAYS}
+        lo, hi = self._doc["doc_offsets"][i], self._doc["doc_offsets"][i + 1]
+        terms = self._doc["doc_terms"][lo:hi]
+        tfs = self._doc["doc_tfs"][lo:hi]
+        return Counter({self._vocab[t]: int(tf) for t, tf in zip(terms, tfs, strict=True)})
+
+
+def _read_manifest(store_dir: Path) -> dict | None:
+    try:
+        manifest = json.loads((store_dir / MANIFEST).read_text())
+    except (OSError, ValueError):
+        return None
+    if manifest.get("format") != STORE_FORMAT or not (store_dir / manifest["build"]).is_dir():
+        return None
+    return manifest
+
+
+def _chunk_meta(stored: dict[str, Any]) -> ChunkMeta:
+    return ChunkMeta(stored["source"], stored["table"], stored["tokens"])
+
+
+def _load_build(build_dir: Path, version: str) -> RagIndex:
+    chunks = json.loads((build_dir / "chunks.json").read_text())
+    vocab = json.loads((build_dir / "vocab.json").read_text())
+    arrays = {n: np.load(build_dir / f"{n}.npy", mmap_mode="r") for n in _INDEX_ARRAYS}
+    corpus = RagCorpus(chunks=[c["text"] for c in chunks], meta=[_chunk_meta(c) for c in chunks])
+    return RagIndex(
+        corpus=corpus,
+        vocab={t: i for i, t in enumerate(vocab)},
+        version=version,
+        **arrays,
+    )
+
+
+def _write_build(
+    build_dir: Path,
+    index: RagIndex,
+    chunk_hashes: list[str],
+    term_counts: list[Counter[str]],
+) -> None:
+    build_dir.mkdir(parents=True)
+    vocab = sorted(index.vocab, key=index.vocab.__getitem__)
+    (build_dir / "vocab.json").write_text(json.dumps(vocab))
+    chunks = [
+        {"text": text, "source": m.source, "table": m.table, "tokens": m.token_count, "hash": h}
+        for text, m, h in zip(index.corpus.chunks, index.corpus.meta, chunk_hashes, strict=True)
+    ]
+    (build_dir / "chunks.json").write_text(json.dumps(chunks))
+    for name in _INDEX_ARRAYS:
+        np.save(build_dir / f"{name}.npy", np.asarray(getattr(index, name)))
+
+    sizes = np.array([len(c) for c in term_counts], dtype=np.int64)
+    doc_offsets = np.zeros(len(term_counts) + 1, dtype=np.int64)
+    np.cumsum(sizes, out=doc_offsets[1:])
+    doc_terms = np.fromiter(
+        (index.vocab[t] for c in term_counts for t in c), dtype=np.int32, count=int(sizes.sum())
+    )
+    doc_tfs = np.fromiter(
+        (tf for c in term_counts for tf in c.values()), dtype=np.int32, count=int(sizes.sum())
+    )
+    np.save(build_dir / "doc_offsets.npy", doc_offsets)
+    np.save(build_dir / "doc_terms.npy", doc_terms)
+    np.save(build_dir / "doc_tfs.npy", doc_tfs)
+
+
+def load_or_build_index(store_dir: Path, sources: Mapping[str, str]) -> RagIndex:
+    """
+    Return the index for `sources` (name -> document text), loading it from
+    `store_dir` when every source is unchanged and rebuilding incrementally
+    otherwise. The store is created on first use.
+    """
+    store_dir = Path(store_dir)
+    hashes = {name: content_hash(text) for name, text in sources.items()}
+    manifest = _read_manifest(store_dir)
+    if manifest is not None and manifest["sources"] == hashes:
+        return _load_build(store_dir / manifest["build"], manifest["version"])
+
+    previous = _StoredBuild(store_dir / manifest["build"]) if manifest else None
+    known = previous.by_hash() if previous else {}
+
+    chunks: list[str] = []
+    meta: list[ChunkMeta] = []
+    chunk_hashes: list[str] = []
+    term_counts: list[Counter[str]] = []
+    for chunk, chunk_meta in chunk_sources(sources):
+        h = content_hash(chunk)
+        if h in known:
+            counts = previous.term_counts(known[h])
+        else:
+            counts = Counter(_tokenize(chunk))
+        chunks.append(chunk)
+        meta.append(chunk_meta)
+        chunk_hashes.append(h)
+        term_counts.append(counts)
+
+    index = index_from_term_counts(RagCorpus(chunks=chunks, meta=meta), term_counts)
+
+    build = uuid.uuid4().hex
+    _write_build(store_dir / build, index, chunk_hashes, term_counts)
+    tmp = store_dir / f"{MANIFEST}.{build}.tmp"
+    tmp.write_text(
+        json.dumps(
+            {"format": STORE_FORMAT, "build": build, "version": index.version, "sources": hashes}
+        )
+    )
+    os.replace(tmp, store_dir / MANIFEST)
+
+    # Keep the build we replaced (replicas may still have it mapped); drop older ones.
+    keep = {build, manifest["build"] if manifest else ""}
+    for entry in store_dir.iterdir():
+        if entry.is_dir() and entry.name not in keep:
+            shutil.rmtree(entry, ignore_errors=True)
+
+    return index
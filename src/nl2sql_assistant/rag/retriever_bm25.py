@@ -1,14 +1,25 @@
 from __future__ import annotations
 
+import hashlib
 import re
+import threading
+from collections import Counter, OrderedDict
+from collections.abc import Mapping, Sequence
 from dataclasses import dataclass
 
-from rank_bm25 import BM25Okapi
+import numpy as np
 
 from nl2sql_assistant.rag.corpus import RagCorpus
 
 _TOKEN_RE = re.compile(r"[A-Za-z0-9_]+")
 
+# Standard BM25 parameters: term-frequency saturation and length normalisation.
+BM25_K1 = 1.5
+BM25_B = 0.75
+
+# Entries in the process-wide retrieval cache (see cached_retrieve).
+RETRIEVAL_CACHE_SIZE = 512
+
 
 def _tokenize(text: str) -> list[str]:
     # Tokenization kept simple and transparent for portfolio readability.
@@ -18,21 +29,111 @@ def _tokenize(text: str) -> list[str]:
 @dataclass
 class RagIndex:
     """
-    BM25 index over corpus chunks.
+    BM25 index over corpus chunks, stored as an inverted index.
+
+    Postings are kept in CSR form: the postings of term t are
+    doc_ids[offsets[t]:offsets[t + 1]] with matching tfs. IDF per term and
+    the length norm per document are precomputed, so a query only reads the
+    postings of its own terms and never scores documents that lack them.
 
     - No model downloads (CI-safe)
     - Still delivers strong “retrieve relevant context” behavior
     """
 
     corpus: RagCorpus
-    bm25: BM25Okapi
-    tokenized_chunks: list[list[str]]
+    vocab: dict[str, int]
+    offsets: np.ndarray  # int64, len(vocab) + 1
+    doc_ids: np.ndarray  # int32, one entry per (term, doc) posting
+    tfs: np.ndarray  # float32, term frequency of each posting
+    idf: np.ndarray  # float32, per term
+    doc_norms: np.ndarray  # float32, k1 * (1 - b + b * len / avg_len) per doc
+    version: str = ""  # changes whenever the indexed chunks change
 
 
 def build_index(corpus: RagCorpus) -> RagIndex:
-    tokenized = [_tokenize(c) for c in corpus.chunks]
-    bm25 = BM25Okapi(tokenized)
-    return RagIndex(corpus=corpus, bm25=bm25, tokenized_chunks=tokenized)
+    return index_from_term_counts(corpus, [Counter(_tokenize(c)) for c in corpus.chunks])
+
+
+def index_from_term_counts(corpus: RagCorpus, term_counts: Sequence[Mapping[str, int]]) -> RagIndex:
+    """
+    Build the index from per-chunk term counts (term_counts[i] belongs to
+    corpus.chunks[i]). Lets callers reuse counts instead of re-tokenizing.
+    """
+    vocab: dict[str, int] = {}
+    term_ids: list[int] = []
+    docs: list[int] = []
+    counts: list[int] = []
+    doc_len = np.zeros(len(corpus.chunks), dtype=np.float32)
+
+    for d, chunk_counts in enumerate(term_counts):
+        doc_len[d] = sum(chunk_counts.values())
+        for term, tf in chunk_counts.items():
+            term_ids.append(vocab.setdefault(term, len(vocab)))
+            docs.append(d)
+            counts.append(tf)
+
+    terms = np.asarray(term_ids, dtype=np.int64)
+    # Stable sort keeps each term's postings in ascending doc order.
+    order = np.argsort(terms, kind="stable")
+    offsets = np.zeros(len(vocab) + 1, dtype=np.int64)
+    np.cumsum(np.bincount(terms, minlength=len(vocab)), out=offsets[1:])
+
+    n_docs = len(corpus.chunks)
+    df = np.diff(offsets).astype(np.float64)
+    # Lucene-style IDF: always positive, even for terms in most documents.
+    idf = np.log1p((n_docs - df + 0.5) / (df + 0.5)).astype(np.float32)
+    avg_len = float(doc_len.mean()) if n_docs and doc_len.mean() > 0 else 1.0
+    doc_norms = (BM25_K1 * (1 - BM25_B + BM25_B * doc_len / avg_len)).astype(np.float32)
+
+    digest = hashlib.sha256()
+    for chunk in corpus.chunks:
+        digest.update(chunk.encode("utf-8"))
+        digest.update(b"\0")
+
+    return RagIndex(
+        corpus=corpus,
+        vocab=vocab,
+        offsets=offsets,
+        doc_ids=np.asarray(docs, dtype=np.int32)[order],
+        tfs=np.asarray(counts, dtype=np.float32)[order],
+        idf=idf,
+        doc_norms=doc_norms,
+        version=digest.hexdigest()[:16],
+    )
+
+
+def search(index: RagIndex, query: str, k: int = 3) -> list[tuple[int, float]]:
+    """
+    Top-k (chunk index, BM25 score) pairs, best first. Only chunks sharing
+    at least one term with the query are scored, so the result may be shorter
+    than k.
+    """
+    query_terms = Counter(t for t in _tokenize(query) if t in index.vocab)
+    if not query_terms or k <= 0:
+        return []
+
+    doc_parts, weight_parts = [], []
+    for term, q_count in query_terms.items():
+        t = index.vocab[term]
+        lo, hi = index.offsets[t], index.offsets[t + 1]
+        docs = index.doc_ids[lo:hi]
+        tf = index.tfs[lo:hi]
+        doc_parts.append(docs)
+        weight_parts.append(
+            q_count * index.idf[t] * tf * (BM25_K1 + 1) / (tf + index.doc_norms[docs])
+        )
+
+    docs = np.concatenate(doc_parts)
+    candidates, slot = np.unique(docs, return_inverse=True)
+    scores = np.bincount(slot, weights=np.concatenate(weight_parts))
+
+    if len(candidates) > k:
+        top = np.argpartition(-scores, k - 1)[:k]
+    else:
+        top = np.arange(len(candidates))
+    # Best score first; ties go to the earlier chunk.
+    top = top[np.lexsort((candidates[top], -scores[top]))]
+    return [(int(candidates[i]), float(scores[i])) for i in top]
 
 
 def retrieve(index: RagIndex, query: str, k: int = 3) -> str:
@@ -40,14 +141,43 @@ def retrieve(index: RagIndex, query: str, k: int = 3) -> str:
     Returns top-k retrieved chunks concatenated.
     The returned string is fed into the write-SQL prompt.
     """
-    q_tokens = _tokenize(query)
-    scores = index.bm25.get_scores(q_tokens)
-
-    ranked = sorted(range(len(scores)), key=lambda i: scores[i], reverse=True)[:k]
-    chunks = [index.corpus.chunks[i] for i in ranked if scores[i] > 0]
+    chunks = [index.corpus.chunks[i] for i, score in search(index, query, k) if score > 0]
 
     # If nothing matches, return full schema (safe fallback).
     if not chunks:
         return "\n\n---\n\n".join(index.corpus.chunks[: min(2, len(index.corpus.chunks))])
 
     return "\n\n---\n\n".join(chunks)
+
+
+RetrievalKey = tuple[tuple[str, int], ...]
+
+_RETRIEVAL_CACHE: OrderedDict[tuple[str, RetrievalKey, int], str] = OrderedDict()
+_RETRIEVAL_LOCK = threading.Lock()
+
+
+def retrieval_key(index: RagIndex, query: str) -> RetrievalKey:
+    """
+    Normalized form of a query for caching: the sorted multiset of its
+    tokens that exist in the index. Case, punctuation, word order and
+    unknown words do not change the BM25 result, so they do not change the key.
+    """
+    return tuple(sorted(Counter(t for t in _tokenize(query) if t in index.vocab).items()))
+
+
+def cached_retrieve(index: RagIndex, query: str, k: int = 3) -> str:
+    """
+    retrieve() behind an LRU keyed by (index version, retrieval_key, k).
+    """
+    key = (index.version, retrieval_key(index, query), k)
+    with _RETRIEVAL_LOCK:
+        if key in _RETRIEVAL_CACHE:
+            _RETRIEVAL_CACHE.move_to_end(key)
+            return _RETRIEVAL_CACHE[key]
+
+    context = retrieve(index, query, k)
+    with _RETRIEVAL_LOCK:
+        _RETRIEVAL_CACHE[key] = context
+        while len(_RETRIEVAL_CACHE) > RETRIEVAL_CACHE_SIZE:
+            _RETRIEVAL_CACHE.popitem(last=False)
+    return context
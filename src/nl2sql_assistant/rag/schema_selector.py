@@ -0,0 +1,157 @@
+"""
+schema_selector.py
+------------------
+Purpose:
+- Inject only the tables a question needs into the SQL and risk prompts.
+
+The full schema_as_text output grows with every table, and for large
+databases it overflows the model's context long before the question does.
+The selector ranks tables for a question with BM25 over one document per
+table (its TABLE block, the identifier parts of its name and columns, and
+any data dictionary sections about it), takes the best matches, adds their
+foreign-key neighbours so joins stay possible, and stops at a token budget.
+
+Schemas that already fit the budget are passed through unchanged.
+"""
+
+from __future__ import annotations
+
+import re
+from collections.abc import Iterable
+from dataclasses import dataclass
+
+from nl2sql_assistant.db.schema_model import SchemaModel
+from nl2sql_assistant.rag.corpus import RagCorpus, chunk_markdown, estimate_tokens
+from nl2sql_assistant.rag.retriever_bm25 import RagIndex, build_index, search
+
+# Best-matching tables taken before FK expansion.
+DEFAULT_SCHEMA_TOP_K = 5
+# Approximate prompt tokens (see estimate_tokens) allowed for the schema block.
+DEFAULT_SCHEMA_TOKEN_BUDGET = 1500
+
+_WORD_RE = re.compile(r"[A-Za-z0-9_]+")
+
+
+@dataclass(frozen=True)
+class SchemaSelection:
+    tables: list[str]  # selected tables, in schema order
+    schema_text: str
+    token_count: int
+    pruned: bool  # False when the full schema was used
+
+
+@dataclass(frozen=True)
+class SchemaSelector:
+    """
+    Per-table BM25 index plus the pieces needed to render a selection.
+    tables[i] is the table of index.corpus.chunks[i].
+    """
+
+    index: RagIndex
+    tables: list[str]
+    blocks: dict[str, str]  # table -> its TABLE block
+    tokens: dict[str, int]  # table -> estimate_tokens(block)
+    neighbours: dict[str, frozenset[str]]  # FK graph, undirected
+    full_text: str
+
+
+def _expand_terms(text: str) -> str:
+    """
+    Add the parts of snake_case identifiers and naive singulars, so
+    "customer names" can match customers.name and order_items matches "items".
+    """
+    extra: list[str] = []
+    for word in _WORD_RE.findall(text.lower()):
+        parts = [p for p in word.split("_") if p] if "_" in word else []
+        extra.extend(parts)
+        for term in (word, *parts):
+            if len(term) > 3 and term.endswith("s") and not term.endswith("ss"):
+                extra.append(term[:-1])
+    return f"{text}\n{' '.join(extra)}" if extra else text
+
+
+def build_schema_selector(schema: SchemaModel, dictionary_text: str = "") -> SchemaSelector:
+    """
+    Index one document per table of `schema`. Dictionary sections are
+    attached to the table their heading names.
+    """
+    blocks = {t.name: t.render_text() for t in schema.tables.values()}
+    notes: dict[str, list[str]] = {}
+    for table, section in chunk_markdown(dictionary_text) if dictionary_text else []:
+        known = schema.table(table) if table else None
+        if known is not None:
+            notes.setdefault(known.name, []).append(section)
+
+    tables = list(blocks)
+    docs = [_expand_terms("\n".join([blocks[t], *notes.get(t, [])])) for t in tables]
+    return SchemaSelector(
+        index=build_index(RagCorpus(chunks=docs)),
+        tables=tables,
+        blocks=blocks,
+        tokens={t: estimate_tokens(b) for t, b in blocks.items()},
+        neighbours=schema.neighbours,
+        full_text=schema.text,
+    )
+
+
+def rank_tables(selector: SchemaSelector, question: str) -> list[tuple[str, float]]:
+    """(table, BM25 score) for every table sharing a term with the question, best first."""
+    hits = search(selector.index, _expand_terms(question), k=len(selector.tables))
+    return [(selector.tables[i], score) for i, score in hits if score > 0]
+
+
+def select_schema(
+    selector: SchemaSelector,
+    question: str,
+    *,
+    top_k: int = DEFAULT_SCHEMA_TOP_K,
+    token_budget: int = DEFAULT_SCHEMA_TOKEN_BUDGET,
+    include: Iterable[str] = (),
+) -> SchemaSelection:
+    """
+    Pick the schema to inject for `question`.
+
+    Tables in `include` (e.g. the ones a generated query already uses) come
+    first, then the top_k ranked tables, then FK neighbours of all of those
+    ordered by their own score. Tables are added in that order while they fit
+    token_budget; the first one is always kept. If nothing matches, tables
+    are taken in schema order.
+    """
+    full_tokens = sum(selector.tokens.values())
+    if full_tokens <= token_budget:
+        return SchemaSelection(
+            tables=list(selector.tables),
+            schema_text=selector.full_text,
+            token_count=full_tokens,
+            pruned=False,
+        )
+
+    ranked = rank_tables(selector, question)
+    score = dict(ranked)
+    known = {t.lower(): t for t in selector.tables}
+    seeds = [known[t.lower()] for t in include if t.lower() in known]
+    seeds += [t for t, _ in ranked[:top_k]]
+    if not seeds:
+        seeds = list(selector.tables)
+
+    expansion = {n for t in seeds for n in selector.neighbours[t]}
+    expansion = sorted(expansion, key=lambda t: (-score.get(t, 0.0), t))
+
+    chosen: dict[str, None] = {}
+    used = 0
+    for table in [*seeds, *expansion]:
+        if table in chosen:
+            continue
+        cost = selector.tokens[table]
+        if chosen and used + cost > token_budget:
+            continue
+        chosen[table] = None
+        used += cost
+
+    tables = [t for t in selector.tables if t in chosen]
+    return SchemaSelection(
+        tables=tables,
+        schema_text="\n\n".join(selector.blocks[t] for t in tables),
+        token_count=used,
+        pruned=True,
+    )
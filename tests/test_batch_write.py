@@ -0,0 +1,92 @@
+import json
+import sqlite3
+from pathlib import Path
+
+import pytest
+
+from nl2sql_assistant.chains.write_sql_generator import _parse_write_json
+from nl2sql_assistant.db.bootstrap import ensure_sample_db
+from nl2sql_assistant.db.undo_journal import restore_write
+from nl2sql_assistant.db.write_runner import PartialWriteError, execute_write, preview_write
+
+INSERT_PRODUCT = "INSERT INTO products (name, category, price) VALUES (:name, :category, :price)"
+
+
+def _count(db_path: Path, sql: str) -> int:
+    with sqlite3.connect(db_path) as conn:
+        return conn.execute(sql).fetchone()[0]
+
+
+def _products(n: int):
+    return [{"name": f"Item {i}", "category": "Bulk", "price": i + 0.5} for i in range(n)]
+
+
+def test_batch_insert_runs_in_chunks_and_undoes_as_one(tmp_path: Path):
+    db_path = ensure_sample_db(tmp_path / "sample.db")
+
+    receipt = execute_write(db_path, INSERT_PRODUCT, _products(1200), chunk_size=500)
+
+    assert receipt.batch_rowcounts == (500, 500, 200)
+    assert receipt.rowcount == 1200
+    assert _count(db_path, "SELECT COUNT(*) FROM products WHERE category = 'Bulk'") == 1200
+    assert restore_write(db_path, receipt.journal_id) == 1200
+    assert _count(db_path, "SELECT COUNT(*) FROM products WHERE category = 'Bulk'") == 0
+
+
+def test_non_atomic_batch_journals_each_chunk(tmp_path: Path):
+    db_path = ensure_sample_db(tmp_path / "sample.db")
+
+    receipt = execute_write(db_path, INSERT_PRODUCT, _products(5), chunk_size=2, atomic=False)
+
+    assert len(receipt.journal_ids) == 3 and receipt.journal_id is None
+    assert sum(restore_write(db_path, j) for j in reversed(receipt.journal_ids)) == 5
+
+
+def test_batch_failure_rolls_back_every_chunk(tmp_path: Path):
+    db_path = ensure_sample_db(tmp_path / "sample.db")
+    rows = _products(4)
+    rows[3]["name"] = None  # violates NOT NULL in the second chunk
+
+    with pytest.raises(sqlite3.IntegrityError):
+        execute_write(db_path, INSERT_PRODUCT, rows, chunk_size=2)
+    assert _count(db_path, "SELECT COUNT(*) FROM products WHERE category = 'Bulk'") == 0
+
+
+def test_non_atomic_failure_keeps_committed_chunks_undoable(tmp_path: Path):
+    db_path = ensure_sample_db(tmp_path / "sample.db")
+    rows = _products(4)
+    rows[3]["name"] = None  # violates NOT NULL in the second chunk
+
+    with pytest.raises(PartialWriteError) as e:
+        execute_write(db_path, INSERT_PRODUCT, rows, chunk_size=2, atomic=False)
+    receipt = e.value.receipt
+    assert isinstance(e.value.__cause__, sqlite3.IntegrityError)
+    assert receipt.rowcount == 2 and receipt.batch_rowcounts == (2,)
+    assert len(receipt.journal_ids) == 1
+    assert _count(db_path, "SELECT COUNT(*) FROM products WHERE category = 'Bulk'") == 2
+
+    assert restore_write(db_path, receipt.journal_ids[0]) == 2
+    assert _count(db_path, "SELECT COUNT(*) FROM products WHERE category = 'Bulk'") == 0
+
+
+def test_batch_update_preview_and_undo(tmp_path: Path):
+    db_path = ensure_sample_db(tmp_path / "sample.db")
+    sql = "UPDATE orders SET status = :s WHERE order_id = :id"
+    params = [{"s": "shipped", "id": 1}, {"s": "shipped", "id": 2}, {"s": "x", "id": 1}]
+
+    preview = preview_write(db_path, sql, params)
+    assert preview.rowcount == 3
+    assert sorted(c.row_id for c in preview.changes) == [1, 2]
+
+    receipt = execute_write(db_path, sql, params)
+    assert restore_write(db_path, receipt.journal_id) == 2
+    assert _count(db_path, "SELECT COUNT(*) FROM orders WHERE status IN ('shipped', 'x')") == 0
+
+
+def test_parser_accepts_list_params():
+    raw = json.dumps({"sql": INSERT_PRODUCT, "params": _products(2), "safety_notes": []})
+    res = _parse_write_json(raw)
+    assert res.is_batch and len(res.params) == 2
+
+    bad = _parse_write_json(json.dumps({"sql": INSERT_PRODUCT, "params": [1, 2]}))
+    assert bad.sql == "" and bad.params == {}
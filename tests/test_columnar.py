@@ -0,0 +1,62 @@
+import sqlite3
+from pathlib import Path
+
+import pyarrow as pa
+
+from nl2sql_assistant.db.columnar import cursor_to_arrow
+from nl2sql_assistant.db.runner import fetch_page, run_query
+
+
+def _mixed_cursor(batch_rows):
+    conn = sqlite3.connect(":memory:")
+    conn.execute("CREATE TABLE t (a, b, c)")
+    conn.executemany("INSERT INTO t VALUES (?, ?, ?)", batch_rows)
+    return conn.execute("SELECT a, b, c FROM t")
+
+
+def test_cursor_to_arrow_promotes_types_across_batches():
+    cur = _mixed_cursor([(1, None, "x"), (2, None, "y"), (3.5, "s", 7), (None, 4, "z")])
+    table = cursor_to_arrow(cur, batch_size=2)
+
+    assert table.column_names == ["a", "b", "c"]
+    assert table.schema.field("a").type == pa.float64()
+    assert table.schema.field("b").type == pa.string()
+    assert table.column("c").to_pylist() == ["x", "y", "7", "z"]
+
+
+def test_cursor_to_arrow_respects_max_rows_and_keeps_duplicate_names():
+    conn = sqlite3.connect(":memory:")
+    cur = conn.execute(
+        "WITH RECURSIVE n(i) AS (SELECT 1 UNION ALL SELECT i + 1 FROM n WHERE i < 50) "
+        "SELECT i AS id, i * 2 AS id FROM n"
+    )
+    table = cursor_to_arrow(cur, batch_size=8, max_rows=20)
+
+    assert table.num_rows == 20
+    assert table.column_names == ["id", "id"]
+    assert table.schema.field(0).type == pa.int64()
+
+
+def test_empty_result_keeps_columns():
+    cur = sqlite3.connect(":memory:").execute("SELECT 1 AS a, 'x' AS b WHERE 0")
+    table = cursor_to_arrow(cur)
+    assert table.num_rows == 0
+    assert table.column_names == ["a", "b"]
+
+
+def test_runner_columnar_modes(tmp_path: Path):
+    db_path = tmp_path / "numbers.db"
+    with sqlite3.connect(db_path) as conn:
+        conn.execute("CREATE TABLE numbers (id INTEGER PRIMARY KEY, n REAL)")
+        conn.executemany("INSERT INTO numbers (n) VALUES (?)", [(i / 2,) for i in range(10)])
+
+    table = run_query(db_path, "SELECT n FROM numbers", 5, columnar=True)
+    assert table.column("n").to_pylist() == [0.0, 0.5, 1.0, 1.5, 2.0]
+
+    page = fetch_page(db_path, "SELECT * FROM numbers", 4, columnar=True)
+    assert page.keyset and page.rows == []
+    assert page.table.column_names == ["id", "n"]
+    assert page.num_rows == 4
+
+    second = fetch_page(db_path, "SELECT * FROM numbers", 4, page.next_token, columnar=True)
+    assert second.table.column("id").to_pylist() == [5, 6, 7, 8]
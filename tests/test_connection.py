@@ -0,0 +1,45 @@
+import sqlite3
+from pathlib import Path
+
+import pytest
+
+from nl2sql_assistant.db.bootstrap import ensure_sample_db
+from nl2sql_assistant.db.connection import (
+    ConnectionManager,
+    ConnectionSettings,
+    get_connection_manager,
+    transaction,
+)
+
+
+def test_manager_is_shared_per_database(tmp_path: Path):
+    db_path = ensure_sample_db(tmp_path / "sample.db")
+    assert get_connection_manager(db_path) is get_connection_manager(tmp_path / "." / "sample.db")
+
+
+def test_readers_are_pooled_and_read_only(tmp_path: Path):
+    db_path = ensure_sample_db(tmp_path / "sample.db")
+    manager = ConnectionManager(db_path, ConnectionSettings(pool_size=1))
+    with manager.reader() as first:
+        assert first.execute("SELECT COUNT(*) FROM customers;").fetchone()[0] == 4
+        with pytest.raises(sqlite3.OperationalError):
+            first.execute("DELETE FROM customers;")
+    with manager.reader() as second:
+        assert second is first
+    manager.close()
+
+
+def test_writer_uses_wal_and_rolls_back_on_error(tmp_path: Path):
+    db_path = ensure_sample_db(tmp_path / "sample.db")
+    manager = ConnectionManager(db_path)
+    with manager.writer() as conn:
+        assert conn.execute("PRAGMA journal_mode;").fetchone()[0] == "wal"
+        with pytest.raises(sqlite3.IntegrityError):
+            with transaction(conn):
+                conn.execute("UPDATE customers SET name = 'X' WHERE customer_id = 1;")
+                conn.execute("INSERT INTO customers(name) VALUES (NULL);")
+    with manager.reader() as conn:
+        assert (
+            conn.execute("SELECT name FROM customers WHERE customer_id = 1;").fetchone()[0] != "X"
+        )
+    manager.close()
@@ -0,0 +1,65 @@
+import csv
+import json
+import sqlite3
+from pathlib import Path
+
+import pyarrow.parquet as pq
+import pytest
+
+from nl2sql_assistant.db.export import export_query
+
+
+def _events_db(path: Path, n: int = 1234) -> Path:
+    with sqlite3.connect(path) as conn:
+        conn.execute("CREATE TABLE events (id INTEGER PRIMARY KEY, kind TEXT, score REAL)")
+        conn.executemany(
+            "INSERT INTO events (kind, score) VALUES (?, ?)",
+            [("click" if i % 3 else "view", i / 4) for i in range(n)],
+        )
+    return path
+
+
+def test_csv_export_is_not_capped_by_display_limit(tmp_path: Path):
+    db_path = _events_db(tmp_path / "events.db")
+    out = export_query(db_path, "SELECT id, kind FROM events", tmp_path / "out.csv", batch_size=100)
+
+    with out.path.open(newline="") as f:
+        rows = list(csv.reader(f))
+    assert out.rows == 1234
+    assert rows[0] == ["id", "kind"]
+    assert len(rows) == 1235
+
+
+def test_jsonl_export(tmp_path: Path):
+    db_path = _events_db(tmp_path / "events.db", n=5)
+    out = export_query(db_path, "SELECT kind, score FROM events", tmp_path / "out.jsonl", "jsonl")
+
+    lines = out.path.read_text().splitlines()
+    assert [json.loads(line) for line in lines][1] == {"kind": "click", "score": 0.25}
+
+
+def test_parquet_export_keeps_types(tmp_path: Path):
+    db_path = _events_db(tmp_path / "events.db")
+    out = export_query(
+        db_path, "SELECT * FROM events", tmp_path / "out.parquet", "parquet", batch_size=300
+    )
+
+    table = pq.read_table(out.path)
+    assert table.num_rows == 1234
+    assert str(table.schema.field("score").type) == "double"
+    assert table.column("id").to_pylist()[-1] == 1234
+
+
+def test_empty_result_keeps_header(tmp_path: Path):
+    db_path = _events_db(tmp_path / "events.db", n=3)
+    out = export_query(db_path, "SELECT id, kind FROM events WHERE 0", tmp_path / "out.csv")
+    assert out.rows == 0
+    assert out.path.read_text().strip() == "id,kind"
+
+
+def test_rejects_unknown_format_and_writes(tmp_path: Path):
+    db_path = _events_db(tmp_path / "events.db", n=3)
+    with pytest.raises(ValueError, match="Unsupported export format"):
+        export_query(db_path, "SELECT 1", tmp_path / "out.xml", "xml")
+    with pytest.raises(ValueError):
+        export_query(db_path, "DELETE FROM events", tmp_path / "out.csv")
@@ -0,0 +1,33 @@
+import asyncio
+
+from nl2sql_assistant.llm import huggingface_client as hf
+
+
+class _FakeAsyncClient:
+    def __init__(self):
+        self.prompts: list[str] = []
+
+    async def text_generation(self, prompt: str, **kwargs):
+        self.prompts.append(prompt)
+        return "SELECT 1;"
+
+
+def test_inference_client_is_reused_per_model_and_token():
+    a = hf.get_inference_client("defog/sqlcoder-7b-2", "hf_test")
+    b = hf.get_inference_client("defog/sqlcoder-7b-2", "hf_test")
+    c = hf.get_inference_client("defog/sqlcoder-7b-2", "hf_other")
+    assert a is b
+    assert a is not c
+
+
+def test_ainvoke_uses_native_async_call(monkeypatch):
+    fake = _FakeAsyncClient()
+    monkeypatch.setattr(hf, "get_async_inference_client", lambda model_id, token: fake)
+    llm = hf.HuggingFaceInferenceLLM(api_token="hf_test")
+
+    async def _run() -> list[str]:
+        return await asyncio.gather(*(llm.ainvoke(f"q{i}") for i in range(5)))
+
+    out = asyncio.run(_run())
+    assert out == ["SELECT 1;"] * 5
+    assert sorted(fake.prompts) == [f"q{i}" for i in range(5)]
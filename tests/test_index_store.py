@@ -0,0 +1,53 @@
+import json
+from pathlib import Path
+
+import numpy as np
+
+from nl2sql_assistant.rag import index_store
+from nl2sql_assistant.rag.index_store import MANIFEST, load_or_build_index
+from nl2sql_assistant.rag.retriever_bm25 import retrieve, search
+
+SCHEMA = "TABLE orders:\n  - order_id : INTEGER\n  - status : TEXT"
+DICTIONARY = "# Orders\nstatus is one of pending, shipped, completed.\n"
+
+
+def _count_tokenized(monkeypatch):
+    calls = []
+    real = index_store._tokenize
+
+    def counting(text):
+        calls.append(text)
+        return real(text)
+
+    monkeypatch.setattr(index_store, "_tokenize", counting)
+    return calls
+
+
+def test_second_load_maps_arrays_without_tokenizing(tmp_path: Path, monkeypatch):
+    sources = {"schema": SCHEMA, "dictionary.md": DICTIONARY}
+    built = load_or_build_index(tmp_path, sources)
+
+    calls = _count_tokenized(monkeypatch)
+    loaded = load_or_build_index(tmp_path, sources)
+
+    assert calls == []
+    assert isinstance(loaded.doc_ids, np.memmap)
+    assert loaded.corpus.chunks == built.corpus.chunks
+    assert loaded.corpus.meta == built.corpus.meta
+    assert search(loaded, "order status", 2) == search(built, "order status", 2)
+
+
+def test_changed_source_only_retokenizes_its_new_chunks(tmp_path: Path, monkeypatch):
+    load_or_build_index(tmp_path, {"schema": SCHEMA, "dictionary.md": DICTIONARY})
+    first_build = json.loads((tmp_path / MANIFEST).read_text())["build"]
+
+    calls = _count_tokenized(monkeypatch)
+    edited = DICTIONARY + "\nRefunds are recorded as negative amounts.\n"
+    index = load_or_build_index(tmp_path, {"schema": SCHEMA, "dictionary.md": edited})
+
+    # Only the orders document (schema block + its edited section) is new.
+    assert len(calls) == 1 and calls[0].startswith("TABLE orders:")
+    assert calls[0].endswith("negative amounts.")
+    assert "negative amounts" in retrieve(index, "refunds", k=1)
+    # The replaced build is kept for readers that still map it.
+    assert (tmp_path / first_build).is_dir()
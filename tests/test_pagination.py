@@ -0,0 +1,59 @@
+import sqlite3
+from pathlib import Path
+
+from nl2sql_assistant.db.runner import fetch_page, iter_query_batches
+
+
+def _numbers_db(path: Path, n: int = 25) -> Path:
+    with sqlite3.connect(path) as conn:
+        conn.execute("CREATE TABLE numbers (id INTEGER PRIMARY KEY, n INTEGER, parity TEXT)")
+        conn.executemany(
+            "INSERT INTO numbers (n, parity) VALUES (?, ?)",
+            [(i, "even" if i % 2 == 0 else "odd") for i in range(n)],
+        )
+    return path
+
+
+def _all_pages(db_path: Path, sql: str, page_size: int):
+    pages, token = [], None
+    while True:
+        page = fetch_page(db_path, sql, page_size, token)
+        pages.append(page)
+        if page.next_token is None:
+            return pages
+        token = page.next_token
+
+
+def test_single_table_scan_uses_keyset_pagination(tmp_path: Path):
+    db_path = _numbers_db(tmp_path / "numbers.db")
+    pages = _all_pages(db_path, "SELECT n FROM numbers WHERE parity = 'even' OR n = 3", 4)
+
+    assert all(p.keyset for p in pages)
+    assert pages[0].columns == ["n"]
+    values = [row[0] for p in pages for row in p.rows]
+    assert values == [0, 2, 3, 4, 6, 8, 10, 12, 14, 16, 18, 20, 22, 24]
+    assert [len(p.rows) for p in pages] == [4, 4, 4, 2]
+
+
+def test_ordered_query_falls_back_to_offset(tmp_path: Path):
+    db_path = _numbers_db(tmp_path / "numbers.db")
+    pages = _all_pages(db_path, "SELECT n FROM numbers ORDER BY n DESC LIMIT 10;", 4)
+
+    assert not any(p.keyset for p in pages)
+    assert [row[0] for p in pages for row in p.rows] == list(range(24, 14, -1))
+    assert pages[1].token.offset == 4
+
+
+def test_exact_multiple_has_no_empty_trailing_page(tmp_path: Path):
+    db_path = _numbers_db(tmp_path / "numbers.db", n=8)
+    pages = _all_pages(db_path, "SELECT * FROM numbers", 4)
+    assert [len(p.rows) for p in pages] == [4, 4]
+    assert pages[0].columns == ["id", "n", "parity"]
+
+
+def test_iter_query_batches_streams_whole_result(tmp_path: Path):
+    db_path = _numbers_db(tmp_path / "numbers.db")
+    batches = list(iter_query_batches(db_path, "SELECT n FROM numbers", batch_size=10))
+
+    assert [len(rows) for _, rows in batches] == [10, 10, 5]
+    assert batches[0][0] == ["n"]
@@ -0,0 +1,27 @@
+import threading
+from pathlib import Path
+
+import pytest
+
+from nl2sql_assistant.db.bootstrap import ensure_sample_db
+from nl2sql_assistant.db.runner import QueryBudget, QueryInterrupted, run_query
+
+
+def test_run_query_stops_at_work_budget(tmp_path: Path):
+    db_path = ensure_sample_db(tmp_path / "sample.db")
+    # Cross join a recursive CTE against itself: far more work than the budget allows.
+    sql = (
+        "WITH RECURSIVE n(i) AS (SELECT 1 UNION ALL SELECT i + 1 FROM n WHERE i < 100000) "
+        "SELECT COUNT(*) FROM n a, n b"
+    )
+    with pytest.raises(QueryInterrupted, match="work budget"):
+        run_query(db_path, sql, budget=QueryBudget(max_instructions=50_000, check_every=1000))
+
+
+def test_run_query_honours_cancel_event(tmp_path: Path):
+    db_path = ensure_sample_db(tmp_path / "sample.db")
+    cancelled = threading.Event()
+    cancelled.set()
+    sql = "WITH RECURSIVE n(i) AS (SELECT 1 UNION ALL SELECT i + 1 FROM n) SELECT MAX(i) FROM n"
+    with pytest.raises(QueryInterrupted, match="cancelled"):
+        run_query(db_path, sql, cancel_event=cancelled)
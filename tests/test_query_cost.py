@@ -0,0 +1,39 @@
+import sqlite3
+from pathlib import Path
+
+from nl2sql_assistant.db.bootstrap import ensure_sample_db
+from nl2sql_assistant.db.runner import estimate_query_cost
+
+
+def _big_db(tmp_path: Path) -> Path:
+    db_path = ensure_sample_db(tmp_path / "sample.db")
+    with sqlite3.connect(db_path) as conn:
+        conn.executemany(
+            "INSERT INTO order_items(order_id, product_id, quantity, unit_price) VALUES (1, 1, ?, 1.0);",
+            [(i,) for i in range(20_000)],
+        )
+    conn.close()
+    return db_path
+
+
+def test_primary_key_lookup_is_cheap(tmp_path: Path):
+    db_path = _big_db(tmp_path)
+    cost = estimate_query_cost(db_path, "SELECT * FROM order_items WHERE order_item_id = 5")
+    assert cost.estimated_cost < 100
+    assert cost.warnings == []
+
+
+def test_cartesian_scan_is_expensive_and_explained(tmp_path: Path):
+    db_path = _big_db(tmp_path)
+    sql = "SELECT COUNT(*) FROM order_items a, order_items b"
+    cost = estimate_query_cost(db_path, sql)
+    assert cost.exceeds(5_000_000)
+    assert any("Full scan of" in w for w in cost.warnings)
+    assert any("Nested-loop" in w for w in cost.warnings)
+
+
+def test_limit_caps_streaming_scans(tmp_path: Path):
+    db_path = _big_db(tmp_path)
+    limited = estimate_query_cost(db_path, "SELECT * FROM order_items", limit=10)
+    full = estimate_query_cost(db_path, "SELECT COUNT(*) FROM order_items", limit=10)
+    assert limited.estimated_cost < full.estimated_cost
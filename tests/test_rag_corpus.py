@@ -0,0 +1,61 @@
+from nl2sql_assistant.rag.corpus import (
+    SCHEMA_SOURCE,
+    build_corpus_from_sources,
+    chunk_markdown,
+    chunk_schema,
+)
+
+SCHEMA = """TABLE customers:
+  - customer_id : INTEGER (PK)
+  - email : TEXT
+
+TABLE orders:
+  - order_id : INTEGER (PK)
+  - status : TEXT"""
+
+DICTIONARY = """Business glossary for the shop.
+
+## `orders`
+status is one of pending, shipped, completed.
+
+## Table: customers
+country uses ISO names.
+
+## Refund policy
+Refunds are recorded as negative amounts.
+"""
+
+
+def test_schema_is_chunked_one_table_per_chunk():
+    chunks = chunk_schema(SCHEMA)
+    assert [table for table, _ in chunks] == ["customers", "orders"]
+    assert chunks[1][1] == "TABLE orders:\n  - order_id : INTEGER (PK)\n  - status : TEXT"
+
+
+def test_markdown_sections_are_tagged_with_their_table():
+    chunks = chunk_markdown(DICTIONARY)
+    assert [table for table, _ in chunks] == ["", "orders", "customers", ""]
+    assert chunks[1][1].startswith("## `orders`\nstatus is one of")
+
+
+def test_long_markdown_section_is_split_but_keeps_its_table():
+    body = "\n".join(f"- value_{i} means something specific" for i in range(60))
+    chunks = chunk_markdown(f"## orders\n{body}", max_chars=300)
+    assert len(chunks) > 1
+    assert all(table == "orders" and len(text) <= 300 for table, text in chunks)
+
+
+def test_corpus_has_one_document_per_table_with_its_dictionary_sections():
+    corpus = build_corpus_from_sources({SCHEMA_SOURCE: SCHEMA, "dictionary.md": DICTIONARY})
+    assert len(corpus.chunks) == len(corpus.meta) == 4
+    assert [(m.source, m.table) for m in corpus.meta] == [
+        (SCHEMA_SOURCE, "customers"),
+        (SCHEMA_SOURCE, "orders"),
+        ("dictionary.md", ""),
+        ("dictionary.md", ""),
+    ]
+    assert corpus.chunks[1].startswith("TABLE orders:")
+    assert corpus.chunks[1].endswith("## `orders`\nstatus is one of pending, shipped, completed.")
+    assert "ISO names" in corpus.chunks[0]
+    assert corpus.sources[3] == "dictionary.md"
+    assert all(m.token_count > 0 for m in corpus.meta)
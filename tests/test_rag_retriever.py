@@ -1,5 +1,12 @@
+from nl2sql_assistant.rag import retriever_bm25
 from nl2sql_assistant.rag.corpus import RagCorpus
-from nl2sql_assistant.rag.retriever_bm25 import build_index, retrieve
+from nl2sql_assistant.rag.retriever_bm25 import (
+    build_index,
+    cached_retrieve,
+    retrieval_key,
+    retrieve,
+    search,
+)
 
 
 def test_retrieve_returns_relevant_chunk():
@@ -12,3 +19,52 @@ def test_retrieve_returns_relevant_chunk():
     idx = build_index(corpus)
     ctx = retrieve(idx, "update order status", k=1)
     assert "orders" in ctx.lower()
+
+
+def test_search_only_scores_matching_chunks_and_ranks_by_bm25():
+    corpus = RagCorpus(
+        chunks=[
+            "customers email country",
+            "orders status status order_date",
+            "order_items quantity unit_price",
+            "products price category",
+        ]
+    )
+    idx = build_index(corpus)
+
+    hits = search(idx, "status of orders", k=10)
+    assert [doc for doc, _ in hits] == [1]
+    assert search(idx, "nothing matches here", k=3) == []
+
+    ranked = search(idx, "price status", k=2)
+    assert len(ranked) == 2
+    assert ranked[0][1] >= ranked[1][1]
+    assert {doc for doc, _ in ranked} <= {1, 2, 3}
+
+
+def test_retrieval_key_ignores_case_order_and_unknown_words():
+    idx = build_index(RagCorpus(chunks=["orders status", "customers email"]))
+    key = retrieval_key(idx, "Update orders STATUS!")
+    assert key == retrieval_key(idx, "status, orders please")
+    assert key == (("orders", 1), ("status", 1))
+    assert key != retrieval_key(idx, "orders status status")
+
+
+def test_cached_retrieve_reuses_results_until_the_index_changes(monkeypatch):
+    calls = []
+
+    def counting_retrieve(index, query, k=3):
+        calls.append(query)
+        return retrieve(index, query, k)
+
+    monkeypatch.setattr(retriever_bm25, "retrieve", counting_retrieve)
+    idx = build_index(RagCorpus(chunks=["orders status", "customers email"]))
+
+    first = cached_retrieve(idx, "orders status", k=1)
+    assert cached_retrieve(idx, "Status of ORDERS?", k=1) == first
+    assert len(calls) == 1
+
+    changed = build_index(RagCorpus(chunks=["orders status shipped", "customers email"]))
+    assert changed.version != idx.version
+    assert "shipped" in cached_retrieve(changed, "orders status", k=1)
+    assert len(calls) == 2
@@ -0,0 +1,88 @@
+from nl2sql_assistant.chains import risk_classifier
+from nl2sql_assistant.chains.risk_classifier import assess_risk_rules, parse_risk_json
+
+SCHEMA = """
+TABLE customers:
+  - customer_id : INTEGER (PK)
+  - name : TEXT (NOT NULL)
+  - email : TEXT
+
+TABLE orders:
+  - order_id : INTEGER (PK)
+  - customer_id : INTEGER (NOT NULL)
+  - status : TEXT (NOT NULL)
+""".strip()
+
+
+def _types(result) -> set[str]:
+    return {f.type for f in result.flags}
+
+
+def test_filtered_single_table_select_is_low():
+    r = assess_risk_rules("SELECT order_id FROM orders WHERE status = 'completed';", SCHEMA)
+    assert r is not None
+    assert r.risk_level == "low"
+    assert r.flags == []
+    assert parse_risk_json(r.raw).risk_level == "low"
+
+
+def test_cartesian_join_is_high():
+    r = assess_risk_rules("SELECT c.name, o.status FROM customers c, orders o", SCHEMA)
+    assert r is not None
+    assert r.risk_level == "high"
+    assert "cartesian_join" in _types(r)
+
+
+def test_unknown_table_is_high():
+    r = assess_risk_rules("SELECT * FROM invoices WHERE id = 1", SCHEMA)
+    assert r is not None
+    assert r.risk_level == "high"
+    assert "unknown_table" in _types(r)
+
+
+def test_sensitive_columns_and_missing_where_are_medium():
+    r = assess_risk_rules("SELECT name, email FROM customers", SCHEMA, "customers since 2024")
+    assert r is not None
+    assert r.risk_level == "medium"
+    assert {"sensitive_column", "missing_where", "unbounded_scan"} <= _types(r)
+
+
+def test_deep_subqueries_escalate_to_llm():
+    sql = (
+        "SELECT name FROM customers WHERE customer_id IN ("
+        "SELECT customer_id FROM orders WHERE order_id IN ("
+        "SELECT order_id FROM orders WHERE customer_id IN ("
+        "SELECT customer_id FROM customers)))"
+    )
+    assert assess_risk_rules(sql, SCHEMA) is None
+
+
+def test_classify_risk_skips_llm_when_rules_decide(monkeypatch):
+    def _no_llm():
+        raise AssertionError("LLM should not be called for clear-cut SQL")
+
+    monkeypatch.setattr(risk_classifier, "build_risk_chain", _no_llm)
+    r = risk_classifier.classify_risk(
+        SCHEMA, "status of order 3", "SELECT status FROM orders WHERE order_id = 3"
+    )
+    assert r.risk_level == "low"
+    # Keyword callers keep working.
+    r = risk_classifier.classify_risk(
+        schema_text=SCHEMA,
+        question="status of order 3",
+        sql="SELECT status FROM orders WHERE order_id = 3",
+    )
+    assert r.risk_level == "low"
+
+
+def test_where_clause_join_is_not_cartesian():
+    r = assess_risk_rules(
+        "SELECT c.name FROM customers c, orders o WHERE c.customer_id = o.customer_id", SCHEMA
+    )
+    assert r is not None
+    assert "cartesian_join" not in _types(r)
+
+
+def test_unclear_where_clause_join_escalates():
+    sql = "SELECT c.name FROM customers c, orders o WHERE o.customer_id > c.customer_id"
+    assert assess_risk_rules(sql, SCHEMA) is None
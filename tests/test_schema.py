@@ -9,8 +9,11 @@ Purpose:
 
 from pathlib import Path
 
+from nl2sql_assistant.db import schema
 from nl2sql_assistant.db.bootstrap import ensure_sample_db
-from nl2sql_assistant.db.schema import schema_as_text
+from nl2sql_assistant.db.connection import get_connection_manager
+from nl2sql_assistant.db.schema import load_schema, schema_as_text
+from nl2sql_assistant.db.schema_model import ForeignKey, Index
 
 
 def test_schema_extraction_contains_tables(tmp_path: Path):
@@ -25,3 +28,48 @@ def test_schema_extraction_contains_tables(tmp_path: Path):
     assert "TABLE orders:" in text
     assert "TABLE order_items:" in text
     assert "TABLE products:" in text
+
+
+def test_schema_model_reads_columns_fks_and_indexes(tmp_path: Path):
+    db_path = tmp_path / "sample.db"
+    ensure_sample_db(db_path)
+    with get_connection_manager(db_path).writer() as conn:
+        conn.execute("CREATE UNIQUE INDEX orders_customer_date ON orders(customer_id, order_date);")
+        conn.execute(
+            "CREATE TABLE refunds (refund_id INTEGER PRIMARY KEY, order_id REFERENCES orders);"
+        )
+
+    model = load_schema(db_path)
+
+    assert list(model.tables) == ["customers", "order_items", "orders", "products", "refunds"]
+    orders = model.tables["orders"]
+    assert [c.name for c in orders.columns][:2] == ["order_id", "customer_id"]
+    assert ForeignKey(("customer_id",), "customers", ("customer_id",)) in orders.foreign_keys
+    assert Index("orders_customer_date", ("customer_id", "order_date"), True, "c") in (
+        orders.indexes
+    )
+    # A key without a referenced column points at the referenced primary key.
+    assert model.tables["refunds"].foreign_keys == (
+        ForeignKey(("order_id",), "orders", ("order_id",)),
+    )
+    assert model.text == schema_as_text(db_path)
+
+
+def test_schema_is_reintrospected_only_after_a_schema_change(tmp_path: Path, monkeypatch):
+    db_path = tmp_path / "sample.db"
+    ensure_sample_db(db_path)
+    first = load_schema(db_path)
+
+    calls = []
+    real = schema._introspect
+    monkeypatch.setattr(schema, "_introspect", lambda conn: calls.append(1) or real(conn))
+
+    assert load_schema(db_path) is first
+    assert calls == []
+
+    with get_connection_manager(db_path).writer() as conn:
+        conn.execute("ALTER TABLE customers ADD COLUMN loyalty_tier TEXT;")
+    changed = load_schema(db_path)
+    assert calls == [1]
+    assert changed.schema_version > first.schema_version
+    assert "loyalty_tier" in changed.text
@@ -0,0 +1,50 @@
+from pathlib import Path
+
+from nl2sql_assistant.db.bootstrap import ensure_sample_db
+from nl2sql_assistant.db.schema import load_schema, schema_as_text
+from nl2sql_assistant.db.schema_model import Column, ForeignKey, SchemaModel, Table
+
+
+def test_sample_schema_model_is_typed(tmp_path: Path):
+    db_path = tmp_path / "sample.db"
+    ensure_sample_db(db_path)
+    schema = load_schema(db_path)
+
+    orders = schema.table("ORDERS")
+    assert orders is not None and orders.primary_key == ("order_id",)
+    status = schema.column("orders", "Status")
+    assert status is not None and status.type == "TEXT" and status.notnull is True
+    assert ForeignKey(("customer_id",), "customers", ("customer_id",)) in orders.foreign_keys
+    assert schema.tables_with_column("product_id") == ("order_items", "products")
+    assert schema.render_text(["orders"]) == orders.render_text()
+    assert schema.text == schema_as_text(db_path)
+
+
+def test_join_path_follows_the_shortest_fk_chain(tmp_path: Path):
+    db_path = tmp_path / "sample.db"
+    ensure_sample_db(db_path)
+    schema = load_schema(db_path)
+
+    path = schema.join_path("customers", "products")
+    assert [(s.left_table, s.right_table) for s in path] == [
+        ("customers", "orders"),
+        ("orders", "order_items"),
+        ("order_items", "products"),
+    ]
+    assert path[0].condition() == "customers.customer_id = orders.customer_id"
+    assert schema.join_path("orders", "orders") == []
+
+
+def test_join_path_is_none_for_unconnected_or_unknown_tables():
+    parent = Table("parent", (Column("id", "INTEGER", notnull=False, pk=1),))
+    child = Table(
+        "child",
+        (Column("parent_id", "INTEGER", notnull=False, pk=0),),
+        foreign_keys=(ForeignKey(("parent_id",), "parent", ("id",)),),
+    )
+    lonely = Table("lonely", (Column("x", "TEXT", notnull=False, pk=0),))
+    schema = SchemaModel.build([parent, child, lonely])
+
+    assert schema.neighbours["parent"] == {"child"}
+    assert schema.join_path("parent", "lonely") is None
+    assert schema.join_path("missing", "parent") is None
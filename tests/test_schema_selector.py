@@ -0,0 +1,73 @@
+from pathlib import Path
+
+from nl2sql_assistant.db.bootstrap import ensure_sample_db
+from nl2sql_assistant.db.schema import load_schema
+from nl2sql_assistant.db.schema_model import Column, ForeignKey, SchemaModel, Table
+from nl2sql_assistant.rag.schema_selector import build_schema_selector, select_schema
+
+
+def _table(name: str, columns: list[str], *refs: tuple[str, str]) -> Table:
+    return Table(
+        name=name,
+        columns=tuple(Column(c, "TEXT", notnull=False, pk=0) for c in columns),
+        foreign_keys=tuple(ForeignKey((col,), ref, (col,)) for col, ref in refs),
+    )
+
+
+def _large_schema() -> SchemaModel:
+    tables = [
+        _table("customers", ["customer_id", "name", "country"]),
+        _table(
+            "orders",
+            ["order_id", "customer_id", "status", "order_date"],
+            ("customer_id", "customers"),
+        ),
+        _table(
+            "order_items",
+            ["order_id", "product_id", "quantity"],
+            ("order_id", "orders"),
+            ("product_id", "products"),
+        ),
+        _table("products", ["product_id", "name", "category", "price"]),
+    ]
+    tables += [_table(f"audit_{i}", [f"audit_{i}_id", "payload", "logged_at"]) for i in range(80)]
+    return SchemaModel.build(tables)
+
+
+def test_small_schema_is_passed_through(tmp_path: Path):
+    db_path = tmp_path / "sample.db"
+    ensure_sample_db(db_path)
+    schema = load_schema(db_path)
+    selector = build_schema_selector(schema)
+    selection = select_schema(selector, "completed orders")
+    assert not selection.pruned
+    assert selection.schema_text == schema.text
+    assert selector.neighbours["orders"] == {"customers", "order_items"}
+
+
+def test_large_schema_keeps_matches_and_fk_neighbours_under_budget():
+    selector = build_schema_selector(_large_schema())
+    selection = select_schema(selector, "Which customer placed the most orders?", token_budget=120)
+
+    assert selection.pruned
+    assert {"customers", "orders"} <= set(selection.tables)
+    assert not any(t.startswith("audit_") for t in selection.tables)
+    assert selection.token_count <= 120
+    assert "TABLE orders:" in selection.schema_text
+    assert "TABLE audit_1:" not in selection.schema_text
+
+
+def test_identifier_parts_and_dictionary_sections_are_matched():
+    dictionary = "## products\nThe catalogue of everything we sell, e.g. gadgets.\n"
+    selector = build_schema_selector(_large_schema(), dictionary)
+
+    items = select_schema(selector, "average quantity of items", top_k=1, token_budget=60)
+    assert "order_items" in items.tables
+    gadgets = select_schema(selector, "list gadgets", top_k=1, token_budget=60)
+    assert "products" in gadgets.tables
+
+
+def test_included_tables_are_always_selected():
+    selector = build_schema_selector(_large_schema())
+    selection = select_schema(selector, "customers", include=["AUDIT_7"], token_budget=60)
+    assert "audit_7" in selection.tables
@@ -0,0 +1,70 @@
+from pathlib import Path
+
+import pytest
+
+from nl2sql_assistant.db.bootstrap import ensure_sample_db
+from nl2sql_assistant.db.runner import validate_sql
+from nl2sql_assistant.db.schema import load_schema
+from nl2sql_assistant.db.schema_validation import validate_against_schema
+
+
+@pytest.fixture
+def schema(tmp_path: Path):
+    db_path = tmp_path / "sample.db"
+    ensure_sample_db(db_path)
+    return load_schema(db_path)
+
+
+@pytest.mark.parametrize(
+    "sql",
+    [
+        "SELECT c.name, o.status FROM customers c JOIN orders o ON o.customer_id = c.customer_id",
+        "SELECT Name FROM CUSTOMERS WHERE rowid = 1",
+        "SELECT status, COUNT(*) AS n FROM orders GROUP BY status ORDER BY n DESC",
+        "WITH spend AS (SELECT customer_id AS cid, COUNT(*) AS n FROM orders GROUP BY 1) "
+        "SELECT c.name, spend.n FROM customers c JOIN spend ON spend.cid = c.customer_id",
+        "SELECT name FROM customers c WHERE EXISTS "
+        "(SELECT 1 FROM orders o WHERE o.customer_id = c.customer_id AND status = 'completed')",
+        "SELECT t.* FROM (SELECT * FROM products) t WHERE t.price > 10",
+        # Aliases and qualifiers are case-insensitive, as in SQLite.
+        "SELECT C.name FROM customers c",
+        "SELECT Customers.name FROM customers",
+        "SELECT customers.name FROM Customers",
+        "SELECT x.n FROM (SELECT COUNT(*) AS n FROM orders) AS X",
+        "WITH Spend AS (SELECT COUNT(*) AS n FROM orders) SELECT spend.n FROM Spend",
+    ],
+)
+def test_valid_references_pass(schema, sql):
+    validate_against_schema(sql, schema)
+
+
+def test_unknown_table_is_reported_with_suggestion(schema):
+    with pytest.raises(ValueError, match=r"Unknown table 'order'\. Did you mean: orders"):
+        validate_against_schema('SELECT * FROM order_item JOIN "order" USING (order_id)', schema)
+
+
+def test_unknown_columns_are_all_reported(schema):
+    with pytest.raises(ValueError) as e:
+        validate_against_schema(
+            "SELECT o.stauts, c.nme FROM orders o JOIN customers c "
+            "ON c.customer_id = o.customer_id",
+            schema,
+        )
+    msg = str(e.value)
+    assert "Unknown column 'stauts' on table orders. Did you mean: status?" in msg
+    assert "Unknown column 'nme' on table customers. Did you mean: name?" in msg
+
+
+def test_unknown_alias_and_unqualified_column(schema):
+    with pytest.raises(ValueError, match=r"Unknown table or alias 'x'"):
+        validate_against_schema("SELECT x.name FROM customers c", schema)
+    with pytest.raises(ValueError, match=r"Unknown column 'prise'\. Did you mean: price\?"):
+        validate_against_schema("SELECT name FROM products WHERE prise > 5", schema)
+
+
+def test_validate_sql_uses_schema_when_given(schema):
+    ok, msg = validate_sql("SELECT emial FROM customers", schema=schema)
+    assert not ok
+    assert "Did you mean: email?" in msg
+    ok, msg = validate_sql("SELECT email FROM customers", schema=schema)
+    assert ok
@@ -0,0 +1,58 @@
+from pathlib import Path
+
+import pytest
+
+from nl2sql_assistant.chains.sql_cache import SQLCache, normalize_question
+
+MODEL = "defog/sqlcoder-7b-2"
+
+
+def test_normalize_question_ignores_case_spacing_and_punctuation():
+    assert normalize_question("  Show   ALL orders? ") == normalize_question("show all orders")
+
+
+def test_cache_hit_and_miss_counters(tmp_path: Path):
+    cache = SQLCache(tmp_path / "cache.db")
+    assert cache.get("count orders", "fp1", MODEL, "1") is None
+
+    cache.put("count orders", "fp1", MODEL, "1", "SELECT COUNT(*) FROM orders;")
+    assert cache.get("Count orders?", "fp1", MODEL, "1") == "SELECT COUNT(*) FROM orders;"
+    assert cache.get("count orders", "fp1", MODEL, "2") is None
+
+    stats = cache.stats()
+    assert (stats.hits, stats.misses, stats.entries) == (1, 2, 1)
+
+
+def test_schema_change_invalidates_entries(tmp_path: Path):
+    cache = SQLCache(tmp_path / "cache.db")
+    cache.put("count orders", "fp1", MODEL, "1", "SELECT COUNT(*) FROM orders;")
+    assert cache.get("count orders", "fp2", MODEL, "1") is None
+    assert cache.get("count orders", "fp1", MODEL, "1") is None
+
+
+def test_lru_eviction_and_ttl(tmp_path: Path):
+    cache = SQLCache(tmp_path / "cache.db", max_entries=2)
+    cache.put("q1", "fp", MODEL, "1", "SELECT 1;")
+    cache.put("q2", "fp", MODEL, "1", "SELECT 2;")
+    assert cache.get("q1", "fp", MODEL, "1") == "SELECT 1;"  # q1 is now most recent
+    cache.put("q3", "fp", MODEL, "1", "SELECT 3;")
+    assert cache.get("q2", "fp", MODEL, "1") is None
+    assert cache.get("q1", "fp", MODEL, "1") == "SELECT 1;"
+
+    expired = SQLCache(tmp_path / "cache.db", ttl_seconds=-1)
+    assert expired.get("q1", "fp", MODEL, "1") is None
+
+
+def test_cache_persists_across_instances(tmp_path: Path):
+    SQLCache(tmp_path / "cache.db").put("q", "fp", MODEL, "1", "SELECT 1;")
+    assert SQLCache(tmp_path / "cache.db").get("q", "fp", MODEL, "1") == "SELECT 1;"
+
+
+def test_failed_transaction_reraises_original_error(tmp_path: Path):
+    cache = SQLCache(tmp_path / "cache.db")
+    # SQLite can end a transaction itself (e.g. on SQLITE_FULL); the error must survive.
+    with pytest.raises(RuntimeError, match="boom"), cache._transaction():
+        cache._conn.execute("ROLLBACK;")
+        raise RuntimeError("boom")
+    cache.put("count orders", "fp1", MODEL, "1", "SELECT 1;")
+    assert cache.get("count orders", "fp1", MODEL, "1") == "SELECT 1;"
@@ -1,6 +1,6 @@
 import pytest
 
-from nl2sql_assistant.db.runner import validate_select_only
+from nl2sql_assistant.db.runner import validate_select_only, validate_select_prefix
 
 
 def test_validate_allows_select():
@@ -20,3 +20,42 @@ def test_validate_allows_select():
 def test_validate_blocks_non_select(bad_sql: str):
     with pytest.raises(ValueError):
         validate_select_only(bad_sql)
+
+
+@pytest.mark.parametrize(
+    "partial",
+    [
+        "",
+        "  SE",
+        "select",
+        "SELECT name FROM customers;",
+        "SELECT 1;\n",
+        "``",
+        "```sql",
+        "```sql\nSELECT 1",
+        "SELECT 1;\n```",
+        "-- top customers\nWITH",
+        "/* spend */ SELECT",
+    ],
+)
+def test_validate_prefix_allows_select_in_progress(partial: str):
+    validate_select_prefix(partial)
+
+
+@pytest.mark.parametrize(
+    "partial",
+    [
+        "UP",
+        "delete",
+        "SELECTX",
+        "SELECT 1; DR",
+        "```sql\nDELETE FROM customers",
+        "-- clean up\nDELETE FROM customers",
+        "/* x */ DROP TABLE customers",
+        "(SELECT 1)",
+        "```sql\nSELECT 1; DELETE FROM customers",
+    ],
+)
+def test_validate_prefix_blocks_early(partial: str):
+    with pytest.raises(ValueError):
+        validate_select_prefix(partial)
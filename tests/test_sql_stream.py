@@ -0,0 +1,69 @@
+import pytest
+from langchain_core.language_models.fake import FakeStreamingListLLM
+
+from nl2sql_assistant.chains import sql_generator
+from nl2sql_assistant.chains.sql_cache import SQLCache
+
+
+def _use_fake_model(monkeypatch, response: str) -> None:
+    monkeypatch.setattr(
+        sql_generator, "get_hf_model", lambda: FakeStreamingListLLM(responses=[response])
+    )
+
+
+def test_stream_sql_yields_tokens(monkeypatch):
+    _use_fake_model(monkeypatch, "SELECT name FROM customers;")
+    out = "".join(sql_generator.stream_sql(schema_text="", question="names"))
+    assert out == "SELECT name FROM customers;"
+
+
+def test_stream_sql_aborts_on_write_statement(monkeypatch):
+    _use_fake_model(monkeypatch, "DELETE FROM customers;")
+    seen: list[str] = []
+    with pytest.raises(ValueError, match="Only SELECT"):
+        for token in sql_generator.stream_sql(schema_text="", question="remove all"):
+            seen.append(token)
+    assert seen == []
+
+
+def test_stream_sql_aborts_on_second_statement(monkeypatch):
+    _use_fake_model(monkeypatch, "SELECT 1; DROP TABLE customers;")
+    seen: list[str] = []
+    with pytest.raises(ValueError, match="Multiple SQL statements"):
+        for token in sql_generator.stream_sql(schema_text="", question="x"):
+            seen.append(token)
+    assert "".join(seen) == "SELECT 1; "
+
+
+def test_stream_sql_serves_repeat_questions_from_cache(monkeypatch, tmp_path):
+    cache = SQLCache(tmp_path / "cache.db")
+    _use_fake_model(monkeypatch, "SELECT name FROM customers;")
+    first = "".join(sql_generator.stream_sql(schema_text="s", question="names", cache=cache))
+
+    def _no_model():
+        raise AssertionError("model should not be called on a cache hit")
+
+    monkeypatch.setattr(sql_generator, "get_hf_model", _no_model)
+    second = "".join(sql_generator.stream_sql(schema_text="s", question="Names?", cache=cache))
+    assert first == second == "SELECT name FROM customers;"
+
+
+def test_pruned_schema_prompts_share_the_full_schema_cache_entry(monkeypatch, tmp_path):
+    cache = SQLCache(tmp_path / "cache.db")
+    _use_fake_model(monkeypatch, "SELECT name FROM customers;")
+    first = "".join(
+        sql_generator.stream_sql(
+            schema_text="TABLE customers:", question="names", cache=cache, schema_fp="full"
+        )
+    )
+
+    monkeypatch.setattr(sql_generator, "get_hf_model", lambda: None)
+    second = "".join(
+        sql_generator.stream_sql(
+            schema_text="TABLE customers:\n\nTABLE orders:",
+            question="names",
+            cache=cache,
+            schema_fp="full",
+        )
+    )
+    assert first == second
@@ -0,0 +1,48 @@
+from pathlib import Path
+
+import pytest
+
+from nl2sql_assistant.db.bootstrap import ensure_sample_db
+from nl2sql_assistant.db.runner import run_query, validate_sql
+from nl2sql_assistant.db.statement import apply_limit, parse_statement
+
+
+def test_parse_is_cached_by_sql_text():
+    assert parse_statement("SELECT 1") is parse_statement("SELECT 1")
+
+
+def test_semicolon_inside_literal_is_not_a_separator():
+    stmt = parse_statement("SELECT name FROM customers WHERE name = 'a;b';")
+    assert stmt.semicolons == 1
+    assert stmt.trailing_semicolon
+    ok, _msg = validate_sql("SELECT name FROM customers WHERE name = 'a;b'", mode="read")
+    assert ok is True
+
+
+@pytest.mark.parametrize(
+    "sql, expected",
+    [
+        ("SELECT a FROM t", "SELECT a FROM t LIMIT 200"),
+        ("SELECT a FROM t LIMIT 10;", "SELECT a FROM t LIMIT 10"),
+        ("SELECT a FROM t LIMIT 1000 OFFSET 5", "SELECT a FROM t LIMIT 200 OFFSET 5"),
+        (
+            "SELECT a FROM t UNION SELECT b FROM u",
+            "SELECT a FROM t UNION SELECT b FROM u LIMIT 200",
+        ),
+    ],
+)
+def test_apply_limit_injects_or_clamps(sql: str, expected: str):
+    assert apply_limit(parse_statement(sql), 200) == expected
+
+
+def test_run_query_respects_existing_limit(tmp_path: Path):
+    db_path = ensure_sample_db(tmp_path / "sample.db")
+    cols, rows = run_query(db_path, "SELECT name FROM customers ORDER BY name LIMIT 2;")
+    assert cols == ["name"]
+    assert len(rows) == 2
+
+
+def test_run_query_rejects_writes(tmp_path: Path):
+    db_path = ensure_sample_db(tmp_path / "sample.db")
+    with pytest.raises(ValueError):
+        run_query(db_path, "DELETE FROM customers WHERE customer_id = 1")
@@ -0,0 +1,147 @@
+import sqlite3
+from pathlib import Path
+
+import pytest
+
+from nl2sql_assistant.db.bootstrap import ensure_sample_db
+from nl2sql_assistant.db.schema import schema_as_text
+from nl2sql_assistant.db.undo_journal import list_journal, prune_journal, restore_write
+from nl2sql_assistant.db.write_runner import execute_write
+
+
+def _rows(db_path: Path, sql: str):
+    with sqlite3.connect(db_path) as conn:
+        return conn.execute(sql).fetchall()
+
+
+def test_update_is_journaled_and_restored(tmp_path: Path):
+    db_path = ensure_sample_db(tmp_path / "sample.db")
+    before = _rows(db_path, "SELECT * FROM orders ORDER BY order_id")
+
+    receipt = execute_write(
+        db_path, "UPDATE orders SET status = :s WHERE customer_id = :c;", {"s": "cancelled", "c": 1}
+    )
+    assert receipt.rowcount == 2
+    assert list_journal(db_path)[0].row_count == 2
+
+    assert restore_write(db_path, receipt.journal_id) == 2
+    assert _rows(db_path, "SELECT * FROM orders ORDER BY order_id") == before
+    with pytest.raises(ValueError, match="already restored"):
+        restore_write(db_path, receipt.journal_id)
+
+
+def test_delete_and_insert_round_trip(tmp_path: Path):
+    db_path = ensure_sample_db(tmp_path / "sample.db")
+    before = _rows(db_path, "SELECT * FROM order_items ORDER BY order_item_id")
+
+    deleted = execute_write(db_path, "DELETE FROM order_items WHERE quantity >= :q", {"q": 2})
+    inserted = execute_write(
+        db_path,
+        "INSERT INTO order_items (order_id, product_id, quantity, unit_price) VALUES (1, 1, 9, 1.5)",
+        {},
+    )
+    assert deleted.rowcount > 0
+
+    assert restore_write(db_path, inserted.journal_id) == 1
+    assert restore_write(db_path, deleted.journal_id) == deleted.rowcount
+    assert _rows(db_path, "SELECT * FROM order_items ORDER BY order_item_id") == before
+
+
+def test_unjournalable_writes_are_refused(tmp_path: Path):
+    db_path = ensure_sample_db(tmp_path / "sample.db")
+    with pytest.raises(ValueError, match="INSERT OR REPLACE"):
+        execute_write(
+            db_path, "INSERT OR REPLACE INTO customers (customer_id, name) VALUES (1, 'X')", {}
+        )
+    # The same statement can still run without the journal.
+    assert (
+        execute_write(
+            db_path,
+            "INSERT OR REPLACE INTO customers (customer_id, name) VALUES (99, 'X')",
+            {},
+            journal=False,
+        ).journal_id
+        is None
+    )
+
+
+def test_journal_is_pruned_and_hidden_from_schema(tmp_path: Path):
+    db_path = ensure_sample_db(tmp_path / "sample.db")
+    for i in range(3):
+        execute_write(db_path, "UPDATE products SET price = :p WHERE product_id = 1", {"p": i})
+
+    assert "nl2sql_" not in schema_as_text(db_path)
+    with sqlite3.connect(db_path) as conn:
+        assert prune_journal(conn, keep=1) == 2
+    assert len(list_journal(db_path)) == 1
+
+
+def _tags_db(tmp_path: Path) -> Path:
+    db_path = tmp_path / "tags.db"
+    with sqlite3.connect(db_path) as conn:
+        conn.executescript(
+            """
+            CREATE TABLE tags (tag_id INTEGER PRIMARY KEY, label TEXT);
+            CREATE TABLE tag_links (
+              tag_id INTEGER REFERENCES tags(tag_id) ON DELETE CASCADE, note TEXT
+            );
+            INSERT INTO tags VALUES (1, 'a'), (2, 'b');
+            INSERT INTO tag_links VALUES (1, 'x');
+            """
+        )
+    return db_path
+
+
+def test_rowid_changing_update_and_cascading_delete_are_refused(tmp_path: Path):
+    db_path = _tags_db(tmp_path)
+    with pytest.raises(ValueError, match="rowid"):
+        execute_write(db_path, "UPDATE tags SET tag_id = 1000, label = 'z' WHERE tag_id = 1", {})
+    with pytest.raises(ValueError, match="ON DELETE CASCADE"):
+        execute_write(db_path, "DELETE FROM tags WHERE tag_id = 1", {})
+    assert _rows(db_path, "SELECT * FROM tags ORDER BY tag_id") == [(1, "a"), (2, "b")]
+    assert _rows(db_path, "SELECT * FROM tag_links") == [(1, "x")]
+
+
+def test_restore_counts_only_rows_put_back(tmp_path: Path):
+    db_path = _tags_db(tmp_path)
+    receipt = execute_write(db_path, "UPDATE tags SET label = 'z' WHERE tag_id <= 2", {})
+    with sqlite3.connect(db_path) as conn:
+        conn.execute("DELETE FROM tags WHERE tag_id = 2")
+
+    assert restore_write(db_path, receipt.journal_id) == 1
+    assert _rows(db_path, "SELECT * FROM tags") == [(1, "a")]
+
+
+def test_batched_insert_with_explicit_low_ids_is_undone(tmp_path: Path):
+    db_path = _tags_db(tmp_path)
+    with sqlite3.connect(db_path) as conn:
+        conn.execute("INSERT INTO tags VALUES (100, 'top')")
+
+    receipt = execute_write(
+        db_path,
+        "INSERT INTO tags (tag_id, label) VALUES (:id, :label)",
+        [{"id": 3, "label": "c"}, {"id": 4, "label": "d"}],
+    )
+    copied = execute_write(
+        db_path,
+        "INSERT INTO tags (tag_id, label) SELECT tag_id + 10, label FROM tags WHERE tag_id <= 2",
+        {},
+    )
+    assert restore_write(db_path, copied.journal_id) == 2
+    assert restore_write(db_path, receipt.journal_id) == 2
+    assert _rows(db_path, "SELECT tag_id FROM tags ORDER BY tag_id") == [(1,), (2,), (100,)]
+
+
+def test_batched_update_captures_rows_matched_after_earlier_sets(tmp_path: Path):
+    db_path = _tags_db(tmp_path)
+    # The second set only matches tag 2 once the first set has relabelled tag 1.
+    receipt = execute_write(
+        db_path,
+        "UPDATE tags SET label = :new WHERE tag_id IN "
+        "(SELECT tag_id + :step FROM tags WHERE label = :old)",
+        [{"new": "x", "step": 0, "old": "a"}, {"new": "y", "step": 1, "old": "x"}],
+    )
+    assert receipt.rowcount == 2
+
+    assert restore_write(db_path, receipt.journal_id) == 2
+    assert _rows(db_path, "SELECT * FROM tags ORDER BY tag_id") == [(1, "a"), (2, "b")]
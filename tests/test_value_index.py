@@ -0,0 +1,72 @@
+from pathlib import Path
+
+import pytest
+
+from nl2sql_assistant.db import value_index
+from nl2sql_assistant.db.bootstrap import ensure_sample_db
+from nl2sql_assistant.db.connection import get_connection_manager
+from nl2sql_assistant.db.value_index import ValueIndex, format_value_hints, get_value_index
+from nl2sql_assistant.db.write_runner import execute_write
+from nl2sql_assistant.prompts.sql_prompt import SQL_PROMPT
+
+
+@pytest.fixture
+def db_path(tmp_path: Path) -> Path:
+    path = tmp_path / "sample.db"
+    ensure_sample_db(path)
+    return path
+
+
+def test_indexes_low_cardinality_text_columns_only(db_path: Path):
+    index = ValueIndex(db_path)
+    index.refresh(force=True)
+
+    assert "completed" in index.values("orders", "status")
+    assert "Electronics" in index.values("products", "category")
+    assert "India" in index.values("customers", "country")
+    # UNIQUE and non-TEXT columns identify rows; they are not indexed.
+    assert index.values("customers", "email") == ()
+    assert index.values("orders", "order_id") == ()
+
+
+def test_lookup_matches_near_miss_literals(db_path: Path):
+    hits = ValueIndex(db_path).lookup("How many complete orders came from usa?")
+    found = {(h.table, h.column, h.value) for h in hits}
+    assert ("orders", "status", "completed") in found
+    assert ("customers", "country", "USA") in found
+    exact = next(h for h in hits if h.value == "USA")
+    assert exact.score == 1.0
+
+    hints = format_value_hints(hits)
+    assert "- orders.status = 'completed'" in hints
+    prompt = SQL_PROMPT.format(schema_text="TABLE orders:", question="q", value_hints=hints)
+    assert hints in prompt
+    assert format_value_hints([]) == ""
+
+
+def test_refresh_rescans_only_changed_or_stale_tables(db_path: Path, monkeypatch):
+    monkeypatch.setattr(value_index, "REFRESH_INTERVAL_SECONDS", 0.0)
+    index = get_value_index(db_path)
+    index.refresh(force=True)
+    scans = index.scans
+
+    assert index.refresh() is False
+    assert index.scans == scans
+
+    with get_connection_manager(db_path).writer() as conn:
+        conn.execute(
+            "INSERT INTO orders(customer_id, order_date, status) VALUES (1, '2026-02-01', 'refunded');"
+        )
+    assert index.refresh() is True
+    assert index.scans == scans + 1
+    assert "refunded" in index.values("orders", "status")
+
+    # An in-place UPDATE keeps MAX(rowid), so the write path marks the table stale.
+    execute_write(
+        db_path,
+        "UPDATE products SET category = 'Outdoor' WHERE category = 'Sports'",
+        None,
+    )
+    assert index.refresh() is True
+    assert index.scans == scans + 2
+    assert "Outdoor" in index.values("products", "category")
@@ -0,0 +1,69 @@
+import sqlite3
+from pathlib import Path
+
+import pytest
+
+from nl2sql_assistant.db.bootstrap import ensure_sample_db
+from nl2sql_assistant.db.write_runner import execute_write, preview_write
+
+
+def _snapshot(db_path: Path):
+    with sqlite3.connect(db_path) as conn:
+        return conn.execute("SELECT * FROM orders ORDER BY order_id").fetchall()
+
+
+def test_update_preview_diffs_rows_and_rolls_back(tmp_path: Path):
+    db_path = ensure_sample_db(tmp_path / "sample.db")
+    before = _snapshot(db_path)
+    sql = "UPDATE orders SET status = :s WHERE customer_id = :c"
+    params = {"s": "cancelled", "c": 1}
+
+    preview = preview_write(db_path, sql, params)
+
+    assert preview.op == "update" and preview.table == "orders"
+    assert preview.rowcount == 2 and not preview.truncated
+    assert {tuple(c.changed) for c in preview.changes} == {("status",)}
+    assert all(c.changed["status"][1] == "cancelled" for c in preview.changes)
+    assert _snapshot(db_path) == before
+
+    # Confirming replays the same statement for real.
+    assert execute_write(db_path, sql, params).rowcount == preview.rowcount
+
+
+def test_insert_and_delete_previews(tmp_path: Path):
+    db_path = ensure_sample_db(tmp_path / "sample.db")
+
+    insert = preview_write(
+        db_path, "INSERT INTO customers (name, country) VALUES (:n, 'NZ')", {"n": "Kiri"}
+    )
+    assert insert.rowcount == 1
+    assert insert.changes[0].before is None
+    assert insert.changes[0].after["name"] == "Kiri"
+
+    delete = preview_write(db_path, "DELETE FROM order_items WHERE order_id > :o", {"o": 0}, 2)
+    assert delete.rowcount > 2 and delete.truncated
+    assert len(delete.changes) == 2
+    assert all(c.after is None for c in delete.changes)
+
+    with sqlite3.connect(db_path) as conn:
+        assert conn.execute("SELECT COUNT(*) FROM customers WHERE name = 'Kiri'").fetchone()[0] == 0
+
+
+def test_preview_keeps_the_error_when_sqlite_rolls_back_itself(tmp_path: Path):
+    db_path = ensure_sample_db(tmp_path / "sample.db")
+    with pytest.raises(sqlite3.IntegrityError):
+        preview_write(
+            db_path, "INSERT OR ROLLBACK INTO customers (customer_id, name) VALUES (1, 'X')", {}
+        )
+    # The writer is still usable afterwards.
+    assert (
+        preview_write(db_path, "DELETE FROM order_items WHERE order_id = :o", {"o": 1}).rowcount > 0
+    )
+
+
+def test_rowid_changing_update_is_not_previewed(tmp_path: Path):
+    db_path = ensure_sample_db(tmp_path / "sample.db")
+    with pytest.raises(ValueError, match="rowid"):
+        preview_write(
+            db_path, "UPDATE products SET product_id = 1000 WHERE product_id = :p", {"p": 1}
+        )
@@ -0,0 +1,57 @@
+import sqlite3
+import threading
+from pathlib import Path
+
+import pytest
+
+from nl2sql_assistant.db.bootstrap import ensure_sample_db
+from nl2sql_assistant.db.write_queue import WriteQueue, get_write_queue
+
+INSERT = "INSERT INTO products (name, category, price) VALUES (:name, 'Queued', :price)"
+
+
+def test_concurrent_sessions_are_serialized(tmp_path: Path):
+    db_path = ensure_sample_db(tmp_path / "sample.db")
+    write_queue = WriteQueue(db_path)
+    futures = []
+    futures_lock = threading.Lock()
+
+    def session(n: int) -> None:
+        for i in range(20):
+            f = write_queue.submit(INSERT, {"name": f"s{n}-{i}", "price": i})
+            with futures_lock:
+                futures.append(f)
+
+    threads = [threading.Thread(target=session, args=(n,)) for n in range(8)]
+    for t in threads:
+        t.start()
+    for t in threads:
+        t.join()
+
+    assert all(f.result(timeout=30).rowcount == 1 for f in futures)
+    assert write_queue.depth == 0
+    assert write_queue.processed == 160
+    write_queue.close()
+
+    with sqlite3.connect(db_path) as conn:
+        assert (
+            conn.execute("SELECT COUNT(*) FROM products WHERE category = 'Queued'").fetchone()[0]
+            == 160
+        )
+
+
+def test_errors_surface_through_the_future(tmp_path: Path):
+    db_path = ensure_sample_db(tmp_path / "sample.db")
+    write_queue = get_write_queue(db_path)
+    assert write_queue is get_write_queue(tmp_path / "sample.db")
+
+    with pytest.raises(ValueError):
+        write_queue.submit("UPDATE products SET price = 0", {})
+
+    future = write_queue.submit(INSERT, {"name": None, "price": 1})
+    with pytest.raises(sqlite3.IntegrityError):
+        future.result(timeout=30)
+    assert write_queue.failed == 1
+
+    receipt = write_queue.submit(INSERT, {"name": "ok", "price": 1}).result(timeout=30)
+    assert write_queue.submit_restore(receipt.journal_id).result(timeout=30) == 1